@@ -19,6 +19,35 @@ class Settings(BaseSettings):
     
     blockchain_api_url: Optional[str] = None
     mempool_api_url: Optional[str] = None
+    esplora_api_url_mainnet: str = "https://blockstream.info/api"
+    esplora_api_url_testnet: str = "https://blockstream.info/testnet/api"
+    upstream_connect_timeout: float = 3.05
+    upstream_read_timeout: float = 10.0
+    upstream_pool_connections: int = 10  # hosts com pool próprio
+    upstream_pool_maxsize: int = 20  # conexões keep-alive por host
+    upstream_max_connections: int = 1000  # conexões simultâneas do cliente assíncrono
+    providers: str = "esplora,mempool,blockchair"  # ordem de preferência antes das primeiras medições
+    provider_latency_alpha: float = 0.2  # peso da amostra mais recente nas médias de latência e erro
+    provider_error_threshold: float = 0.5  # taxa de erro a partir da qual o provedor vai para o fim da fila
+    circuit_breaker_failure_threshold: int = 5  # falhas seguidas que abrem o circuito de um host (0 = desligado)
+    circuit_breaker_cooldown: float = 30.0  # segundos com o circuito aberto antes da chamada de teste
+    provider_rate_limit: float = 10.0  # requisições por segundo por host (0 = sem limite)
+    provider_rate_burst: int = 10
+    provider_rate_limits: str = ""  # taxa por provedor, ex: "blockchair=0.5,esplora=5"
+    provider_queue_max_wait: float = 5.0  # espera máxima na fila do limitador
+    provider_queue_size: int = 100  # requisições esperando por host
+    provider_retry_after_default: float = 1.0  # pausa após um 429 sem Retry-After
+    request_budget: float = 30.0  # prazo padrão de cada requisição HTTP (0 = sem prazo)
+    request_budgets: str = ""  # prazo por prefixo de rota, ex: "/api/validate=10,/api/balance=5"
+    provider_call_budget: float = 15.0  # tempo máximo de uma consulta, somando novas tentativas
+    provider_max_retries: int = 2  # rodadas extras pelos provedores após falhas temporárias
+    provider_retry_backoff: float = 0.1  # base do backoff exponencial (com jitter) entre rodadas
+    provider_retry_backoff_max: float = 2.0
+    provider_hedge_enabled: bool = False  # duplica consultas lentas em outro provedor (rotas assíncronas)
+    provider_hedge_delay: Optional[float] = None  # espera antes de duplicar; padrão: p95 do provedor
+    provider_hedge_min_delay: float = 0.05
+    balance_batch_max_addresses: int = 1000
+    balance_batch_concurrency: int = 32  # consultas simultâneas ao upstream por requisição em lote
     
     api_key: Optional[str] = None
     api_secret: Optional[str] = None
@@ -26,6 +55,47 @@ class Settings(BaseSettings):
     offline_mode: bool = False
     cache_dir: Optional[str] = None
     cache_timeout_cold: int = 2592000  # 30 dias
+    cache_backend: str = "sqlite"  # sqlite ou json (legado)
+    cache_max_entries: int = 10000  # 0 = sem limite
+    cache_max_bytes: int = 67108864  # 64 MB, 0 = sem limite
+    cache_sweep_interval: int = 60
+    cache_retention: int = 0  # segundos; 0 = nunca apagar do disco
+    cache_preload_entries: int = 0  # entradas carregadas em background na inicialização
+    cache_mmap_size: int = 268435456  # 256 MB do arquivo SQLite mapeados em memória
+    cache_write_behind: bool = True
+    cache_shards: int = 16
+    cache_soft_ttl: Optional[int] = None  # padrão: cache_timeout
+    cache_hard_ttl: Optional[int] = None  # padrão: igual ao soft TTL (stale-while-revalidate desligado)
+    cache_ttl_balance: Optional[int] = None  # padrão: soft TTL
+    cache_ttl_utxos: Optional[int] = None  # padrão: soft TTL
+    cache_ttl_tx_status: int = 60
+    cache_ttl_fee: int = 300
+    fee_refresh_enabled: bool = True  # atualiza em background as taxas das redes já consultadas
+    fee_refresh_ahead: float = 0.8  # fração de cache_ttl_fee após a qual as taxas são atualizadas
+    fee_source: str = "provider"  # "provider" (estimativas do provedor) ou "histogram" (calculadas do histograma da mempool)
+    fee_min_relay_rate: float = 1.0  # taxa mínima de retransmissão (sat/vB)
+    fee_history_enabled: bool = True
+    fee_history_capacity: int = 10080  # observações por rede (~4 semanas com atualização a cada 4 min)
+    fee_history_networks: str = ""  # redes atualizadas em background desde o início (padrão: NETWORK)
+    cache_adaptive_ttl: bool = False
+    cache_ttl_active: int = 60  # endereços com movimentação no mempool
+    cache_ttl_dormant: int = 86400  # endereços sem mudança há cache_dormant_after segundos
+    cache_dormant_after: int = 604800  # 7 dias
+    cache_refresh_workers: int = 4
+    cache_flush_interval: float = 2.0
+    cache_flush_max_dirty: int = 500
+    negative_cache_ttl: int = 60  # 0 = desligado
+    negative_cache_capacity: int = 1000000  # chaves por geração; ~34 bytes por chave de capacidade (~34 MB no padrão)
+    negative_cache_error_rate: float = 0.001
+    cache_tip_max_age: int = 600  # validade máxima de um dado confirmado enquanto o topo não muda
+    tip_tracker_enabled: bool = True
+    tip_poll_interval: float = 30.0
+    tip_stale_after: Optional[float] = None  # padrão: 4 × tip_poll_interval
+    connectivity_monitor_enabled: bool = True
+    connectivity_check_interval: float = 15.0
+    connectivity_failure_threshold: int = 3  # falhas seguidas para considerar o provedor offline
+    connectivity_recovery_threshold: int = 2  # sucessos seguidos para voltar a online
+    connectivity_timeout: float = 2.0
 
     class Config:
         env_file = ".env"
@@ -156,6 +226,23 @@ def get_mempool_api_url(network: str = None):
     
     return base_url
 
+def get_esplora_api_url(network: str = None):
+    """
+    Retorna a URL base da API Esplora (blockstream.info ou compatível) da rede.
+
+    Args:
+        network: Rede Bitcoin ('mainnet' ou 'testnet')
+
+    Returns:
+        str: URL base sem barra final
+    """
+    if not network:
+        network = get_network()
+    settings = get_settings()
+    if network == "mainnet":
+        return settings.esplora_api_url_mainnet.rstrip("/")
+    return settings.esplora_api_url_testnet.rstrip("/")
+
 def setup_logging():
     """Configura o logging da aplicação com base nas configurações do .env"""
     settings = get_settings()
@@ -3,6 +3,11 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.routers import keys, addresses, balance, utxo, broadcast, fee, sign, validate, tx, health
 from app.dependencies import get_network, setup_logging, get_settings
+from app.services.blockchain_service import blockchain_cache, connectivity_monitor, tip_tracker
+from app.services.deadline import DeadlineMiddleware
+from app.services.fee_service import fee_estimator
+from app.services.upstream import get_async_upstream_client, get_upstream_client
+from contextlib import asynccontextmanager
 import logging
 from fastapi.openapi.utils import get_openapi
 import os
@@ -111,10 +116,33 @@ tags_metadata = [
     },
 ]
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Inicia e encerra as tarefas de background da aplicação"""
+    blockchain_cache.start_background_tasks()
+    if settings.tip_tracker_enabled and not settings.offline_mode:
+        tip_tracker.start()
+    if settings.connectivity_monitor_enabled and not settings.offline_mode:
+        connectivity_monitor.start()
+    if settings.fee_refresh_enabled and not settings.offline_mode:
+        fee_estimator.start()
+        if settings.fee_history_enabled:
+            for network in (settings.fee_history_networks or get_network()).split(","):
+                if network.strip():
+                    fee_estimator.watch(network.strip())
+    yield
+    fee_estimator.stop()
+    connectivity_monitor.stop()
+    tip_tracker.stop()
+    blockchain_cache.shutdown()
+    get_upstream_client().close()
+    await get_async_upstream_client().aclose()
+
 app = FastAPI(
     title="Bitcoin Wallet API",
     description="API local para gerenciamento de carteiras Bitcoin",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 app.add_middleware(
@@ -124,6 +152,7 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(DeadlineMiddleware)
 
 def custom_openapi():
     if app.openapi_schema:
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import List
+from typing import List, Optional
 
 class UTXOModel(BaseModel):
     txid: str = Field(..., description="ID da transação que contém o UTXO")
@@ -27,6 +27,7 @@ class UTXOModel(BaseModel):
 class BalanceModel(BaseModel):
     balance: int = Field(..., description="Saldo total disponível em satoshis")
     utxos: List[UTXOModel] = Field(..., description="Lista de UTXOs disponíveis")
+    stale: bool = Field(False, description="True se os dados vieram do cache após o soft TTL e estão sendo atualizados")
     
     model_config = {
         "json_schema_extra": {
@@ -50,8 +51,42 @@ class BalanceModel(BaseModel):
                             "confirmations": 3,
                             "address": "mrS9zLDazNbgc5YDrLWuEhyPwbsKC8VHA2"
                         }
+                    ],
+                    "stale": False
+                }
+            ]
+        }
+    }
+
+class BalanceBatchItem(BaseModel):
+    address: str = Field(..., description="Endereço Bitcoin a ser consultado")
+    network: Optional[str] = Field(None, description="Rede Bitcoin ('mainnet' ou 'testnet'); padrão: rede configurada")
+
+class BalanceBatchRequest(BaseModel):
+    addresses: List[BalanceBatchItem] = Field(..., min_length=1, description="Endereços a consultar (redes podem ser misturadas)")
+    
+    model_config = {
+        "json_schema_extra": {
+            "examples": [
+                {
+                    "addresses": [
+                        {"address": "tb1qw508d6qejxtdg4y5r3zarvary0c5xw7kxpjzsx", "network": "testnet"},
+                        {"address": "bc1q34aq5drpuwy3wgl9lhup9892qp6svr8ldzyy7c", "network": "mainnet"}
                     ]
                 }
             ]
         }
     }
+
+class BalanceBatchResult(BaseModel):
+    address: str = Field(..., description="Endereço consultado")
+    network: str = Field(..., description="Rede do endereço")
+    status_code: int = Field(..., description="Código equivalente ao de GET /api/balance/{address} (200, 400, 404, 500 ou 503)")
+    balance: Optional[int] = Field(None, description="Saldo confirmado em satoshis")
+    utxos: List[UTXOModel] = Field(default_factory=list, description="Lista de UTXOs disponíveis")
+    stale: bool = Field(False, description="True se os dados vieram do cache após o soft TTL")
+    error: Optional[str] = Field(None, description="Mensagem de erro quando status_code não é 200")
+    retry_after: Optional[int] = Field(None, description="Segundos até tentar de novo, quando status_code é 503 por limite de requisições")
+
+class BalanceBatchResponse(BaseModel):
+    results: List[BalanceBatchResult] = Field(..., description="Resultados na mesma ordem da requisição")
@@ -1,3 +1,5 @@
+from typing import Dict, List, Optional
+
 from pydantic import BaseModel, Field
 
 class FeeEstimateModel(BaseModel):
@@ -21,4 +23,96 @@ class FeeEstimateModel(BaseModel):
                 }
             ]
         }
-    }
\ No newline at end of file
+    }
+class FeeTargetsModel(BaseModel):
+    network: str = Field(..., description="Rede Bitcoin")
+    rates: Dict[int, float] = Field(..., description="Taxa (sat/vB) para confirmar em até N blocos, por N")
+    mempool_vsize: int = Field(..., description="Tamanho da mempool no snapshot usado (vB)")
+    timestamp: int = Field(..., description="Timestamp Unix do snapshot da mempool")
+    unit: str = Field("sat/vB", description="Unidade das taxas")
+    
+    model_config = {
+        "json_schema_extra": {
+            "examples": [
+                {
+                    "network": "mainnet",
+                    "rates": {"1": 18.2, "3": 12.0, "6": 8.5, "144": 1.0},
+                    "mempool_vsize": 7350000,
+                    "timestamp": 1650123456,
+                    "unit": "sat/vB"
+                }
+            ]
+        }
+    }
+
+class FeeConfirmationModel(BaseModel):
+    network: str = Field(..., description="Rede Bitcoin")
+    blocks_by_rate: Dict[float, Optional[int]] = Field(
+        ..., description="Blocos até a confirmação para cada taxa pedida (null: abaixo da taxa mínima de retransmissão)"
+    )
+    rates_by_blocks: Dict[int, float] = Field(..., description="Menor taxa (sat/vB) para confirmar em até N blocos, por N")
+    projected_blocks: int = Field(..., description="Número de blocos projetados a partir da mempool")
+    mempool_vsize: int = Field(..., description="Tamanho da mempool na projeção usada (vB)")
+    source: str = Field(..., description="Origem da projeção: 'mempool-blocks' ou 'histogram'")
+    timestamp: int = Field(..., description="Timestamp Unix da projeção")
+    unit: str = Field("sat/vB", description="Unidade das taxas")
+    
+    model_config = {
+        "json_schema_extra": {
+            "examples": [
+                {
+                    "network": "mainnet",
+                    "blocks_by_rate": {"5.0": 4, "12.5": 2, "0.5": None},
+                    "rates_by_blocks": {"1": 18.2, "3": 7.1, "6": 1.0},
+                    "projected_blocks": 5,
+                    "mempool_vsize": 4350000,
+                    "source": "mempool-blocks",
+                    "timestamp": 1650123456,
+                    "unit": "sat/vB"
+                }
+            ]
+        }
+    }
+
+class FeeQuoteModel(BaseModel):
+    network: str = Field(..., description="Rede Bitcoin")
+    inputs: Dict[str, int] = Field(..., description="Quantidade de inputs por tipo")
+    outputs: Dict[str, int] = Field(..., description="Quantidade de outputs por tipo")
+    weight: int = Field(..., description="Peso da transação assinada (weight units)")
+    vsize: int = Field(..., description="Tamanho virtual da transação assinada (vB)")
+    rates: Dict[str, float] = Field(..., description="Taxa (sat/vB) por prioridade, de /api/fee/estimate")
+    fees: Dict[str, int] = Field(..., description="Taxa total (satoshis) por prioridade")
+    timestamp: int = Field(..., description="Timestamp Unix da estimativa de taxas")
+    
+    model_config = {
+        "json_schema_extra": {
+            "examples": [
+                {
+                    "network": "mainnet",
+                    "inputs": {"p2wpkh": 2},
+                    "outputs": {"p2wpkh": 1, "p2tr": 1},
+                    "weight": 882,
+                    "vsize": 221,
+                    "rates": {"high": 25.7, "medium": 15.2, "low": 8.9, "min": 1.1},
+                    "fees": {"high": 5680, "medium": 3360, "low": 1967, "min": 244},
+                    "timestamp": 1650123456
+                }
+            ]
+        }
+    }
+
+class FeeHistoryPoint(BaseModel):
+    timestamp: int = Field(..., description="Centro do intervalo (timestamp Unix)")
+    high: float = Field(..., description="Taxa alta média no intervalo (sat/vB)")
+    medium: float = Field(..., description="Taxa média no intervalo (sat/vB)")
+    low: float = Field(..., description="Taxa baixa média no intervalo (sat/vB)")
+    min: float = Field(..., description="Taxa mínima média no intervalo (sat/vB)")
+
+class FeeHistoryModel(BaseModel):
+    network: str = Field(..., description="Rede Bitcoin")
+    window: int = Field(..., description="Janela consultada em segundos")
+    interval: int = Field(..., description="Duração de cada ponto em segundos")
+    samples: int = Field(..., description="Número de observações na janela")
+    points: List[FeeHistoryPoint] = Field(..., description="Série reduzida (média das observações de cada intervalo)")
+    moving_average: List[FeeHistoryPoint] = Field(..., description="Média móvel da série reduzida, sobre os últimos `average` intervalos (intervalos vazios não entram na média)")
+    unit: str = Field("sat/vB", description="Unidade das taxas")
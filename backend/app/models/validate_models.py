@@ -35,8 +35,10 @@ class ValidateResponse(BaseModel):
                         "total_output": 49000,
                         "fee": 1000,
                         "is_signed": True,
-                        "estimated_size": 225,
-                        "estimated_fee_rate": 4.44
+                        "estimated_size": 222,
+                        "weight": 561,
+                        "estimated_vsize": 141,
+                        "estimated_fee_rate": 7.09
                     }
                 },
                 {
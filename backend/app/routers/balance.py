@@ -1,10 +1,14 @@
-from fastapi import APIRouter, HTTPException, Path, Query
-from app.services.blockchain_service import get_balance, get_utxos, is_offline_mode
-from app.dependencies import get_network
-from app.models.balance_models import BalanceModel
+from fastapi import APIRouter, HTTPException, Path, Query, Response
+from fastapi.responses import StreamingResponse
+from app.services.blockchain_service import CachedResult, lookup_address_async, peek_address_async, is_offline_mode
+from app.dependencies import get_network, get_settings
+from app.services.providers import ProviderUnavailable
+from app.models.balance_models import BalanceBatchRequest, BalanceBatchResponse, BalanceBatchResult, BalanceModel
+import asyncio
 import logging
+import math
 from bitcoinlib.keys import Address
-from typing import Optional
+from typing import List, Optional, Tuple
 import re
 
 logger = logging.getLogger(__name__)
@@ -60,6 +64,58 @@ def validate_bitcoin_address(address: str, network: str) -> bool:
         logger.error(f"Erro na validação de endereço: {str(e)}")
         return False
 
+def _is_unknown_address(balance_data: dict, utxos_data: list) -> bool:
+    """Endereço sem saldo e sem UTXOs (respondido com 404)"""
+    return balance_data["confirmed"] == 0 and balance_data["unconfirmed"] == 0 and not utxos_data
+
+def _batch_result(address: str, network: str, balance_result: CachedResult, utxos_result: CachedResult,
+                  offline_mode: bool) -> BalanceBatchResult:
+    """Converte o resultado de um endereço do lote, com o mesmo critério de 404 da consulta individual"""
+    if not offline_mode and _is_unknown_address(balance_result.data, utxos_result.data):
+        return BalanceBatchResult(
+            address=address, network=network, status_code=404,
+            error="Endereço não encontrado ou sem transações"
+        )
+    return BalanceBatchResult(
+        address=address,
+        network=network,
+        status_code=200,
+        balance=balance_result.data["confirmed"],
+        utxos=utxos_result.data,
+        stale=balance_result.stale or utxos_result.stale
+    )
+
+_UNAVAILABLE_DETAIL = "Nenhum provedor de blockchain disponível e sem dados em cache"
+
+def _retry_after(error: ProviderUnavailable) -> Optional[int]:
+    """Valor do `Retry-After` (segundos, arredondado para cima) quando o limitador recusou a consulta"""
+    if error.retry_after is None:
+        return None
+    return max(1, math.ceil(error.retry_after))
+
+def _unavailable(error: ProviderUnavailable) -> HTTPException:
+    """503 para um endereço sem provedor disponível e sem dados em cache"""
+    retry_after = _retry_after(error)
+    return HTTPException(
+        status_code=503,
+        detail=_UNAVAILABLE_DETAIL,
+        headers={"Retry-After": str(retry_after)} if retry_after is not None else None
+    )
+
+def _batch_error(address: str, network: str, error: Exception) -> BalanceBatchResult:
+    """Resultado de um endereço do lote cuja consulta falhou"""
+    if isinstance(error, ProviderUnavailable):
+        logger.warning(f"[BALANCE] Sem provedor disponível para {address}: {str(error)}")
+        return BalanceBatchResult(
+            address=address, network=network, status_code=503, error=_UNAVAILABLE_DETAIL,
+            retry_after=_retry_after(error)
+        )
+    logger.error(f"Erro ao consultar saldo de {address}: {str(error)}", exc_info=True)
+    return BalanceBatchResult(
+        address=address, network=network, status_code=500,
+        error=f"Erro ao consultar saldo: {str(error)}"
+    )
+
 @router.get("/{address}", 
             summary="Consulta saldo e UTXOs de um endereço",
             description="""
@@ -122,7 +178,11 @@ endereço. No modelo UTXO do Bitcoin:
 ## Observações:
 
 * O saldo mostra apenas UTXOs confirmados (pelo menos 1 confirmação)
+* Quando o campo `stale` é `true` (e o header `X-Cache-Stale: true` está presente), os dados vieram
+  do cache após o soft TTL e estão sendo atualizados em background
 * Para endereços recém-criados ou sem fundos, a lista de UTXOs estará vazia
+* Endereços sem fundos ficam no cache negativo por `NEGATIVE_CACHE_TTL` segundos; consultas
+  repetidas nesse intervalo retornam 404 sem consultar a blockchain
 * Os valores são expressos em satoshis (1 BTC = 100,000,000 satoshis)
             """,
             response_model=BalanceModel,
@@ -130,9 +190,11 @@ endereço. No modelo UTXO do Bitcoin:
                 400: {"description": "Endereço inválido"},
                 404: {"description": "Endereço não encontrado"},
                 429: {"description": "Muitas requisições"},
-                500: {"description": "Erro ao consultar a blockchain"}
+                500: {"description": "Erro ao consultar a blockchain"},
+                503: {"description": "Nenhum provedor disponível e sem dados em cache (com Retry-After)"}
             })
-def get_balance_utxos(
+async def get_balance_utxos(
+    response: Response,
     address: str = Path(..., description="Endereço Bitcoin a ser consultado"),
     network: Optional[str] = None,
     force_offline: bool = Query(False, description="Forçar modo offline (usar apenas cache local)")
@@ -150,7 +212,7 @@ def get_balance_utxos(
     try:
         network = network or get_network()
         
-        offline_mode = force_offline or is_offline_mode()
+        offline_mode = force_offline or is_offline_mode(network)
         if offline_mode:
             logger.info(f"[BALANCE] Operando em modo offline para o endereço {address}")
         
@@ -162,25 +224,143 @@ def get_balance_utxos(
                     detail=f"Endereço Bitcoin inválido para a rede {network}"
                 )
         
-        balance_data = get_balance(address, network, offline_mode)
-        utxos_data = get_utxos(address, network, offline_mode)
+        balance_result, utxos_result = await lookup_address_async(address, network, offline_mode)
+        balance_data = balance_result.data
+        utxos_data = utxos_result.data
+        stale = balance_result.stale or utxos_result.stale
         
-        if not offline_mode and balance_data["confirmed"] == 0 and balance_data["unconfirmed"] == 0 and not utxos_data:
+        if not offline_mode and _is_unknown_address(balance_data, utxos_data):
             raise HTTPException(
                 status_code=404,
                 detail="Endereço não encontrado ou sem transações"
             )
         
+        response.headers["X-Cache-Stale"] = "true" if stale else "false"
         return BalanceModel(
             balance=balance_data['confirmed'],
-            utxos=utxos_data
+            utxos=utxos_data,
+            stale=stale
         )
         
     except HTTPException:
         raise
+    except ProviderUnavailable as e:
+        logger.warning(f"[BALANCE] Sem provedor disponível para {address}: {str(e)}")
+        raise _unavailable(e)
     except Exception as e:
         logger.error(f"Erro ao consultar saldo: {str(e)}", exc_info=True)
         raise HTTPException(
             status_code=500,
             detail=f"Erro ao consultar saldo: {str(e)}"
-        )
\ No newline at end of file
+        )
+
+@router.post("/batch",
+            summary="Consulta saldo e UTXOs de vários endereços",
+            description="""
+Consulta saldo e UTXOs de uma lista de endereços em uma única requisição. Os endereços
+podem ser de redes diferentes.
+
+## Como funciona:
+
+* Endereços presentes no cache são respondidos imediatamente
+* Os demais são consultados na blockchain em paralelo, com no máximo
+  `BALANCE_BATCH_CONCURRENCY` consultas simultâneas
+* Cada resultado traz um `status_code` equivalente ao de `GET /api/balance/{address}`
+  (200, 400 para endereço inválido, 404 para endereço sem transações, 503 sem provedor
+  disponível, com `retry_after` quando o limite de requisições foi atingido)
+
+## Streaming:
+
+Com `stream=true` a resposta é NDJSON (`application/x-ndjson`): um resultado por linha,
+na ordem em que ficam prontos, para que endereços lentos não atrasem os rápidos.
+Sem streaming, os resultados vêm em um único JSON, na ordem da requisição.
+
+## Exemplo de resposta:
+```json
+{
+  "results": [
+    {
+      "address": "tb1qw508d6qejxtdg4y5r3zarvary0c5xw7kxpjzsx",
+      "network": "testnet",
+      "status_code": 200,
+      "balance": 150000,
+      "utxos": [],
+      "stale": false,
+      "error": null
+    }
+  ]
+}
+```
+            """,
+            response_model=BalanceBatchResponse,
+            responses={
+                400: {"description": "Lote maior que o limite configurado"},
+                500: {"description": "Erro ao consultar a blockchain"}
+            })
+async def get_balance_batch(
+    request: BalanceBatchRequest,
+    stream: bool = Query(False, description="Retornar NDJSON na ordem de conclusão"),
+    force_offline: bool = Query(False, description="Forçar modo offline (usar apenas cache local)")
+):
+    """
+    Consulta o saldo e UTXOs de vários endereços.
+    
+    - **addresses**: Lista de endereços, cada um com rede opcional
+    - **stream**: Se True, retorna NDJSON na ordem de conclusão
+    - **force_offline**: Se True, usa apenas dados do cache local sem consultar a blockchain
+    """
+    settings = get_settings()
+    if len(request.addresses) > settings.balance_batch_max_addresses:
+        raise HTTPException(
+            status_code=400,
+            detail=f"O lote aceita no máximo {settings.balance_batch_max_addresses} endereços"
+        )
+    
+    results: List[Optional[BalanceBatchResult]] = [None] * len(request.addresses)
+    pending: List[Tuple[int, str, str, bool]] = []
+    
+    # Endereços inválidos e presentes no cache são respondidos sem esperar o upstream
+    for index, item in enumerate(request.addresses):
+        network = item.network or get_network()
+        try:
+            offline_mode = force_offline or is_offline_mode(network)
+            if not offline_mode and not validate_bitcoin_address(item.address, network):
+                results[index] = BalanceBatchResult(
+                    address=item.address, network=network, status_code=400,
+                    error=f"Endereço Bitcoin inválido para a rede {network}"
+                )
+                continue
+            cached = await peek_address_async(item.address, network, offline_mode)
+            if cached is not None:
+                results[index] = _batch_result(item.address, network, *cached, offline_mode)
+            else:
+                pending.append((index, item.address, network, offline_mode))
+        except Exception as e:
+            # A falha de um endereço não derruba o lote inteiro
+            results[index] = _batch_error(item.address, network, e)
+    
+    logger.info(f"[BALANCE] Lote com {len(request.addresses)} endereços, {len(pending)} consultas ao upstream")
+    semaphore = asyncio.Semaphore(max(1, settings.balance_batch_concurrency))
+    
+    async def fetch(index: int, address: str, network: str, offline_mode: bool) -> Tuple[int, BalanceBatchResult]:
+        async with semaphore:
+            try:
+                balance_result, utxos_result = await lookup_address_async(address, network, offline_mode)
+                return index, _batch_result(address, network, balance_result, utxos_result, offline_mode)
+            except Exception as e:
+                return index, _batch_error(address, network, e)
+    
+    if stream:
+        async def ndjson():
+            for result in results:
+                if result is not None:
+                    yield result.model_dump_json() + "\n"
+            for next_result in asyncio.as_completed([fetch(*item) for item in pending]):
+                _, result = await next_result
+                yield result.model_dump_json() + "\n"
+        
+        return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+    
+    for index, result in await asyncio.gather(*(fetch(*item) for item in pending)):
+        results[index] = result
+    return BalanceBatchResponse(results=results)
@@ -1,7 +1,7 @@
 from fastapi import APIRouter, HTTPException
 from app.models.broadcast_models import BroadcastRequest, BroadcastResponse
-import requests
 from app.dependencies import get_blockchain_api_url
+from app.services.upstream import get_async_upstream_client
 import logging
 
 logger = logging.getLogger(__name__)
@@ -60,7 +60,7 @@ Broadcast é o processo de enviar uma transação assinada para a rede Bitcoin,
 4. Use o endpoint `/api/tx/{txid}` para monitorar o status da transação após o broadcast
             """,
             response_model=BroadcastResponse)
-def broadcast_transaction(request: BroadcastRequest):
+async def broadcast_transaction(request: BroadcastRequest):
     """
     Transmite uma transação Bitcoin assinada para a rede.
     
@@ -70,7 +70,7 @@ def broadcast_transaction(request: BroadcastRequest):
     """
     try:
         url = f"{get_blockchain_api_url()}/tx"
-        response = requests.post(url, json={"tx": request.tx_hex})
+        response = await get_async_upstream_client().post(url, json={"tx": request.tx_hex})
         
         if response.status_code != 200:
             logger.error(f"Erro ao transmitir transação: {response.text}")
@@ -1,7 +1,12 @@
 # app/routers/fee.py
 from fastapi import APIRouter, Query, HTTPException
-from app.models.fee_models import FeeEstimateModel
-from app.services.fee_service import get_fee_estimate
+from app.models.fee_models import (
+    FeeConfirmationModel, FeeEstimateModel, FeeHistoryModel, FeeQuoteModel, FeeTargetsModel
+)
+from app.services.fee_service import (
+    get_fee_confirmation_async, get_fee_estimate_async, get_fee_history, get_fee_quote_async, get_fee_targets_async
+)
+from app.services.providers import ProviderUnavailable
 from app.dependencies import get_network
 import logging
 
@@ -66,7 +71,7 @@ mais rapidamente pelos mineradores.
 * Taxa mínima (min) geralmente é suficiente para inclusão eventual
            """,
            response_model=FeeEstimateModel)
-def estimate_fee(
+async def estimate_fee(
     priority: str = Query(None, description="Nível de prioridade (high, medium, low)"), 
     network: str = Query(None, description="Rede Bitcoin (mainnet, testnet)")
 ):
@@ -80,8 +85,281 @@ def estimate_fee(
     """
     try:
         network = network or get_network()
-        result = get_fee_estimate(network)
+        result = await get_fee_estimate_async(network)
         return result
     except Exception as e:
         logger.error(f"Erro ao estimar taxa: {str(e)}", exc_info=True)
-        raise HTTPException(status_code=500, detail=f"Erro ao estimar taxa: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Erro ao estimar taxa: {str(e)}")
+
+# Maior número de inputs ou outputs de uma cotação
+MAX_QUOTE_COUNT = 100_000
+
+def _parse_counts(value: str) -> dict:
+    """Converte 'tipo:quantidade,...' (quantidade padrão 1) em quantidade por tipo"""
+    counts = {}
+    for item in value.split(","):
+        kind, _, count = item.partition(":")
+        if kind.strip():
+            counts[kind.strip().lower()] = counts.get(kind.strip().lower(), 0) + int(count or 1)
+    return counts
+
+@router.get("/quote",
+           summary="Calcula a taxa de uma transação planejada",
+           description="""
+Calcula o peso, o tamanho virtual e a taxa total de uma transação a partir do número
+de inputs e outputs de cada tipo, sem montar a transação.
+
+## Como é calculado
+
+O tamanho considera a transação já assinada e o desconto da testemunha (segwit): bytes
+da testemunha pesam 1 e os demais 4, e o tamanho virtual é o peso dividido por 4. As
+assinaturas são contadas com o maior tamanho padrão (72 bytes ECDSA, 64 bytes Schnorr),
+então a taxa nunca fica abaixo da pedida. A taxa total de cada prioridade é o tamanho
+virtual vezes a taxa de `/api/fee/estimate`.
+
+## Tipos suportados:
+
+* **inputs**: p2pkh, p2sh-p2wpkh, p2wpkh, p2tr
+* **outputs**: p2pkh, p2sh, p2wpkh, p2wsh, p2tr
+
+## Parâmetros:
+
+* **inputs**: Inputs como `tipo:quantidade`, separados por vírgula (ex: `p2wpkh:2`)
+* **outputs**: Outputs como `tipo:quantidade`, separados por vírgula (ex: `p2wpkh:1,p2tr:1`)
+* **network**: Rede Bitcoin (mainnet ou testnet)
+
+## Exemplo de resposta:
+```json
+{
+  "network": "mainnet",
+  "inputs": {"p2wpkh": 2},
+  "outputs": {"p2wpkh": 1, "p2tr": 1},
+  "weight": 882,
+  "vsize": 221,
+  "rates": {"high": 25.7, "medium": 15.2, "low": 8.9, "min": 1.1},
+  "fees": {"high": 5680, "medium": 3360, "low": 1967, "min": 244},
+  "timestamp": 1650123456
+}
+```
+           """,
+           response_model=FeeQuoteModel)
+async def fee_quote(
+    inputs: str = Query(..., description="Inputs como tipo:quantidade, separados por vírgula"),
+    outputs: str = Query(..., description="Outputs como tipo:quantidade, separados por vírgula"),
+    network: str = Query(None, description="Rede Bitcoin (mainnet, testnet)")
+):
+    """
+    Calcula peso, tamanho virtual e taxa total de uma transação planejada.
+    
+    - **inputs**: Inputs como tipo:quantidade, separados por vírgula
+    - **outputs**: Outputs como tipo:quantidade, separados por vírgula
+    - **network**: Rede Bitcoin (mainnet, testnet)
+    """
+    try:
+        input_counts = _parse_counts(inputs)
+        output_counts = _parse_counts(outputs)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Quantidades devem ser números inteiros")
+    for counts in (input_counts, output_counts):
+        if not 0 < sum(counts.values()) <= MAX_QUOTE_COUNT or min(counts.values()) < 0:
+            raise HTTPException(status_code=400,
+                                detail=f"Informe entre 1 e {MAX_QUOTE_COUNT} inputs e outputs, sem quantidades negativas")
+    
+    try:
+        return await get_fee_quote_async(input_counts, output_counts, network or get_network())
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+# Maior alvo aceito: uma semana de blocos
+MAX_FEE_TARGET = 1008
+
+@router.get("/targets",
+           summary="Estima a taxa para confirmar em até N blocos",
+           description="""
+Calcula, para cada alvo de confirmação pedido, a taxa necessária para a transação
+entrar em até N blocos.
+
+## Como é calculado
+
+A partir do histograma de taxas da mempool (faixas de taxa e o tamanho somado das
+transações em cada uma), os blocos seguintes são preenchidos com as taxas mais
+altas primeiro. A taxa para N blocos é a da faixa que fica no limite do bloco N; se
+a mempool inteira couber em N blocos, vale a taxa mínima de retransmissão.
+
+O histograma é mantido em cache e atualizado em background, então cada consulta é
+respondida sem esperar o upstream.
+
+## Parâmetros:
+
+* **blocks**: Alvos em blocos, separados por vírgula (1 a 1008)
+* **network**: Rede Bitcoin (mainnet ou testnet)
+
+## Exemplo de resposta:
+```json
+{
+  "network": "mainnet",
+  "rates": {"1": 18.2, "3": 12.0, "6": 8.5, "144": 1.0},
+  "mempool_vsize": 7350000,
+  "timestamp": 1650123456,
+  "unit": "sat/vB"
+}
+```
+           """,
+           response_model=FeeTargetsModel)
+async def fee_targets(
+    blocks: str = Query("1,2,3,6,12,24,144", description="Alvos de confirmação em blocos, separados por vírgula"),
+    network: str = Query(None, description="Rede Bitcoin (mainnet, testnet)")
+):
+    """
+    Estima a taxa para confirmar em até N blocos, para cada alvo pedido.
+    
+    - **blocks**: Alvos de confirmação em blocos, separados por vírgula
+    - **network**: Rede Bitcoin (mainnet, testnet)
+    """
+    try:
+        targets = sorted({int(block) for block in blocks.split(",") if block.strip()})
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Alvos devem ser números inteiros de blocos")
+    if not targets or targets[0] < 1 or targets[-1] > MAX_FEE_TARGET:
+        raise HTTPException(status_code=400, detail=f"Alvos devem estar entre 1 e {MAX_FEE_TARGET} blocos")
+    
+    network = network or get_network()
+    try:
+        return await get_fee_targets_async(targets, network)
+    except ProviderUnavailable as e:
+        logger.error(f"Histograma da mempool indisponível: {str(e)}")
+        raise HTTPException(status_code=503, detail="Histograma da mempool indisponível")
+
+# Maior número de taxas ou alvos por consulta
+MAX_FEE_QUERIES = 100
+
+@router.get("/confirmation",
+           summary="Relaciona taxa e tempo de confirmação",
+           description="""
+Responde, para um pagamento em lote, às duas perguntas:
+
+* **Pagando X sat/vB, em quantos blocos a transação confirma?** (`rates`)
+* **Qual a menor taxa para confirmar em até N blocos?** (`blocks`)
+
+## Como é calculado
+
+Os próximos blocos são projetados a partir da mempool atual (`/v1/fees/mempool-blocks`
+do mempool.space ou, sem esse provedor, o histograma de taxas da mempool), e cada bloco
+é reduzido à menor taxa que ainda entra nele. O número de blocos para uma taxa é uma
+busca binária nessas taxas-limite; a menor taxa para N blocos é a taxa-limite do bloco N.
+A projeção é mantida em cache e atualizada em background.
+
+As estimativas supõem que não cheguem transações com taxa maior antes da confirmação.
+Taxas abaixo da mínima de retransmissão retornam `null`.
+
+## Parâmetros:
+
+* **rates**: Taxas em sat/vB, separadas por vírgula
+* **blocks**: Alvos em blocos, separados por vírgula (1 a 1008)
+* **network**: Rede Bitcoin (mainnet ou testnet)
+
+Pelo menos um de `rates` e `blocks` deve ser informado.
+
+## Exemplo de resposta:
+```json
+{
+  "network": "mainnet",
+  "blocks_by_rate": {"5.0": 4, "12.5": 2, "0.5": null},
+  "rates_by_blocks": {"1": 18.2, "3": 7.1, "6": 1.0},
+  "projected_blocks": 5,
+  "mempool_vsize": 4350000,
+  "source": "mempool-blocks",
+  "timestamp": 1650123456,
+  "unit": "sat/vB"
+}
+```
+           """,
+           response_model=FeeConfirmationModel)
+async def fee_confirmation(
+    rates: str = Query(None, description="Taxas em sat/vB, separadas por vírgula"),
+    blocks: str = Query(None, description="Alvos de confirmação em blocos, separados por vírgula"),
+    network: str = Query(None, description="Rede Bitcoin (mainnet, testnet)")
+):
+    """
+    Estima em quantos blocos confirma cada taxa e a menor taxa para cada alvo.
+    
+    - **rates**: Taxas em sat/vB, separadas por vírgula
+    - **blocks**: Alvos de confirmação em blocos, separados por vírgula
+    - **network**: Rede Bitcoin (mainnet, testnet)
+    """
+    try:
+        fee_rates = sorted({float(rate) for rate in (rates or "").split(",") if rate.strip()})
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Taxas devem ser números em sat/vB")
+    try:
+        targets = sorted({int(block) for block in (blocks or "").split(",") if block.strip()})
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Alvos devem ser números inteiros de blocos")
+    if not fee_rates and not targets:
+        raise HTTPException(status_code=400, detail="Informe taxas (rates) ou alvos em blocos (blocks)")
+    if len(fee_rates) + len(targets) > MAX_FEE_QUERIES:
+        raise HTTPException(status_code=400, detail=f"Informe no máximo {MAX_FEE_QUERIES} taxas e alvos")
+    if fee_rates and not 0 < fee_rates[0] <= fee_rates[-1] < float("inf"):
+        raise HTTPException(status_code=400, detail="Taxas devem ser positivas")
+    if targets and (targets[0] < 1 or targets[-1] > MAX_FEE_TARGET):
+        raise HTTPException(status_code=400, detail=f"Alvos devem estar entre 1 e {MAX_FEE_TARGET} blocos")
+    
+    network = network or get_network()
+    try:
+        return await get_fee_confirmation_async(fee_rates, targets, network)
+    except ProviderUnavailable as e:
+        logger.error(f"Projeção da mempool indisponível: {str(e)}")
+        raise HTTPException(status_code=503, detail="Projeção da mempool indisponível")
+
+@router.get("/history",
+           summary="Histórico das taxas estimadas",
+           description="""
+Retorna a evolução das taxas estimadas (alta, média, baixa e mínima) em uma janela de
+tempo, para acompanhar tendências e escolher o momento de consolidar UTXOs.
+
+## Como funciona
+
+As estimativas atualizadas em background (ver `/api/fee/estimate`) são gravadas em um
+histórico por rede, persistido em disco. A janela pedida é dividida em `points`
+intervalos iguais; cada ponto é a média das observações do intervalo, e a média móvel
+usa os últimos `average` pontos. Intervalos sem observações são omitidos.
+
+## Parâmetros:
+
+* **window**: Janela a partir de agora (ex: `90m`, `24h`, `7d`; padrão `24h`)
+* **points**: Número máximo de pontos (padrão 96)
+* **average**: Pontos na janela da média móvel (padrão 6)
+* **network**: Rede Bitcoin (mainnet ou testnet)
+
+## Exemplo de resposta:
+```json
+{
+  "network": "mainnet",
+  "window": 86400,
+  "interval": 900,
+  "samples": 360,
+  "points": [{"timestamp": 1650120450, "high": 25.0, "medium": 15.2, "low": 8.1, "min": 12.0}],
+  "moving_average": [{"timestamp": 1650120450, "high": 24.1, "medium": 14.8, "low": 8.0, "min": 11.7}],
+  "unit": "sat/vB"
+}
+```
+           """,
+           response_model=FeeHistoryModel)
+def fee_history(
+    window: str = Query("24h", description="Janela a partir de agora (ex: 90m, 24h, 7d)"),
+    points: int = Query(96, ge=1, le=1000, description="Número máximo de pontos"),
+    average: int = Query(6, ge=1, le=1000, description="Pontos na janela da média móvel"),
+    network: str = Query(None, description="Rede Bitcoin (mainnet, testnet)")
+):
+    """
+    Retorna o histórico das taxas estimadas, reduzido e com média móvel.
+    
+    - **window**: Janela a partir de agora (ex: 90m, 24h, 7d)
+    - **points**: Número máximo de pontos
+    - **average**: Pontos na janela da média móvel
+    - **network**: Rede Bitcoin (mainnet, testnet)
+    """
+    try:
+        return get_fee_history(window, network or get_network(), points, average)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
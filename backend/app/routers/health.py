@@ -1,5 +1,9 @@
 from fastapi import APIRouter
-from app.services.blockchain_service import get_balance
+from app.services.blockchain_service import (
+    get_balance_async, blockchain_cache, upstream_flight, async_upstream_flight, tip_tracker, negative_cache,
+    connectivity_monitor, provider_router
+)
+from app.services.fee_service import fee_estimator
 from app.services.tx_status_service import get_transaction_status
 import logging
 
@@ -14,14 +18,14 @@ NETWORK_TEST_ADDRESSES = {
 
 @router.get("/health")
 async def health_check():
-    health_status = {"status": "healthy", "networks": {}}
+    health_status = {"status": "healthy", "networks": {}, "providers": connectivity_monitor.stats()}
     
     try:
         # Verifica a conexão com mainnet e testnet
         for network in ["mainnet", "testnet"]:
             try:
                 test_address = NETWORK_TEST_ADDRESSES[network]
-                balance = get_balance(test_address, network, offline_mode=False)
+                balance = await get_balance_async(test_address, network, offline_mode=False)
                 health_status["networks"][network] = {
                     "status": "ok",
                     "connection": "online"
@@ -52,7 +56,7 @@ async def metrics():
         for network in ["mainnet", "testnet"]:
             try:
                 address = NETWORK_TEST_ADDRESSES[network]
-                balance = get_balance(address, network, offline_mode=False)
+                balance = await get_balance_async(address, network, offline_mode=False)
                 
                 metrics_data[network] = {
                     "confirmed_balance": balance.get("confirmed", 0),
@@ -73,4 +77,20 @@ async def metrics():
             "error": str(e),
             "mainnet": {"confirmed_balance": 0, "unconfirmed_balance": 0},
             "testnet": {"confirmed_balance": 0, "unconfirmed_balance": 0}
-        } 
\ No newline at end of file
+        } 
+
+@router.get("/metrics/cache")
+async def cache_metrics():
+    """Retorna contadores de uso do cache e do agrupamento de consultas ao upstream"""
+    return {
+        "cache": blockchain_cache.stats(),
+        "negative_cache": negative_cache.stats(),
+        "single_flight": upstream_flight.stats(),
+        "single_flight_async": async_upstream_flight.stats(),
+        "tip": tip_tracker.stats(),
+        "fees": fee_estimator.stats(),
+        "providers": provider_router.stats(),
+        "circuits": provider_router.circuit_stats(),
+        "rate_limits": provider_router.limiter_stats(),
+        "provider_requests": provider_router.request_stats()
+    }
@@ -2,7 +2,7 @@
 from fastapi import APIRouter, HTTPException, Path, Query, Body
 from app.models.transaction_status_models import TransactionStatusModel
 from app.models.utxo_models import TransactionRequest, TransactionResponse
-from app.services.tx_status_service import get_transaction_status
+from app.services.tx_status_service import get_transaction_status_async
 from app.services.transaction.tx_builder_service import build_transaction
 from app.dependencies import get_network
 import logging
@@ -69,7 +69,7 @@ bloco, timestamp e link para explorador.
 * Transações podem ser rejeitadas da mempool se tiverem taxa muito baixa
             """,
             response_model=TransactionStatusModel)
-def get_tx_status(
+async def get_tx_status(
     txid: str = Path(..., min_length=64, max_length=64, description="ID da transação (hash de 64 caracteres hexadecimais)"),
     network: str = Query(None, description="Rede Bitcoin (mainnet ou testnet)")
 ):
@@ -83,7 +83,7 @@ def get_tx_status(
     """
     try:
         network = network or get_network()
-        result = get_transaction_status(txid, network)
+        result = await get_transaction_status_async(txid, network)
         return result
     except Exception as e:
         logger.error(f"Erro ao consultar status da transação: {str(e)}", exc_info=True)
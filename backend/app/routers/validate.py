@@ -51,8 +51,10 @@ Valida uma transação Bitcoin verificando sua estrutura, assinaturas e balanço
     "total_output": 49000,
     "fee": 1000,
     "is_signed": true,
-    "estimated_size": 225,
-    "estimated_fee_rate": 4.44
+    "estimated_size": 222,
+    "weight": 561,
+    "estimated_vsize": 141,
+    "estimated_fee_rate": 7.09
   }
 }
 ```
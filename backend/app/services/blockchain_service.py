@@ -1,96 +1,358 @@
-import requests
-from app.dependencies import get_blockchain_api_url, get_cache_dir, get_cache_timeout, is_offline_mode_enabled
-from fastapi import HTTPException
+import asyncio
+from app.dependencies import get_network, get_settings, is_offline_mode_enabled
+from app.services.cache import NegativeCache, PersistentBlockchainCache
+from app.services.cache.blockchain_cache import CacheEntry
+from app.services.connectivity import ConnectivityMonitor
+from app.services.providers import UTXOS, ProviderRouter, ProviderUnavailable, create_providers
+from app.services.single_flight import AsyncSingleFlight, SingleFlight
+from app.services.tip_tracker import TipTracker
 import logging
-from functools import lru_cache
-from typing import Dict, List, Any, Optional
+from typing import Dict, Any, Optional, NamedTuple, Tuple
+from concurrent.futures import ThreadPoolExecutor
+import threading
 import time
-import json
-import os
-from pathlib import Path
 
 logger = logging.getLogger(__name__)
 
-class PersistentBlockchainCache:
-    def __init__(self):
-        self._cache = {}
-        self._timestamps = {}
-        self._ensure_cache_dir()
-        self._load_cache()
+blockchain_cache = PersistentBlockchainCache()
+negative_cache = NegativeCache()
+upstream_flight = SingleFlight()
+async_upstream_flight = AsyncSingleFlight()
+tip_tracker = TipTracker()
+connectivity_monitor = ConnectivityMonitor(on_tip=tip_tracker.record)
+provider_router = ProviderRouter(
+    create_providers(),
+    is_available=lambda provider, network: connectivity_monitor.is_online(network, provider=provider)
+)
+refresh_executor = ThreadPoolExecutor(
+    max_workers=get_settings().cache_refresh_workers,
+    thread_name_prefix="cache-refresh"
+)
+_refreshing = set()
+_refreshing_lock = threading.Lock()
+
+class CachedResult(NamedTuple):
+    """Resultado de uma consulta com indicação se veio de um cache desatualizado"""
+    data: Any
+    stale: bool = False
+
+_KIND_LABELS = {
+    "balance": "saldo",
+    "utxos": "UTXOs"
+}
+
+def _is_empty_result(data: Any) -> bool:
+    """Verifica se o saldo ou a lista de UTXOs indica um endereço sem fundos"""
+    if isinstance(data, dict):
+        return not data.get("confirmed") and not data.get("unconfirmed")
+    return not data
+
+def _store_results(results: Dict[str, Any], tip_height: Optional[int]):
+    """
+    Salva juntos os resultados de uma consulta ao upstream.
+
+    Resultados vazios vão para o cache negativo e só substituem uma entrada
+    que já exista no cache principal, para que varreduras de endereços nunca
+    usados não ocupem o cache persistente.
+    """
+    to_store = {}
+    for cache_key, result in results.items():
+        if _is_empty_result(result):
+            negative_cache.add(cache_key)
+            if blockchain_cache.get_entry(cache_key) is None:
+                continue
+        to_store[cache_key] = result
+    if to_store:
+        blockchain_cache.set_many(to_store, tip_height)
+
+def _utxo_confirmations(utxo: Dict[str, Any], tip_height: Optional[int]) -> int:
+    """Número de confirmações de um UTXO no formato Esplora (`status`) ou já normalizado"""
+    status = utxo.get("status")
+    if not isinstance(status, dict):
+        return utxo.get("confirmations", 0)
+    if not status.get("confirmed"):
+        return 0
+    block_height = status.get("block_height")
+    if tip_height is not None and block_height:
+        return max(1, tip_height - block_height + 1)
+    return 1
+
+def _parse_utxos(data: Any, address: str, network: str, tip_height: Optional[int]) -> list:
+    # Transformar do formato Esplora (comum a todos os provedores) para o formato padrão
+    result = []
+    for utxo in data:
+        result.append({
+            "txid": utxo.get("txid"),
+            "vout": utxo.get("vout"),
+            "value": utxo.get("value"),
+            "script": utxo.get("scriptpubkey", ""),
+            "confirmations": _utxo_confirmations(utxo, tip_height),
+            "address": address
+        })
+    return result
+
+def _balance_from_utxos(utxos: list) -> dict:
+    """
+    Calcula o saldo a partir da lista de UTXOs.
+
+    Confirmado é a soma dos UTXOs com pelo menos uma confirmação; não
+    confirmado, a soma dos UTXOs ainda no mempool. Como saldo e UTXOs vêm da
+    mesma resposta, os dois nunca divergem.
+    """
+    balance = {"confirmed": 0, "unconfirmed": 0}
+    for utxo in utxos:
+        bucket = "confirmed" if _utxo_confirmations(utxo, None) > 0 else "unconfirmed"
+        balance[bucket] += utxo.get("value", 0)
+    return balance
+
+def _address_results(data: Any, address: str, network: str, tip_height: Optional[int]) -> Dict[str, Any]:
+    """Monta saldo e UTXOs a partir da lista de UTXOs do provedor e salva os dois no cache"""
+    utxos = _parse_utxos(data, address, network, tip_height)
+    results = {"balance": _balance_from_utxos(utxos), "utxos": utxos}
+    _store_results({f"{kind}_{network}_{address}": value for kind, value in results.items()}, tip_height)
+    return results
+
+def _fetch_address(address: str, network: str) -> Dict[str, Any]:
+    """
+    Consulta os UTXOs no melhor provedor disponível, deriva o saldo e atualiza as duas entradas do cache.
+
+    Returns:
+        Dict: {"balance": saldo, "utxos": lista de UTXOs}
+    """
+    logger.info(f"[BLOCKCHAIN] Consultando saldo e UTXOs para o endereço {address} na rede {network}")
+    # Altura lida antes da consulta: se um bloco chegar durante a chamada, a entrada já nasce antiga
+    tip_height = tip_tracker.height(network)
+    data = provider_router.get(UTXOS, network, address=address)
+    return _address_results(data, address, network, tip_height)
+
+async def _fetch_address_async(address: str, network: str) -> Dict[str, Any]:
+    """Versão assíncrona de `_fetch_address`"""
+    logger.info(f"[BLOCKCHAIN] Consultando saldo e UTXOs para o endereço {address} na rede {network}")
+    tip_height = tip_tracker.height(network)
+    data = await provider_router.get_async(UTXOS, network, address=address)
+    # Gravar no cache pode ler e escrever no disco: fora do event loop
+    return await asyncio.to_thread(_address_results, data, address, network, tip_height)
+
+def _schedule_refresh(kind: str, address: str, network: str):
+    """Agenda a atualização em background de uma entrada servida como stale"""
+    flight_key = ("address", network, address)
+    with _refreshing_lock:
+        if flight_key in _refreshing:
+            return
+        _refreshing.add(flight_key)
+
+    def refresh():
+        try:
+            upstream_flight.do(flight_key, lambda: _fetch_address(address, network))
+            logger.debug(f"[BLOCKCHAIN] Cache de {_KIND_LABELS[kind]} atualizado em background para {address}")
+        except Exception as e:
+            logger.warning(f"[BLOCKCHAIN] Falha ao atualizar {_KIND_LABELS[kind]} em background: {str(e)}")
+        finally:
+            with _refreshing_lock:
+                _refreshing.discard(flight_key)
+
+    refresh_executor.submit(refresh)
+
+def _check_cache(kind: str, address: str, network: str, offline_mode: bool,
+                 empty: Any) -> Tuple[Optional[CachedResult], Optional[CacheEntry]]:
+    """
+    Decide se uma consulta pode ser respondida sem aguardar o upstream.
     
-    def _ensure_cache_dir(self):
-        """Garante que o diretório de cache existe"""
-        cache_dir = get_cache_dir()
-        os.makedirs(cache_dir, exist_ok=True)
+    Dados confirmados consultados no topo atual da cadeia continuam válidos
+    até o próximo bloco (ver `TTLPolicy.ttls`). Endereços que retornaram vazio
+    recentemente são respondidos pelo cache negativo sem consultar o upstream.
+    Entre o soft e o hard TTL o valor é servido e atualizado em background.
     
-    def _load_cache(self):
-        """Carrega o cache do disco"""
-        cache_file = get_cache_dir() / "blockchain_cache.json"
-        if cache_file.exists():
-            try:
-                with open(cache_file, "r") as f:
-                    data = json.load(f)
-                    self._cache = data.get("cache", {})
-                    self._timestamps = data.get("timestamps", {})
-                    logger.info(f"[CACHE] Cache carregado do disco com {len(self._cache)} entradas")
-            except Exception as e:
-                logger.error(f"[CACHE] Erro ao carregar cache do disco: {str(e)}")
+    Returns:
+        Tuple: (resultado, entrada em cache). O resultado é None quando é
+            preciso consultar o upstream; a entrada serve de fallback em caso de erro.
+    """
+    label = _KIND_LABELS[kind]
+    cache_key = f"{kind}_{network}_{address}"
     
-    def _save_cache(self):
-        """Salva o cache para o disco"""
-        cache_file = get_cache_dir() / "blockchain_cache.json"
-        try:
-            with open(cache_file, "w") as f:
-                json.dump({
-                    "cache": self._cache,
-                    "timestamps": self._timestamps
-                }, f)
-                logger.debug(f"[CACHE] Cache salvo no disco com {len(self._cache)} entradas")
-        except Exception as e:
-            logger.error(f"[CACHE] Erro ao salvar cache no disco: {str(e)}")
+    # Verificar cache primeiro
+    cached = blockchain_cache.get_entry(cache_key)
+    if cached is not None:
+        age = time.time() - cached.timestamp
+        current_tip = None if offline_mode else tip_tracker.height(network)
+        soft_ttl, hard_ttl = blockchain_cache.ttl_policy.ttls(
+            cache_key, cached.value, cached.changed_at,
+            entry_tip=cached.tip_height, current_tip=current_tip
+        )
+        if age < soft_ttl:
+            logger.info(f"[BLOCKCHAIN] Retornando {label} do cache para {address}")
+            return CachedResult(cached.value), cached
+    
+    # Endereço sem fundos consultado há pouco (uma entrada positiva tem preferência)
+    if not offline_mode and (cached is None or _is_empty_result(cached.value)) and negative_cache.contains(cache_key):
+        logger.info(f"[BLOCKCHAIN] Retornando {label} vazio do cache negativo para {address}")
+        return CachedResult(empty), cached
+    
+    # Se modo offline, usar o cache ignorando TTL
+    if offline_mode:
+        if cached is not None:
+            logger.info(f"[OFFLINE] Usando {label} do cache expirado para {address}")
+            return CachedResult(cached.value, stale=True), cached
+        logger.warning(f"[OFFLINE] Sem dados de {label} em cache para {address}")
+        return CachedResult(empty), cached
+    
+    # Entre o soft e o hard TTL: servir o valor atual e atualizar em background
+    if cached is not None and age < hard_ttl:
+        logger.info(f"[BLOCKCHAIN] Retornando {label} stale do cache para {address} e atualizando em background")
+        _schedule_refresh(kind, address, network)
+        return CachedResult(cached.value, stale=True), cached
+    
+    return None, cached
+
+async def _check_cache_async(kind: str, address: str, network: str, offline_mode: bool,
+                             empty: Any) -> Tuple[Optional[CachedResult], Optional[CacheEntry]]:
+    """
+    Versão de `_check_cache` para o event loop.
+
+    Só responde no próprio loop quando a entrada está na camada em memória;
+    caso contrário a leitura do disco roda em uma thread.
+    """
+    if blockchain_cache.in_memory(f"{kind}_{network}_{address}"):
+        return _check_cache(kind, address, network, offline_mode, empty)
+    return await asyncio.to_thread(_check_cache, kind, address, network, offline_mode, empty)
+
+def _upstream_fallback(kind: str, address: str, cached: Optional[CacheEntry],
+                       error: ProviderUnavailable) -> CachedResult:
+    """
+    Resultado usado quando a consulta ao upstream falha
 
-    def get(self, key: str, ignore_ttl: bool = False) -> Any:
-        """
-        Obtém um valor do cache
+    Raises:
+        ProviderUnavailable: Se não houver entrada em cache. Um saldo zerado
+            inventado seria indistinguível de um endereço vazio, então a rota
+            responde 503 (com `Retry-After` quando o limitador recusou a consulta)
+    """
+    label = _KIND_LABELS[kind]
+    logger.error(f"[BLOCKCHAIN] Erro ao consultar {label}: {str(error)}")
+    
+    # Retornar dados do cache se disponível, mesmo que expirados
+    if cached is not None:
+        logger.warning(f"[BLOCKCHAIN] Retornando {label} do cache expirado para {address}")
+        return CachedResult(cached.value, stale=True)
+    raise error
+
+def _cached_lookup(kind: str, address: str, network: str, offline_mode: bool, empty: Any) -> CachedResult:
+    """
+    Consulta um dado da blockchain aplicando cache, modo offline e stale-while-revalidate.
+    
+    Args:
+        kind: Tipo do dado ('balance' ou 'utxos'), usado como prefixo da chave de cache
+        address: Endereço Bitcoin
+        network: Rede Bitcoin
+        offline_mode: Se True, usa apenas o cache
+        empty: Valor retornado para endereço sem fundos (cache negativo) ou sem cache no modo offline
         
-        Args:
-            key: Chave para buscar no cache
-            ignore_ttl: Se True, ignora o TTL e retorna o valor mesmo se expirado
-            
-        Returns:
-            O valor armazenado ou None se não encontrado ou expirado
-        """
-        if key in self._cache:
-            cache_timeout = get_cache_timeout(cold_wallet=is_offline_mode_enabled())
-            
-            if ignore_ttl or time.time() - self._timestamps.get(key, 0) < cache_timeout:
-                return self._cache[key]
-            elif not ignore_ttl:
-                logger.debug(f"[CACHE] Valor expirado para a chave: {key}")
+    Returns:
+        CachedResult: Dados e indicação se vieram de um cache desatualizado
+        
+    Raises:
+        ProviderUnavailable: Se nenhum provedor responder e não houver entrada em cache
+    """
+    result, cached = _check_cache(kind, address, network, offline_mode, empty)
+    if result is not None:
+        return result
+    
+    # Modo online - consultar API (chamadas concorrentes para o mesmo endereço, inclusive
+    # de saldo e de UTXOs, são agrupadas em uma única consulta)
+    try:
+        return CachedResult(upstream_flight.do(
+            ("address", network, address), lambda: _fetch_address(address, network)
+        )[kind])
+    except ProviderUnavailable as e:
+        return _upstream_fallback(kind, address, cached, e)
+
+async def _cached_lookup_async(kind: str, address: str, network: str, offline_mode: bool,
+                               empty: Any) -> CachedResult:
+    """Versão assíncrona de `_cached_lookup`, sem ocupar uma thread durante a consulta"""
+    result, cached = await _check_cache_async(kind, address, network, offline_mode, empty)
+    if result is not None:
+        return result
+    
+    try:
+        return CachedResult((await async_upstream_flight.do(
+            ("address", network, address), lambda: _fetch_address_async(address, network)
+        ))[kind])
+    except ProviderUnavailable as e:
+        return _upstream_fallback(kind, address, cached, e)
+
+def lookup_balance(address: str, network: str, offline_mode: bool = False) -> CachedResult:
+    """
+    Consulta o saldo de um endereço indicando se o valor veio de um cache desatualizado.
+    
+    Mesma semântica de `get_balance`, mas retorna um `CachedResult` cujo campo
+    `stale` é True quando o saldo foi servido do cache após o soft TTL.
+    """
+    return _cached_lookup("balance", address, network, offline_mode, {"confirmed": 0, "unconfirmed": 0})
+
+def lookup_utxos(address: str, network: str, offline_mode: bool = False) -> CachedResult:
+    """
+    Consulta os UTXOs de um endereço indicando se o valor veio de um cache desatualizado.
+    
+    Mesma semântica de `get_utxos`, mas retorna um `CachedResult` cujo campo
+    `stale` é True quando a lista foi servida do cache após o soft TTL.
+    """
+    return _cached_lookup("utxos", address, network, offline_mode, [])
+
+async def lookup_balance_async(address: str, network: str, offline_mode: bool = False) -> CachedResult:
+    """Versão assíncrona de `lookup_balance`, para rotas `async def`"""
+    return await _cached_lookup_async("balance", address, network, offline_mode, {"confirmed": 0, "unconfirmed": 0})
+
+async def lookup_utxos_async(address: str, network: str, offline_mode: bool = False) -> CachedResult:
+    """Versão assíncrona de `lookup_utxos`, para rotas `async def`"""
+    return await _cached_lookup_async("utxos", address, network, offline_mode, [])
+
+async def peek_address_async(address: str, network: str,
+                             offline_mode: bool = False) -> Optional[Tuple[CachedResult, CachedResult]]:
+    """
+    Responde saldo e UTXOs sem aguardar o upstream, quando possível.
+    
+    Usa as mesmas regras de `lookup_balance`/`lookup_utxos` (TTL, cache
+    negativo, modo offline, stale-while-revalidate). Entradas fora da camada
+    em memória são lidas do disco em uma thread (ver `_check_cache_async`).
+    
+    Returns:
+        Tuple ou None: (saldo, UTXOs), ou None se for preciso consultar o upstream
+    """
+    balance_result, _ = await _check_cache_async("balance", address, network, offline_mode,
+                                                 {"confirmed": 0, "unconfirmed": 0})
+    if balance_result is None:
+        return None
+    utxos_result, _ = await _check_cache_async("utxos", address, network, offline_mode, [])
+    if utxos_result is None:
         return None
+    return balance_result, utxos_result
 
-    def set(self, key: str, value: Any):
-        """
-        Armazena um valor no cache e salva no disco
-        
-        Args:
-            key: Chave para armazenar o valor
-            value: Valor a ser armazenado
-        """
-        self._cache[key] = value
-        self._timestamps[key] = time.time()
-        self._save_cache()
+async def lookup_address_async(address: str, network: str, offline_mode: bool = False) -> Tuple[CachedResult, CachedResult]:
+    """Consulta saldo e UTXOs de um endereço (uma única consulta ao upstream em caso de miss)"""
+    balance_result, utxos_result = await asyncio.gather(
+        lookup_balance_async(address, network, offline_mode),
+        lookup_utxos_async(address, network, offline_mode)
+    )
+    return balance_result, utxos_result
 
-blockchain_cache = PersistentBlockchainCache()
+async def get_balance_async(address: str, network: str, offline_mode: bool = False) -> dict:
+    """Versão assíncrona de `get_balance`"""
+    return (await lookup_balance_async(address, network, offline_mode)).data
+
+async def get_utxos_async(address: str, network: str, offline_mode: bool = False) -> list:
+    """Versão assíncrona de `get_utxos`"""
+    return (await lookup_utxos_async(address, network, offline_mode)).data
 
 def get_balance(address: str, network: str, offline_mode: bool = False) -> dict:
     """
     Consulta o saldo de um endereço Bitcoin na blockchain.
     
     Esta função recupera o saldo confirmado e não confirmado de um endereço Bitcoin
-    consultando APIs blockchain externas. Para endereços testnet, utiliza o 
-    blockstream.info, enquanto para endereços mainnet utiliza a API configurada
-    no ambiente.
+    consultando APIs blockchain externas. A consulta vai para o provedor
+    saudável mais rápido entre os configurados (Esplora, mempool.space,
+    Blockchair), com failover automático para os demais.
+    
+    O saldo é calculado a partir da lista de UTXOs, obtida na mesma consulta
+    que alimenta `get_utxos`; as duas entradas de cache são gravadas juntas.
     
     ## O que são saldos confirmados e não confirmados?
     
@@ -113,8 +375,8 @@ def get_balance(address: str, network: str, offline_mode: bool = False) -> dict:
             - "unconfirmed": Saldo não confirmado em satoshis
             
     Raises:
-        requests.exceptions.RequestException: Em caso de erros na comunicação
-            com a API. Neste caso, retorna dados simulados para evitar falha completa.
+        ProviderUnavailable: Em caso de erros na comunicação com todos os
+            provedores e sem saldo em cache, mesmo expirado.
             
     Example:
         >>> get_balance("bc1q34aq5drpuwy3wgl9lhup9892qp6svr8ldzyy7c", "mainnet")
@@ -123,59 +385,7 @@ def get_balance(address: str, network: str, offline_mode: bool = False) -> dict:
             "unconfirmed": 50000
         }
     """
-    cache_key = f"balance_{network}_{address}"
-    
-    # Verificar cache primeiro
-    cached_data = blockchain_cache.get(cache_key)
-    if cached_data:
-        logger.info(f"[BLOCKCHAIN] Retornando saldo do cache para {address}")
-        return cached_data
-    
-    # Se modo offline, verificar cache ignorando TTL
-    if offline_mode:
-        expired_data = blockchain_cache.get(cache_key, ignore_ttl=True)
-        if expired_data:
-            logger.info(f"[OFFLINE] Usando dados do cache expirado para {address}")
-            return expired_data
-        else:
-            logger.warning(f"[OFFLINE] Sem dados de cache para {address}")
-            return {"confirmed": 0, "unconfirmed": 0}
-    
-    # Modo online - consultar API
-    try:
-        logger.info(f"[BLOCKCHAIN] Consultando saldo para o endereço {address} na rede {network}")
-        
-        if network == "testnet":
-            url = f"https://blockstream.info/testnet/api/address/{address}"
-            response = requests.get(url)
-            response.raise_for_status()
-            data = response.json()
-            
-            result = {
-                "confirmed": data.get("chain_stats", {}).get("funded_txo_sum", 0) - data.get("chain_stats", {}).get("spent_txo_sum", 0),
-                "unconfirmed": data.get("mempool_stats", {}).get("funded_txo_sum", 0) - data.get("mempool_stats", {}).get("spent_txo_sum", 0)
-            }
-        else:
-            url = f"{get_blockchain_api_url(network)}/address/{address}/balance"
-            response = requests.get(url)
-            response.raise_for_status()
-            result = response.json()
-
-        blockchain_cache.set(cache_key, result)
-        return result
-
-    except requests.exceptions.RequestException as e:
-        logger.error(f"[BLOCKCHAIN] Erro ao consultar saldo: {str(e)}")
-        
-        # Retornar dados do cache se disponível, mesmo que expirados
-        expired_data = blockchain_cache.get(cache_key, ignore_ttl=True)
-        if expired_data:
-            logger.warning(f"[BLOCKCHAIN] Retornando dados do cache expirado: {expired_data}")
-            return expired_data
-            
-        dummy_data = {"confirmed": 0, "unconfirmed": 0}
-        logger.warning(f"[BLOCKCHAIN] Retornando dados simulados: {dummy_data}")
-        return dummy_data
+    return lookup_balance(address, network, offline_mode).data
 
 def get_utxos(address: str, network: str, offline_mode: bool = False) -> list:
     """
@@ -210,8 +420,8 @@ def get_utxos(address: str, network: str, offline_mode: bool = False) -> list:
             - "status": Informações sobre confirmação
             
     Raises:
-        requests.exceptions.RequestException: Em caso de erros na comunicação
-            com a API. Neste caso, retorna uma lista vazia para evitar falha completa.
+        ProviderUnavailable: Em caso de erros na comunicação com todos os
+            provedores e sem UTXOs em cache, mesmo expirados.
             
     Example:
         >>> get_utxos("bc1q34aq5drpuwy3wgl9lhup9892qp6svr8ldzyy7c", "mainnet")
@@ -227,90 +437,22 @@ def get_utxos(address: str, network: str, offline_mode: bool = False) -> list:
             }
         ]
     """
-    cache_key = f"utxos_{network}_{address}"
-    
-    # Verificar cache primeiro
-    cached_data = blockchain_cache.get(cache_key)
-    if cached_data:
-        logger.info(f"[BLOCKCHAIN] Retornando UTXOs do cache para {address}")
-        return cached_data
-    
-    # Se modo offline, verificar cache ignorando TTL
-    if offline_mode:
-        expired_data = blockchain_cache.get(cache_key, ignore_ttl=True)
-        if expired_data:
-            logger.info(f"[OFFLINE] Usando UTXOs do cache expirado para {address}")
-            return expired_data
-        else:
-            logger.warning(f"[OFFLINE] Sem dados de UTXOs em cache para {address}")
-            return []
-    
-    # Modo online - consultar API
-    try:
-        logger.info(f"[BLOCKCHAIN] Consultando UTXOs para o endereço {address} na rede {network}")
-        
-        if network == "testnet":
-            # Para testnet, usamos uma API específica (blockstream.info)
-            url = f"https://blockstream.info/testnet/api/address/{address}/utxo"
-            response = requests.get(url)
-            response.raise_for_status()
-            utxos = response.json()
-            
-            # Transformar para o formato padrão
-            result = []
-            for utxo in utxos:
-                result.append({
-                    "txid": utxo.get("txid"),
-                    "vout": utxo.get("vout"),
-                    "value": utxo.get("value"),
-                    "script": utxo.get("scriptpubkey", ""),
-                    "confirmations": utxo.get("status", {}).get("confirmations", 0),
-                    "address": address
-                })
-                
-            # Salvar no cache
-            blockchain_cache.set(cache_key, result)
-            return result
-        else:
-            url = f"{get_blockchain_api_url(network)}/address/{address}/utxo"
-            response = requests.get(url)
-            response.raise_for_status()
-            result = response.json()
-            blockchain_cache.set(cache_key, result)
-            return result
-            
-    except requests.exceptions.RequestException as e:
-        logger.error(f"[BLOCKCHAIN] Erro ao consultar UTXOs: {str(e)}")
-        
-        # Retornar dados do cache se disponível, mesmo que expirados
-        expired_data = blockchain_cache.get(cache_key, ignore_ttl=True)
-        if expired_data:
-            logger.warning(f"[BLOCKCHAIN] Retornando UTXOs do cache expirado: {len(expired_data)} UTXOs")
-            return expired_data
-            
-        dummy_data = []
-        logger.warning(f"[BLOCKCHAIN] Retornando dados simulados: {dummy_data}")
-        return dummy_data
+    return lookup_utxos(address, network, offline_mode).data
 
-def is_offline_mode() -> bool:
+def is_offline_mode(network: Optional[str] = None) -> bool:
     """
     Verifica se o modo offline está ativo.
     
-    Esta função verifica a configuração do modo offline e, se necessário,
-    tenta fazer uma requisição simples para verificar a conectividade.
+    Além da configuração, usa o estado mantido pelo monitor de conectividade:
+    a rede é considerada offline quando nenhum provedor dela responde. A
+    leitura é O(1) e não faz nenhuma requisição.
+    
+    Args:
+        network: Rede Bitcoin ('mainnet' ou 'testnet'); padrão: rede configurada
     
     Returns:
         bool: True se estiver no modo offline, False caso contrário
     """
-    # Verificar configuração
     if is_offline_mode_enabled():
         return True
-        
-    # Verificar conectividade
-    try:
-        # Tentativa de conexão com timeout reduzido
-        requests.get("https://blockstream.info/api/blocks/tip/height", timeout=2)
-        return False
-    except:
-        logger.warning("[BLOCKCHAIN] Modo offline detectado por falha na conexão")
-        return True
\ No newline at end of file
+    return not connectivity_monitor.is_online(network or get_network())
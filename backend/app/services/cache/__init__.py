@@ -0,0 +1,17 @@
+from .blockchain_cache import PersistentBlockchainCache
+from .negative_cache import BloomFilter, NegativeCache
+from .storage import CacheStorage, JsonCacheStorage, SQLiteCacheStorage, StoredEntry, create_cache_storage
+from .ttl_policy import TTLPolicy, get_ttl_policy
+
+__all__ = [
+    'PersistentBlockchainCache',
+    'BloomFilter',
+    'NegativeCache',
+    'CacheStorage',
+    'JsonCacheStorage',
+    'SQLiteCacheStorage',
+    'StoredEntry',
+    'create_cache_storage',
+    'TTLPolicy',
+    'get_ttl_policy'
+]
@@ -0,0 +1,488 @@
+import json
+import logging
+import os
+import threading
+import time
+from collections import Counter, OrderedDict
+from typing import Any, Dict, List, Optional
+
+from app.dependencies import get_cache_dir, get_settings
+from app.services.cache.storage import CacheStorage, StoredEntry, create_cache_storage
+from app.services.cache.ttl_policy import TTLPolicy, get_ttl_policy
+
+logger = logging.getLogger(__name__)
+
+class CacheEntry:
+    """Entrada do cache em memória"""
+
+    __slots__ = ("value", "timestamp", "changed_at", "tip_height", "size")
+
+    def __init__(self, value: Any, timestamp: float, changed_at: Optional[float],
+                 tip_height: Optional[int], size: int):
+        self.value = value
+        self.timestamp = timestamp
+        self.changed_at = changed_at if changed_at is not None else timestamp
+        self.tip_height = tip_height
+        self.size = size
+
+def _estimate_size(key: str, value: Any) -> int:
+    """Estima o tamanho em bytes de uma entrada pelo tamanho serializado"""
+    try:
+        return len(key) + len(json.dumps(value))
+    except (TypeError, ValueError):
+        return len(key)
+
+class _CacheShard:
+    """Partição da camada em memória com LRU e lock próprios"""
+
+    def __init__(self, max_entries: int, max_bytes: int):
+        self.lock = threading.Lock()
+        self.entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self.bytes = 0
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.stats = Counter()
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+            return entry
+
+    def put(self, key: str, entry: CacheEntry, replace: bool = True):
+        with self.lock:
+            if not replace and key in self.entries:
+                return
+            old = self.entries.pop(key, None)
+            if old is not None:
+                self.bytes -= old.size
+            self.entries[key] = entry
+            self.bytes += entry.size
+            while self.entries and (
+                (self.max_entries and len(self.entries) > self.max_entries) or
+                (self.max_bytes and self.bytes > self.max_bytes)
+            ):
+                evicted_key, evicted = self.entries.popitem(last=False)
+                self.bytes -= evicted.size
+                self.stats["evictions_lru"] += 1
+                logger.debug(f"[CACHE] Entrada removida da memória por LRU: {evicted_key}")
+
+    def remove_expired(self, now: float, policy: TTLPolicy) -> int:
+        with self.lock:
+            expired = [
+                key for key, entry in self.entries.items()
+                if now - entry.timestamp >= policy.ttls(key, entry.value, entry.changed_at, now)[1]
+            ]
+            for key in expired:
+                self.bytes -= self.entries.pop(key).size
+            self.stats["evictions_expired"] += len(expired)
+            return len(expired)
+
+    def count(self, stat: str):
+        with self.lock:
+            self.stats[stat] += 1
+
+class PersistentBlockchainCache:
+    """
+    Cache da blockchain com camada LRU em memória e persistência em disco.
+
+    A memória é limitada por `cache_max_entries` e `cache_max_bytes`; as
+    entradas menos usadas são removidas da memória, mas continuam no disco
+    e são recarregadas sob demanda. Um sweeper em background remove da
+    memória as entradas expiradas e, se `cache_retention` estiver
+    configurado, apaga do disco as entradas mais antigas que esse limite.
+
+    Nada é lido do disco na inicialização: cada chave é buscada no índice
+    do SQLite (chave primária) no primeiro acesso, então o tempo de
+    inicialização não depende do tamanho do cache. `cache_preload_entries`
+    opcionalmente aquece a memória em background.
+
+    Com `cache_write_behind` habilitado, `set()` apenas marca a chave como
+    suja; uma thread de flush persiste as chaves sujas em lote a cada
+    `cache_flush_interval` segundos ou ao atingir `cache_flush_max_dirty`.
+
+    O cache é seguro para uso concorrente pelas threads do FastAPI: a
+    camada em memória é dividida em `cache_shards` partições, cada uma com
+    seu próprio lock, e o flush grava um snapshot das chaves sujas sem
+    bloquear as leituras.
+
+    A validade de cada entrada é decidida pela `TTLPolicy` (TTL por prefixo
+    de chave e, opcionalmente, adaptativo à atividade do endereço).
+    """
+
+    def __init__(self, storage: Optional[CacheStorage] = None,
+                 max_entries: Optional[int] = None, max_bytes: Optional[int] = None,
+                 write_behind: Optional[bool] = None, shards: Optional[int] = None,
+                 ttl_policy: Optional[TTLPolicy] = None):
+        settings = get_settings()
+        self.ttl_policy = ttl_policy or get_ttl_policy()
+        self.max_entries = max_entries if max_entries is not None else settings.cache_max_entries
+        self.max_bytes = max_bytes if max_bytes is not None else settings.cache_max_bytes
+        shard_count = max(1, shards if shards is not None else settings.cache_shards)
+        if self.max_entries:
+            shard_count = min(shard_count, self.max_entries)
+        self._shards: List[_CacheShard] = [
+            _CacheShard(
+                max(1, self.max_entries // shard_count) if self.max_entries else 0,
+                max(1, self.max_bytes // shard_count) if self.max_bytes else 0
+            )
+            for _ in range(shard_count)
+        ]
+        self._stats_lock = threading.Lock()
+        self._stats = Counter()
+        self._sweeper: Optional[threading.Thread] = None
+        self._stop_sweeper = threading.Event()
+        self.write_behind = write_behind if write_behind is not None else settings.cache_write_behind
+        self.flush_interval = settings.cache_flush_interval
+        self.flush_max_dirty = settings.cache_flush_max_dirty
+        self._dirty: Dict[str, StoredEntry] = {}
+        self._flushing: Dict[str, StoredEntry] = {}
+        self._dirty_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._flusher: Optional[threading.Thread] = None
+        self._flush_requested = threading.Event()
+        self._stop_flusher = threading.Event()
+        self._storage = storage
+        self._storage_lock = threading.Lock()
+        self.preload_entries = settings.cache_preload_entries
+
+    def _ensure_cache_dir(self):
+        """Garante que o diretório de cache existe"""
+        cache_dir = get_cache_dir()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @property
+    def storage(self) -> CacheStorage:
+        """
+        Backend de persistência, aberto no primeiro acesso.
+
+        Importar o módulo não lê o disco: o banco (e a migração do JSON
+        legado, se houver) só é aberto quando a primeira chave é consultada.
+        """
+        if self._storage is None:
+            with self._storage_lock:
+                if self._storage is None:
+                    self._ensure_cache_dir()
+                    settings = get_settings()
+                    self._storage = create_cache_storage(
+                        get_cache_dir(), settings.cache_backend, settings.cache_mmap_size
+                    )
+        return self._storage
+
+    def warm(self, limit: Optional[int] = None) -> int:
+        """
+        Carrega na memória as entradas gravadas mais recentemente.
+
+        Não é necessário para o funcionamento do cache, que lê do disco sob
+        demanda; serve apenas para aquecer a memória em background.
+
+        Args:
+            limit: Número máximo de entradas (padrão: `cache_preload_entries`)
+
+        Returns:
+            int: Número de entradas carregadas
+        """
+        limit = limit or self.preload_entries
+        if self.max_entries:
+            limit = min(limit, self.max_entries)
+        if not limit:
+            return 0
+        try:
+            entries = self.storage.load(limit=limit)
+            for key, stored in sorted(entries.items(), key=lambda item: item[1].timestamp):
+                # Não sobrescreve valores gravados enquanto o aquecimento rodava
+                self._store(key, stored, replace=False)
+            logger.info(f"[CACHE] Cache aquecido com {len(entries)} entradas do disco")
+            return len(entries)
+        except Exception as e:
+            logger.error(f"[CACHE] Erro ao carregar cache do disco: {str(e)}")
+            return 0
+
+    def _shard(self, key: str) -> _CacheShard:
+        return self._shards[hash(key) % len(self._shards)]
+
+    def _store(self, key: str, stored: StoredEntry, replace: bool = True) -> CacheEntry:
+        """Insere uma entrada na camada em memória e aplica o limite LRU"""
+        entry = CacheEntry(
+            stored.value, stored.timestamp, stored.changed_at, stored.tip_height, _estimate_size(key, stored.value)
+        )
+        self._shard(key).put(key, entry, replace)
+        return entry
+
+    def _lookup(self, key: str) -> Optional[CacheEntry]:
+        """Busca a entrada em memória ou, se ausente, nas escritas pendentes e no disco"""
+        shard = self._shard(key)
+        entry = shard.get(key)
+        if entry is not None:
+            return entry
+
+        with self._dirty_lock:
+            stored = self._dirty.get(key) or self._flushing.get(key)
+        if stored is None:
+            stored = self.storage.get(key)
+        if stored is None:
+            return None
+        shard.count("disk_reads")
+        # Não sobrescreve um valor mais novo gravado por outra thread durante a leitura
+        return self._store(key, stored, replace=False)
+
+    def get(self, key: str, ignore_ttl: bool = False) -> Any:
+        """
+        Obtém um valor do cache
+
+        Args:
+            key: Chave para buscar no cache
+            ignore_ttl: Se True, ignora o TTL e retorna o valor mesmo se expirado
+
+        Returns:
+            O valor armazenado ou None se não encontrado ou expirado
+        """
+        entry = self._lookup(key)
+        if entry is not None:
+            cache_timeout = self.ttl_policy.ttl(key, entry.value, entry.changed_at)
+
+            if ignore_ttl or time.time() - entry.timestamp < cache_timeout:
+                self._shard(key).count("hits")
+                return entry.value
+            elif not ignore_ttl:
+                logger.debug(f"[CACHE] Valor expirado para a chave: {key}")
+        self._shard(key).count("misses")
+        return None
+
+    def get_entry(self, key: str) -> Optional[CacheEntry]:
+        """
+        Obtém a entrada do cache (valor, timestamp, última mudança e topo) sem
+        aplicar TTL. Usado por quem decide a validade pela idade da entrada
+        (ex: stale-while-revalidate com `ttl_policy.ttls`).
+
+        Args:
+            key: Chave para buscar no cache
+
+        Returns:
+            CacheEntry ou None se a chave não existir
+        """
+        entry = self._lookup(key)
+        if entry is None:
+            self._shard(key).count("misses")
+            return None
+        self._shard(key).count("hits")
+        return entry
+
+    def in_memory(self, key: str) -> bool:
+        """
+        Indica se a chave está na camada em memória, sem ler o disco nem contar
+        hit ou miss. Usado por código assíncrono para decidir se a consulta
+        pode rodar no event loop ou se precisa ir para uma thread.
+        """
+        shard = self._shard(key)
+        with shard.lock:
+            return key in shard.entries
+
+    def set(self, key: str, value: Any, tip_height: Optional[int] = None):
+        """
+        Armazena um valor no cache e salva no disco
+
+        Apenas a chave alterada é persistida pelo backend configurado. Em modo
+        write-behind a escrita em disco é adiada para a thread de flush.
+
+        Args:
+            key: Chave para armazenar o valor
+            value: Valor a ser armazenado
+            tip_height: Altura do topo da cadeia no momento da consulta, se conhecida
+        """
+        self.set_many({key: value}, tip_height)
+
+    def set_many(self, items: Dict[str, Any], tip_height: Optional[int] = None):
+        """
+        Armazena vários valores obtidos na mesma consulta
+
+        Todas as entradas recebem o mesmo timestamp e são gravadas no disco
+        na mesma transação (ou no mesmo lote de flush), então valores
+        derivados um do outro, como saldo e UTXOs, nunca são persistidos
+        pela metade.
+
+        Args:
+            items: Dicionário {chave: valor}
+            tip_height: Altura do topo da cadeia no momento da consulta, se conhecida
+        """
+        timestamp = time.time()
+        stored_items = []
+        for key, value in items.items():
+            previous = self._lookup(key)
+            changed_at = previous.changed_at if previous is not None and previous.value == value else timestamp
+            stored_items.append((key, StoredEntry(value, timestamp, changed_at, tip_height)))
+        for key, stored in stored_items:
+            self._store(key, stored)
+        if not self.write_behind:
+            try:
+                self.storage.put_many(stored_items)
+            except Exception as e:
+                # Os valores continuam em memória; só a persistência desta escrita se perde
+                logger.error(f"[CACHE] Erro ao gravar cache no disco: {str(e)}")
+            return
+
+        with self._dirty_lock:
+            self._dirty.update(stored_items)
+            dirty_count = len(self._dirty)
+        self._ensure_flusher()
+        if dirty_count >= self.flush_max_dirty:
+            self._flush_requested.set()
+
+    def flush(self) -> int:
+        """
+        Persiste em lote todas as chaves sujas.
+
+        As chaves em gravação continuam visíveis para leitura até o fim do
+        flush, então leituras concorrentes nunca esperam pelo disco.
+
+        Returns:
+            int: Número de entradas gravadas
+        """
+        with self._flush_lock:
+            with self._dirty_lock:
+                if not self._dirty:
+                    return 0
+                self._flushing, self._dirty = self._dirty, {}
+                pending = self._flushing
+            try:
+                self.storage.put_many(list(pending.items()))
+            except Exception as e:
+                logger.error(f"[CACHE] Erro no flush do cache: {str(e)}")
+                with self._dirty_lock:
+                    for key, item in pending.items():
+                        self._dirty.setdefault(key, item)
+                    self._flushing = {}
+                return 0
+            with self._dirty_lock:
+                self._flushing = {}
+            with self._stats_lock:
+                self._stats["flushes"] += 1
+                self._stats["flushed_entries"] += len(pending)
+            logger.debug(f"[CACHE] Flush gravou {len(pending)} entradas no disco")
+            return len(pending)
+
+    def _flush_loop(self):
+        while not self._stop_flusher.is_set():
+            self._flush_requested.wait(self.flush_interval)
+            self._flush_requested.clear()
+            self.flush()
+
+    def _ensure_flusher(self):
+        if self._flusher is not None and self._flusher.is_alive():
+            return
+        with self._flush_lock:
+            if self._flusher is not None and self._flusher.is_alive():
+                return
+            self._stop_flusher.clear()
+            self._flusher = threading.Thread(target=self._flush_loop, name="cache-flusher", daemon=True)
+            self._flusher.start()
+
+    def stop_flusher(self):
+        """Interrompe a thread de flush e grava as chaves sujas restantes"""
+        self._stop_flusher.set()
+        self._flush_requested.set()
+        if self._flusher is not None:
+            self._flusher.join(timeout=5)
+            self._flusher = None
+        self.flush()
+
+    def sweep(self) -> int:
+        """
+        Remove da memória as entradas expiradas e aplica a retenção em disco.
+
+        As entradas expiradas continuam no disco para uso em modo offline
+        (`ignore_ttl=True`) até ultrapassarem `cache_retention`.
+
+        Returns:
+            int: Número de entradas removidas da memória
+        """
+        settings = get_settings()
+        now = time.time()
+        removed = sum(shard.remove_expired(now, self.ttl_policy) for shard in self._shards)
+
+        if settings.cache_retention:
+            purged = self.storage.delete_older_than(now - settings.cache_retention)
+            with self._stats_lock:
+                self._stats["purged_from_disk"] += purged
+
+        if removed:
+            logger.debug(f"[CACHE] Sweep removeu {removed} entradas expiradas da memória")
+        return removed
+
+    def _sweep_loop(self, interval: float):
+        while not self._stop_sweeper.wait(interval):
+            try:
+                self.sweep()
+            except Exception as e:
+                logger.error(f"[CACHE] Erro no sweep do cache: {str(e)}")
+
+    def start_sweeper(self, interval: Optional[float] = None):
+        """Inicia a thread de limpeza periódica das entradas expiradas"""
+        if self._sweeper is not None and self._sweeper.is_alive():
+            return
+        interval = interval or get_settings().cache_sweep_interval
+        self._stop_sweeper.clear()
+        self._sweeper = threading.Thread(
+            target=self._sweep_loop, args=(interval,), name="cache-sweeper", daemon=True
+        )
+        self._sweeper.start()
+
+    def stop_sweeper(self):
+        """Interrompe a thread de limpeza"""
+        self._stop_sweeper.set()
+        if self._sweeper is not None:
+            self._sweeper.join(timeout=5)
+            self._sweeper = None
+
+    def start_background_tasks(self):
+        """Inicia as threads de manutenção do cache"""
+        self.start_sweeper()
+        if self.write_behind:
+            self._ensure_flusher()
+        if self.preload_entries:
+            threading.Thread(target=self.warm, name="cache-warm", daemon=True).start()
+
+    def shutdown(self):
+        """Interrompe as threads de manutenção e grava as alterações pendentes"""
+        self.stop_sweeper()
+        self.stop_flusher()
+
+    def stats(self) -> Dict[str, Any]:
+        """Retorna contadores e ocupação atual do cache"""
+        totals = Counter({
+            "hits": 0,
+            "misses": 0,
+            "disk_reads": 0,
+            "evictions_lru": 0,
+            "evictions_expired": 0,
+            "purged_from_disk": 0,
+            "flushes": 0,
+            "flushed_entries": 0
+        })
+        entries = 0
+        size = 0
+        for shard in self._shards:
+            with shard.lock:
+                totals.update(shard.stats)
+                entries += len(shard.entries)
+                size += shard.bytes
+        with self._stats_lock:
+            totals.update(self._stats)
+        with self._dirty_lock:
+            dirty = len(self._dirty) + len(self._flushing)
+        return {
+            **totals,
+            "dirty": dirty,
+            "entries": entries,
+            "bytes": size,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "shards": len(self._shards)
+        }
+
+    def close(self):
+        """Grava as alterações pendentes e fecha o backend de persistência"""
+        self.shutdown()
+        if self._storage is not None:
+            self._storage.close()
@@ -0,0 +1,196 @@
+import hashlib
+import logging
+import math
+import threading
+import time
+from array import array
+from collections import Counter
+from typing import Any, Dict, Optional
+
+from app.dependencies import get_settings
+
+logger = logging.getLogger(__name__)
+
+class BloomFilter:
+    """
+    Filtro de Bloom em um bytearray.
+
+    Responde "talvez presente" ou "com certeza ausente" usando cerca de
+    1,8 byte por item para uma taxa de falsos positivos de 0,1%.
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.001):
+        capacity = max(1, capacity)
+        self.capacity = capacity
+        self.size = max(8, int(math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2))))
+        self.hash_count = max(1, int(round(self.size / capacity * math.log(2))))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key: str):
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.hash_count):
+            yield (h1 + i * h2) % self.size
+
+    def add(self, key: str):
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key: str) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+class _FingerprintTable:
+    """
+    Conjunto exato de uma geração do cache negativo, sem guardar as chaves.
+
+    Tabela de endereçamento aberto (sondagem linear) com a impressão digital
+    de 8 bytes de cada chave e sua expiração em float32, relativa à criação
+    da tabela: 12 bytes por posição e 1,25 posição por chave de capacidade.
+    Não há remoção; a tabela inteira é descartada na rotação da geração.
+    """
+
+    __slots__ = ("capacity", "started", "fingerprints", "expires", "count")
+
+    def __init__(self, capacity: int, started: float):
+        self.capacity = max(1, capacity)
+        self.started = started
+        slots = self.capacity + self.capacity // 4 + 1
+        self.fingerprints = array("Q", bytes(8 * slots))
+        self.expires = array("f", bytes(4 * slots))
+        self.count = 0
+
+    @staticmethod
+    def fingerprint(key: str) -> int:
+        # 0 marca posição vazia
+        return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8, person=b"negcache").digest(), "little") or 1
+
+    def _slot(self, fingerprint: int) -> int:
+        slots = len(self.fingerprints)
+        index = fingerprint % slots
+        while self.fingerprints[index] not in (0, fingerprint):
+            index = (index + 1) % slots
+        return index
+
+    def add(self, fingerprint: int, expires_at: float) -> bool:
+        """Grava a expiração da chave; retorna False se a tabela já estiver na capacidade"""
+        index = self._slot(fingerprint)
+        if not self.fingerprints[index]:
+            if self.count >= self.capacity:
+                return False
+            self.fingerprints[index] = fingerprint
+            self.count += 1
+        self.expires[index] = expires_at - self.started
+        return True
+
+    def expires_at(self, fingerprint: int) -> Optional[float]:
+        index = self._slot(fingerprint)
+        if not self.fingerprints[index]:
+            return None
+        return self.started + self.expires[index]
+
+    @property
+    def bytes(self) -> int:
+        return len(self.fingerprints) * self.fingerprints.itemsize + len(self.expires) * self.expires.itemsize
+
+class NegativeCache:
+    """
+    Cache de resultados vazios (endereços sem saldo, UTXOs ou histórico).
+
+    Duas gerações se alternam a cada metade do TTL (ou quando a atual atinge
+    `capacity` chaves). Cada geração tem um filtro de Bloom, que descarta sem
+    sondar a tabela a grande maioria das consultas (endereços que nunca
+    retornaram vazio), e uma `_FingerprintTable` com a impressão digital de
+    8 bytes e a expiração de cada chave. Um acerto do filtro só vale se a
+    impressão digital estiver na tabela e não tiver expirado, então um
+    resultado vazio é reconhecido por no máximo `ttl` segundos e um falso
+    positivo do filtro não faz um endereço com fundos parecer vazio (uma
+    colisão de impressões digitais tem chance da ordem de `capacity` / 2^64).
+
+    Memória fixa: cerca de 17 bytes por chave de capacidade em cada geração
+    (15 da tabela e 1,8 do filtro com `error_rate` 0,1%), ~34 MB para as duas
+    gerações com a capacidade padrão de 1.000.000.
+    """
+
+    def __init__(self, ttl: Optional[float] = None, capacity: Optional[int] = None,
+                 error_rate: Optional[float] = None):
+        settings = get_settings()
+        self.ttl = ttl if ttl is not None else settings.negative_cache_ttl
+        self.capacity = capacity or settings.negative_cache_capacity
+        self.error_rate = error_rate or settings.negative_cache_error_rate
+        self._lock = threading.Lock()
+        now = time.time()
+        self._current = BloomFilter(self.capacity, self.error_rate)
+        self._previous = BloomFilter(self.capacity, self.error_rate)
+        self._current_keys = _FingerprintTable(self.capacity, now)
+        self._previous_keys = _FingerprintTable(self.capacity, now)
+        self._rotated_at = now
+        self._stats = Counter()
+
+    def _rotate_if_needed(self, now: float):
+        # Gira a cada ttl/2 ou quando a geração atual atinge a capacidade
+        elapsed = now - self._rotated_at
+        if elapsed < self.ttl / 2 and self._current_keys.count < self.capacity:
+            return
+        if elapsed >= self.ttl:
+            # Sem consultas por um TTL inteiro: as duas gerações já expiraram
+            self._previous = BloomFilter(self.capacity, self.error_rate)
+            self._previous_keys = _FingerprintTable(self.capacity, now)
+        else:
+            self._previous = self._current
+            self._previous_keys = self._current_keys
+        self._current = BloomFilter(self.capacity, self.error_rate)
+        self._current_keys = _FingerprintTable(self.capacity, now)
+        self._rotated_at = now
+        self._stats["rotations"] += 1
+
+    def add(self, key: str):
+        """Registra que a consulta de `key` retornou um resultado vazio"""
+        if self.ttl <= 0:
+            return
+        now = time.time()
+        fingerprint = _FingerprintTable.fingerprint(key)
+        with self._lock:
+            self._rotate_if_needed(now)
+            if not self._current_keys.add(fingerprint, now + self.ttl):
+                return
+            self._current.add(key)
+            self._stats["added"] += 1
+
+    def contains(self, key: str) -> bool:
+        """Verifica se `key` retornou vazio nos últimos `ttl` segundos"""
+        if self.ttl <= 0:
+            return False
+        now = time.time()
+        with self._lock:
+            self._rotate_if_needed(now)
+            found = False
+            generations = ((self._current, self._current_keys), (self._previous, self._previous_keys))
+            candidates = [keys for bloom, keys in generations if key in bloom]
+            if candidates:
+                # O filtro só descarta; o acerto é confirmado pela impressão digital
+                fingerprint = _FingerprintTable.fingerprint(key)
+                expirations = [keys.expires_at(fingerprint) for keys in candidates]
+                known = [expires_at for expires_at in expirations if expires_at is not None]
+                found = any(expires_at > now for expires_at in known)
+                if not found:
+                    self._stats["expired" if known else "filter_false_positives"] += 1
+            self._stats["hits" if found else "misses"] += 1
+            return found
+
+    def stats(self) -> Dict[str, Any]:
+        """Retorna contadores e a memória das duas gerações"""
+        with self._lock:
+            return {
+                "hits": self._stats["hits"],
+                "misses": self._stats["misses"],
+                "added": self._stats["added"],
+                "rotations": self._stats["rotations"],
+                "filter_false_positives": self._stats["filter_false_positives"],
+                "keys": self._current_keys.count + self._previous_keys.count,
+                "bytes": (len(self._current.bits) + len(self._previous.bits)
+                          + self._current_keys.bytes + self._previous_keys.bytes),
+                "ttl": self.ttl
+            }
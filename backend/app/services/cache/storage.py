@@ -0,0 +1,337 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Any, Dict, Iterable, NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
+JSON_CACHE_FILENAME = "blockchain_cache.json"
+SQLITE_CACHE_FILENAME = "blockchain_cache.db"
+
+class StoredEntry(NamedTuple):
+    """
+    Entrada persistida: valor, momento da gravação, momento da última mudança
+    do valor e altura do topo da cadeia quando o valor foi consultado
+    """
+    value: Any
+    timestamp: float
+    changed_at: Optional[float] = None
+    tip_height: Optional[int] = None
+
+class CacheStorage(ABC):
+    """Backend de persistência do cache da blockchain"""
+
+    @abstractmethod
+    def load(self, limit: Optional[int] = None) -> Dict[str, StoredEntry]:
+        """
+        Retorna as entradas persistidas no formato {chave: StoredEntry}
+
+        Args:
+            limit: Se informado, retorna apenas as `limit` entradas mais recentes
+        """
+        pass
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[StoredEntry]:
+        """Retorna a entrada de uma chave ou None se não existir"""
+        pass
+
+    def put(self, key: str, value: Any, timestamp: float, changed_at: Optional[float] = None) -> None:
+        """Persiste uma única entrada"""
+        self.put_many([(key, StoredEntry(value, timestamp, changed_at))])
+
+    @abstractmethod
+    def put_many(self, items: Iterable, replace: bool = True) -> None:
+        """
+        Persiste várias entradas
+
+        Args:
+            items: Iterável de tuplas (chave, StoredEntry)
+            replace: Se False, mantém as entradas que já existem
+        """
+        pass
+
+    @abstractmethod
+    def delete_older_than(self, timestamp: float) -> int:
+        """Remove as entradas gravadas antes de `timestamp` e retorna quantas foram removidas"""
+        pass
+
+    def close(self) -> None:
+        """Libera recursos do backend"""
+        pass
+
+class JsonCacheStorage(CacheStorage):
+    """
+    Backend legado: um único arquivo JSON com todas as entradas.
+
+    Cada escrita reescreve o arquivo inteiro, por isso só é recomendado
+    para caches pequenos. A gravação serializa um snapshot dos dados, então
+    leituras não esperam pelo disco.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._cache: Dict[str, Any] = {}
+        self._timestamps: Dict[str, float] = {}
+        self._changed: Dict[str, float] = {}
+        self._tips: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._read_file()
+
+    def _read_file(self):
+        if not self.path.exists():
+            return
+        try:
+            with open(self.path, "r") as f:
+                data = json.load(f)
+                self._cache = data.get("cache", {})
+                self._timestamps = data.get("timestamps", {})
+                self._changed = data.get("changed", {})
+                self._tips = data.get("tips", {})
+        except Exception as e:
+            logger.error(f"[CACHE] Erro ao carregar cache do disco: {str(e)}")
+
+    def _write_file(self):
+        """Grava um snapshot do cache de forma atômica (arquivo temporário + rename)"""
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        with self._write_lock:
+            with self._lock:
+                snapshot = {
+                    "cache": dict(self._cache),
+                    "timestamps": dict(self._timestamps),
+                    "changed": dict(self._changed),
+                    "tips": dict(self._tips)
+                }
+            try:
+                with open(tmp_path, "w") as f:
+                    json.dump(snapshot, f)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, self.path)
+                logger.debug(f"[CACHE] Cache salvo no disco com {len(snapshot['cache'])} entradas")
+            except Exception as e:
+                logger.error(f"[CACHE] Erro ao salvar cache no disco: {str(e)}")
+
+    def _entry(self, key: str) -> StoredEntry:
+        return StoredEntry(
+            self._cache[key], self._timestamps.get(key, 0), self._changed.get(key), self._tips.get(key)
+        )
+
+    def load(self, limit: Optional[int] = None) -> Dict[str, StoredEntry]:
+        with self._lock:
+            keys = list(self._cache)
+            if limit is not None:
+                keys = sorted(keys, key=lambda k: self._timestamps.get(k, 0), reverse=True)[:limit]
+            return {key: self._entry(key) for key in keys}
+
+    def get(self, key: str) -> Optional[StoredEntry]:
+        with self._lock:
+            if key not in self._cache:
+                return None
+            return self._entry(key)
+
+    def put_many(self, items: Iterable, replace: bool = True) -> None:
+        with self._lock:
+            for key, entry in items:
+                if replace or key not in self._cache:
+                    self._cache[key] = entry.value
+                    self._timestamps[key] = entry.timestamp
+                    if entry.changed_at is not None:
+                        self._changed[key] = entry.changed_at
+                    if entry.tip_height is not None:
+                        self._tips[key] = entry.tip_height
+                    else:
+                        self._tips.pop(key, None)
+        self._write_file()
+
+    def delete_older_than(self, timestamp: float) -> int:
+        with self._lock:
+            old_keys = [key for key in self._cache if self._timestamps.get(key, 0) < timestamp]
+            for key in old_keys:
+                self._cache.pop(key, None)
+                self._timestamps.pop(key, None)
+                self._changed.pop(key, None)
+                self._tips.pop(key, None)
+        if old_keys:
+            self._write_file()
+        return len(old_keys)
+
+class SQLiteCacheStorage(CacheStorage):
+    """
+    Backend SQLite em modo WAL com uma linha por chave.
+
+    Cada escrita atualiza apenas a chave alterada, então o custo de um
+    `put` não depende do tamanho total do cache. Leituras usam uma conexão
+    separada e, graças ao WAL, não esperam pelas transações de escrita.
+
+    A chave primária é o índice em disco: uma consulta percorre a B-tree e
+    lê apenas a página da entrada. Com `mmap_size` > 0 o arquivo é mapeado
+    em memória e essas páginas vêm do cache de páginas do sistema
+    operacional, sem cópia por `read()`.
+    """
+
+    # Colunas adicionadas após a versão inicial da tabela (nome, tipo)
+    _EXTRA_COLUMNS = [
+        ("changed_at", "REAL"),
+        ("tip_height", "INTEGER")
+    ]
+
+    def __init__(self, path: Path, mmap_size: int = 0):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._read_lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(f"PRAGMA mmap_size={int(mmap_size)}")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            "key TEXT PRIMARY KEY, "
+            "value TEXT NOT NULL, "
+            "timestamp REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_cache_timestamp ON cache(timestamp)")
+        self._migrate_columns()
+        self._read_conn = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+        self._read_conn.execute(f"PRAGMA mmap_size={int(mmap_size)}")
+
+    def _migrate_columns(self):
+        """Adiciona às tabelas existentes as colunas criadas em versões posteriores"""
+        existing = {row[1] for row in self._conn.execute("PRAGMA table_info(cache)")}
+        for name, column_type in self._EXTRA_COLUMNS:
+            if name not in existing:
+                self._conn.execute(f"ALTER TABLE cache ADD COLUMN {name} {column_type}")
+
+    @staticmethod
+    def _row_to_entry(value: str, timestamp: float, changed_at: Optional[float],
+                      tip_height: Optional[int]) -> StoredEntry:
+        return StoredEntry(json.loads(value), timestamp, changed_at, tip_height)
+
+    def load(self, limit: Optional[int] = None) -> Dict[str, StoredEntry]:
+        query = "SELECT key, value, timestamp, changed_at, tip_height FROM cache"
+        with self._read_lock:
+            if limit is None:
+                rows = self._read_conn.execute(query).fetchall()
+            else:
+                rows = self._read_conn.execute(query + " ORDER BY timestamp DESC LIMIT ?", (limit,)).fetchall()
+        return {row[0]: self._row_to_entry(*row[1:]) for row in rows}
+
+    def get(self, key: str) -> Optional[StoredEntry]:
+        with self._read_lock:
+            row = self._read_conn.execute(
+                "SELECT value, timestamp, changed_at, tip_height FROM cache WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        return self._row_to_entry(*row)
+
+    def put_many(self, items: Iterable, replace: bool = True) -> None:
+        """
+        Persiste várias entradas em uma única transação
+
+        Args:
+            items: Iterável de tuplas (chave, StoredEntry)
+            replace: Se False, mantém as entradas que já existem no banco
+
+        Raises:
+            sqlite3.Error: Se a transação falhar (banco bloqueado, disco cheio);
+                nada é gravado e quem chamou decide se tenta de novo
+        """
+        rows = [
+            (key, json.dumps(entry.value), entry.timestamp, entry.changed_at, entry.tip_height)
+            for key, entry in items
+        ]
+        conflict = "REPLACE" if replace else "IGNORE"
+        try:
+            with self._lock:
+                self._conn.execute("BEGIN")
+                self._conn.executemany(
+                    f"INSERT OR {conflict} INTO cache (key, value, timestamp, changed_at, tip_height) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    rows
+                )
+                self._conn.execute("COMMIT")
+        except Exception as e:
+            logger.error(f"[CACHE] Erro ao salvar cache no SQLite: {str(e)}")
+            with self._lock:
+                if self._conn.in_transaction:
+                    self._conn.execute("ROLLBACK")
+            raise
+
+    def delete_older_than(self, timestamp: float) -> int:
+        with self._lock:
+            cursor = self._conn.execute("DELETE FROM cache WHERE timestamp < ?", (timestamp,))
+            return cursor.rowcount
+
+    def count(self) -> int:
+        with self._read_lock:
+            return self._read_conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+
+    def close(self) -> None:
+        with self._read_lock:
+            self._read_conn.close()
+        with self._lock:
+            self._conn.close()
+
+def migrate_json_cache(json_path: Path, storage: SQLiteCacheStorage) -> int:
+    """
+    Importa o cache JSON legado para o SQLite e renomeia o arquivo original.
+
+    Entradas já existentes no SQLite não são sobrescritas. O arquivo JSON só
+    é renomeado para `*.migrated` depois que a transação for confirmada; se a
+    gravação falhar, ele é mantido e a migração é tentada de novo no próximo
+    início.
+
+    Args:
+        json_path: Caminho do arquivo blockchain_cache.json
+        storage: Backend SQLite de destino
+
+    Returns:
+        int: Número de entradas importadas
+
+    Raises:
+        sqlite3.Error: Se a gravação no SQLite falhar
+    """
+    json_path = Path(json_path)
+    if not json_path.exists():
+        return 0
+
+    items = list(JsonCacheStorage(json_path).load().items())
+    if items:
+        # Propaga a falha antes do rename: o arquivo legado só sai de cena com os dados já no banco
+        storage.put_many(items, replace=False)
+
+    os.replace(json_path, json_path.with_name(json_path.name + ".migrated"))
+    logger.info(f"[CACHE] Migradas {len(items)} entradas do cache JSON para SQLite")
+    return len(items)
+
+def create_cache_storage(cache_dir: Path, backend: str = "sqlite", mmap_size: int = 0) -> CacheStorage:
+    """
+    Cria o backend de persistência configurado.
+
+    Args:
+        cache_dir: Diretório do cache
+        backend: 'sqlite' (padrão) ou 'json' (formato legado)
+        mmap_size: Bytes do arquivo SQLite mapeados em memória (0 = desligado)
+
+    Returns:
+        CacheStorage: Backend pronto para uso
+    """
+    cache_dir = Path(cache_dir)
+    if backend == "json":
+        return JsonCacheStorage(cache_dir / JSON_CACHE_FILENAME)
+
+    if backend != "sqlite":
+        logger.warning(f"[CACHE] Backend de cache desconhecido '{backend}', usando sqlite")
+
+    storage = SQLiteCacheStorage(cache_dir / SQLITE_CACHE_FILENAME, mmap_size)
+    try:
+        migrate_json_cache(cache_dir / JSON_CACHE_FILENAME, storage)
+    except Exception as e:
+        logger.error(f"[CACHE] Erro ao migrar cache JSON para SQLite (o arquivo legado foi mantido): {str(e)}")
+    return storage
@@ -0,0 +1,155 @@
+import time
+from functools import lru_cache
+from typing import Any, Dict, Optional, Tuple
+
+from app.dependencies import get_settings, is_offline_mode_enabled
+
+# Prefixos de chave de cache com política de TTL própria
+BALANCE_PREFIX = "balance_"
+UTXOS_PREFIX = "utxos_"
+TX_STATUS_PREFIX = "tx_status_"
+FEE_PREFIX = "fee_"
+
+ADDRESS_PREFIXES = (BALANCE_PREFIX, UTXOS_PREFIX)
+
+def has_pending_activity(value: Any) -> bool:
+    """
+    Verifica se um saldo ou lista de UTXOs tem movimentação não confirmada.
+
+    Args:
+        value: Saldo ({"confirmed", "unconfirmed"}) ou lista de UTXOs
+
+    Returns:
+        bool: True se houver saldo não confirmado ou UTXO sem confirmações
+    """
+    if isinstance(value, dict):
+        return bool(value.get("unconfirmed"))
+    if isinstance(value, list):
+        for utxo in value:
+            if not isinstance(utxo, dict):
+                continue
+            status = utxo.get("status")
+            if isinstance(status, dict) and "confirmed" in status:
+                if not status["confirmed"]:
+                    return True
+            elif utxo.get("confirmations", 1) == 0:
+                return True
+    return False
+
+class TTLPolicy:
+    """
+    Política de TTL do cache da blockchain.
+
+    Cada prefixo de chave (`balance_`, `utxos_`, `tx_status_`, `fee_`) tem seu
+    próprio TTL. Com `cache_adaptive_ttl` habilitado, os dados de endereço
+    usam um TTL curto quando há movimentação no mempool e um TTL longo
+    quando o valor não muda há mais de `cache_dormant_after` segundos.
+
+    Quando a altura do topo da cadeia é conhecida, dados de endereço sem
+    movimentação no mempool seguem os blocos: continuam válidos enquanto o
+    topo não muda (até `cache_tip_max_age` segundos) e expiram assim que um
+    novo bloco chega.
+
+    O hard TTL (stale-while-revalidate) é o TTL da chave somado à janela
+    `cache_hard_ttl - cache_soft_ttl`.
+    """
+
+    def __init__(self, prefix_ttls: Dict[str, int], default_ttl: int, swr_window: int = 0,
+                 adaptive: bool = False, active_ttl: int = 60, dormant_ttl: int = 86400,
+                 dormant_after: int = 604800, tip_max_age: int = 0):
+        self.prefix_ttls = prefix_ttls
+        self.default_ttl = default_ttl
+        self.swr_window = max(0, swr_window)
+        self.adaptive = adaptive
+        self.active_ttl = active_ttl
+        self.dormant_ttl = dormant_ttl
+        self.dormant_after = dormant_after
+        self.tip_max_age = tip_max_age
+
+    @classmethod
+    def from_settings(cls) -> "TTLPolicy":
+        """Monta a política a partir das configurações da aplicação"""
+        settings = get_settings()
+        if is_offline_mode_enabled():
+            # Cold wallet: todos os dados usam o TTL longo e não há adaptação
+            return cls({}, settings.cache_timeout_cold)
+
+        default_ttl = settings.cache_soft_ttl or settings.cache_timeout
+        swr_window = (settings.cache_hard_ttl or default_ttl) - default_ttl
+        prefix_ttls = {
+            BALANCE_PREFIX: settings.cache_ttl_balance or default_ttl,
+            UTXOS_PREFIX: settings.cache_ttl_utxos or default_ttl,
+            TX_STATUS_PREFIX: settings.cache_ttl_tx_status,
+            FEE_PREFIX: settings.cache_ttl_fee
+        }
+        return cls(
+            prefix_ttls,
+            default_ttl,
+            swr_window=swr_window,
+            adaptive=settings.cache_adaptive_ttl,
+            active_ttl=settings.cache_ttl_active,
+            dormant_ttl=settings.cache_ttl_dormant,
+            dormant_after=settings.cache_dormant_after,
+            tip_max_age=settings.cache_tip_max_age
+        )
+
+    def base_ttl(self, key: str) -> int:
+        """Retorna o TTL configurado para o prefixo da chave"""
+        for prefix, ttl in self.prefix_ttls.items():
+            if key.startswith(prefix):
+                return ttl
+        return self.default_ttl
+
+    def ttl(self, key: str, value: Any = None, changed_at: Optional[float] = None,
+            now: Optional[float] = None) -> int:
+        """
+        Retorna o TTL (soft) de uma entrada.
+
+        Args:
+            key: Chave de cache
+            value: Valor armazenado, usado para detectar atividade no mempool
+            changed_at: Momento da última mudança do valor
+            now: Momento de referência (padrão: agora)
+
+        Returns:
+            int: TTL em segundos
+        """
+        ttl = self.base_ttl(key)
+        if not self.adaptive or not key.startswith(ADDRESS_PREFIXES):
+            return ttl
+
+        if has_pending_activity(value):
+            return min(ttl, self.active_ttl)
+        now = now or time.time()
+        if changed_at is not None and now - changed_at >= self.dormant_after:
+            return max(ttl, self.dormant_ttl)
+        return ttl
+
+    def ttls(self, key: str, value: Any = None, changed_at: Optional[float] = None,
+             now: Optional[float] = None, entry_tip: Optional[int] = None,
+             current_tip: Optional[int] = None) -> Tuple[int, int]:
+        """
+        Retorna o par (soft TTL, hard TTL) de uma entrada.
+
+        Args:
+            key: Chave de cache
+            value: Valor armazenado
+            changed_at: Momento da última mudança do valor
+            now: Momento de referência (padrão: agora)
+            entry_tip: Altura do topo quando o valor foi consultado
+            current_tip: Altura atual do topo, se conhecida
+
+        Returns:
+            Tuple[int, int]: Soft e hard TTL em segundos
+        """
+        soft_ttl = self.ttl(key, value, changed_at, now)
+        if (entry_tip is not None and current_tip is not None and
+                key.startswith(ADDRESS_PREFIXES) and not has_pending_activity(value)):
+            # Dado confirmado: vale enquanto o topo não muda e expira no próximo bloco
+            soft_ttl = max(soft_ttl, self.tip_max_age) if current_tip <= entry_tip else 0
+        return soft_ttl, soft_ttl + self.swr_window
+
+@lru_cache
+def get_ttl_policy() -> TTLPolicy:
+    """Retorna a política de TTL configurada (calculada uma única vez)"""
+    return TTLPolicy.from_settings()
@@ -0,0 +1,111 @@
+import logging
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict, Optional
+
+from app.dependencies import get_settings
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+class CircuitBreaker:
+    """
+    Circuit breaker de um host upstream.
+
+    * **closed**: as chamadas passam normalmente; `failure_threshold` falhas
+      seguidas abrem o circuito
+    * **open**: as chamadas são recusadas sem tocar a rede durante
+      `cooldown` segundos, e quem chama usa o fallback (cache)
+    * **half_open**: após o cooldown, uma única chamada de teste é liberada;
+      sucesso fecha o circuito, falha o abre por mais um cooldown. Uma
+      chamada de teste sem resultado após um cooldown (ex: cancelada) libera
+      uma nova
+
+    Com `failure_threshold` igual a 0 o circuito nunca abre.
+    """
+
+    def __init__(self, name: str, failure_threshold: Optional[int] = None, cooldown: Optional[float] = None):
+        settings = get_settings()
+        self.name = name
+        self.failure_threshold = (
+            failure_threshold if failure_threshold is not None else settings.circuit_breaker_failure_threshold
+        )
+        self.cooldown = cooldown if cooldown is not None else settings.circuit_breaker_cooldown
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._trial_started = 0.0
+        self._stats = Counter()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == OPEN and time.monotonic() - self._opened_at >= self.cooldown:
+                return HALF_OPEN
+            return self._state
+
+    def allow(self) -> bool:
+        """
+        Verifica se uma chamada pode ser feita agora
+
+        Returns:
+            bool: False se o circuito estiver aberto (ou com a chamada de teste em andamento)
+        """
+        with self._lock:
+            if self._state == CLOSED:
+                return True
+            if self._state == OPEN:
+                if time.monotonic() - self._opened_at < self.cooldown:
+                    self._stats["rejected"] += 1
+                    return False
+                self._state = HALF_OPEN
+                self._trial_in_flight = False
+            now = time.monotonic()
+            if self._trial_in_flight and now - self._trial_started < self.cooldown:
+                self._stats["rejected"] += 1
+                return False
+            self._trial_in_flight = True
+            self._trial_started = now
+            return True
+
+    def record_success(self):
+        """Registra uma chamada bem-sucedida (o host respondeu)"""
+        with self._lock:
+            closing = self._state != CLOSED
+            self._state = CLOSED
+            self._failures = 0
+            self._trial_in_flight = False
+        if closing:
+            logger.info(f"[CIRCUIT] Circuito de {self.name} fechado")
+
+    def record_failure(self):
+        """Registra uma falha de rede ou erro 5xx do host"""
+        with self._lock:
+            self._failures += 1
+            opening = self._state == HALF_OPEN or (
+                self._state == CLOSED and self.failure_threshold > 0 and self._failures >= self.failure_threshold
+            )
+            if opening:
+                self._state = OPEN
+                self._opened_at = time.monotonic()
+                self._trial_in_flight = False
+                self._stats["opened"] += 1
+        if opening:
+            logger.warning(f"[CIRCUIT] Circuito de {self.name} aberto por {self.cooldown:.0f}s")
+
+    def stats(self) -> Dict[str, Any]:
+        """Retorna o estado do circuito e seus contadores"""
+        state = self.state
+        with self._lock:
+            return {
+                "state": state,
+                "failures": self._failures,
+                "opened": self._stats["opened"],
+                "rejected": self._stats["rejected"]
+            }
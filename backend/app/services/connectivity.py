@@ -0,0 +1,205 @@
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import requests
+
+from app.dependencies import get_settings
+from app.services.providers import create_providers
+from app.services.upstream import get_upstream_client
+
+logger = logging.getLogger(__name__)
+
+Target = Tuple[str, str]  # (provedor, rede)
+
+def default_targets() -> Dict[Target, str]:
+    """URLs verificadas por padrão: a URL de saúde de cada provedor configurado, por rede"""
+    return {
+        (provider.name, network): provider.health_url(network)
+        for provider in create_providers()
+        for network in provider.networks()
+    }
+
+class ProviderState:
+    """Estado de conectividade de um provedor em uma rede"""
+
+    __slots__ = ("online", "failures", "successes", "checked_at", "changed_at", "latency", "error")
+
+    def __init__(self):
+        # Até a primeira verificação o provedor é considerado disponível
+        self.online = True
+        self.failures = 0
+        self.successes = 0
+        self.checked_at: Optional[float] = None
+        self.changed_at = time.time()
+        self.latency: Optional[float] = None
+        self.error: Optional[str] = None
+
+class ConnectivityMonitor:
+    """
+    Monitora em background a conectividade com cada provedor e rede.
+
+    Uma thread consulta a URL de saúde de cada provedor a cada
+    `interval` segundos e mantém o estado em memória. As rotas leem esse
+    estado em O(1), sem fazer uma requisição de teste antes de cada consulta.
+
+    Com histerese, um provedor só passa a offline após `failure_threshold`
+    falhas seguidas e só volta a online após `recovery_threshold` sucessos
+    seguidos, evitando que uma falha isolada alterne o modo da aplicação.
+
+    As alturas lidas de `/blocks/tip/height` (provedores compatíveis com
+    Esplora) são repassadas a `on_tip` (ex: `TipTracker.record`).
+    """
+
+    def __init__(self, targets: Optional[Dict[Target, str]] = None, interval: Optional[float] = None,
+                 failure_threshold: Optional[int] = None, recovery_threshold: Optional[int] = None,
+                 timeout: Optional[float] = None, on_tip: Optional[Callable[[str, int], None]] = None):
+        settings = get_settings()
+        self._targets = targets
+        self.interval = interval or settings.connectivity_check_interval
+        self.failure_threshold = max(1, failure_threshold or settings.connectivity_failure_threshold)
+        self.recovery_threshold = max(1, recovery_threshold or settings.connectivity_recovery_threshold)
+        self.timeout = timeout or settings.connectivity_timeout
+        self.on_tip = on_tip
+        self._lock = threading.Lock()
+        self._states: Dict[Target, ProviderState] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def targets(self) -> Dict[Target, str]:
+        # Montadas no primeiro uso para não ler as configurações na importação
+        if self._targets is None:
+            self._targets = default_targets()
+        return self._targets
+
+    def _state(self, target: Target) -> ProviderState:
+        state = self._states.get(target)
+        if state is None:
+            state = self._states[target] = ProviderState()
+        return state
+
+    def record(self, provider: str, network: str, ok: bool, latency: Optional[float] = None,
+               error: Optional[str] = None):
+        """
+        Registra o resultado de uma verificação e aplica a histerese
+
+        Args:
+            provider: Nome do provedor ('esplora', 'mempool', ...)
+            network: Rede Bitcoin ('mainnet' ou 'testnet')
+            ok: Se a verificação teve sucesso
+            latency: Tempo de resposta em segundos
+            error: Descrição da falha
+        """
+        with self._lock:
+            state = self._state((provider, network))
+            state.checked_at = time.time()
+            state.latency = latency
+            state.error = error
+            if ok:
+                state.successes += 1
+                state.failures = 0
+                changed = not state.online and state.successes >= self.recovery_threshold
+            else:
+                state.failures += 1
+                state.successes = 0
+                changed = state.online and state.failures >= self.failure_threshold
+            if changed:
+                state.online = ok
+                state.changed_at = state.checked_at
+        if changed and ok:
+            logger.info(f"[CONNECTIVITY] {provider} ({network}) voltou a responder")
+        elif changed:
+            logger.warning(f"[CONNECTIVITY] {provider} ({network}) indisponível: {error}")
+
+    def check(self, provider: str, network: str) -> bool:
+        """
+        Verifica um provedor imediatamente e atualiza seu estado
+
+        Args:
+            provider: Nome do provedor
+            network: Rede Bitcoin ('mainnet' ou 'testnet')
+
+        Returns:
+            bool: True se o provedor respondeu
+        """
+        url = self.targets[(provider, network)]
+        started = time.monotonic()
+        try:
+            response = get_upstream_client().get(url, timeout=self.timeout)
+            response.raise_for_status()
+        except requests.exceptions.RequestException as e:
+            self.record(provider, network, False, error=str(e))
+            return False
+        self.record(provider, network, True, latency=time.monotonic() - started)
+
+        if self.on_tip is not None and url.endswith("/blocks/tip/height"):
+            try:
+                self.on_tip(network, int(response.text.strip()))
+            except ValueError:
+                pass
+        return True
+
+    def check_all(self):
+        """Verifica todos os provedores configurados"""
+        for provider, network in list(self.targets):
+            self.check(provider, network)
+
+    def is_online(self, network: str, provider: Optional[str] = None) -> bool:
+        """
+        Retorna o último estado conhecido, sem consultar o upstream
+
+        Args:
+            network: Rede Bitcoin ('mainnet' ou 'testnet')
+            provider: Provedor específico; se omitido, basta um provedor da rede estar online
+
+        Returns:
+            bool: True se houver conectividade (ou se a rede não for monitorada)
+        """
+        with self._lock:
+            if provider is not None:
+                state = self._states.get((provider, network))
+                return state is None or state.online
+            states = [state for (_, state_network), state in self._states.items() if state_network == network]
+        return not states or any(state.online for state in states)
+
+    def _loop(self):
+        while not self._stop.is_set():
+            try:
+                self.check_all()
+            except Exception:
+                # Um erro inesperado (ex: no `on_tip`) não pode parar a thread e congelar o estado
+                logger.exception("[CONNECTIVITY] Erro ao verificar a conectividade")
+            self._stop.wait(self.interval)
+
+    def start(self):
+        """Inicia a thread de verificação"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="connectivity-monitor", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Interrompe a thread de verificação"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Retorna o estado de cada provedor, indexado por 'provedor/rede'"""
+        now = time.time()
+        with self._lock:
+            return {
+                f"{provider}/{network}": {
+                    "online": state.online,
+                    "failures": state.failures,
+                    "latency_ms": round(state.latency * 1000, 1) if state.latency is not None else None,
+                    "age": round(now - state.checked_at, 1) if state.checked_at is not None else None,
+                    "since": round(now - state.changed_at, 1),
+                    "error": state.error
+                }
+                for (provider, network), state in self._states.items()
+            }
@@ -0,0 +1,138 @@
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, Optional, Tuple
+
+from app.dependencies import get_settings
+
+logger = logging.getLogger(__name__)
+
+# Cabeçalho com o qual o cliente pode encurtar o prazo da requisição (em segundos)
+TIMEOUT_HEADER = b"x-request-timeout"
+EXCEEDED_HEADER = b"x-deadline-exceeded"
+
+class RequestDeadline:
+    """Prazo de uma requisição e se alguma consulta foi interrompida por ele"""
+
+    __slots__ = ("expires_at", "exceeded")
+
+    def __init__(self, seconds: float):
+        self.expires_at = time.monotonic() + seconds
+        self.exceeded = False
+
+# O objeto é compartilhado com as tasks e threads derivadas da requisição (os
+# contextvars são copiados por referência), então `exceeded` marcado em uma
+# thread do threadpool é visto pelo middleware
+_current: ContextVar[Optional[RequestDeadline]] = ContextVar("request_deadline", default=None)
+
+def remaining() -> Optional[float]:
+    """Segundos restantes do prazo da requisição atual, ou None se não houver prazo"""
+    deadline = _current.get()
+    if deadline is None:
+        return None
+    return deadline.expires_at - time.monotonic()
+
+def expired() -> bool:
+    """Verifica se o prazo da requisição atual já terminou"""
+    left = remaining()
+    return left is not None and left <= 0
+
+def limit(budget: float) -> float:
+    """Limita um orçamento de tempo ao que resta do prazo da requisição"""
+    left = remaining()
+    return budget if left is None else min(budget, left)
+
+def mark_exceeded():
+    """Registra que a resposta foi montada com dados parciais ou do cache por falta de tempo"""
+    deadline = _current.get()
+    if deadline is not None and not deadline.exceeded:
+        deadline.exceeded = True
+        logger.warning("[DEADLINE] Prazo da requisição esgotado; respondendo com dados parciais ou do cache")
+
+def exceeded() -> bool:
+    """Verifica se alguma consulta da requisição atual foi interrompida pelo prazo"""
+    deadline = _current.get()
+    return deadline is not None and deadline.exceeded
+
+@contextmanager
+def deadline_scope(seconds: Optional[float]) -> Iterator[Optional[RequestDeadline]]:
+    """
+    Define o prazo da requisição atual enquanto o bloco executa
+
+    Args:
+        seconds: Prazo em segundos; None ou 0 deixa a requisição sem prazo
+    """
+    deadline = RequestDeadline(seconds) if seconds else None
+    token = _current.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current.reset(token)
+
+def _parse_budgets(value: str) -> Tuple[Tuple[str, float], ...]:
+    """Converte '/api/rota=segundos,...' em pares ordenados do prefixo mais longo ao mais curto"""
+    budgets: Dict[str, float] = {}
+    for item in value.split(","):
+        prefix, _, seconds = item.partition("=")
+        if prefix.strip() and seconds.strip():
+            budgets[prefix.strip().rstrip("/")] = float(seconds)
+    return tuple(sorted(budgets.items(), key=lambda item: len(item[0]), reverse=True))
+
+def route_budget(path: str, header: Optional[str] = None) -> Optional[float]:
+    """
+    Prazo de uma requisição
+
+    Args:
+        path: Caminho da requisição
+        header: Valor do cabeçalho `X-Request-Timeout`, que pode encurtar
+            (mas não estender) o prazo configurado para a rota
+
+    Returns:
+        float: Prazo em segundos, ou None se a rota não tiver prazo
+    """
+    settings = get_settings()
+    budget = settings.request_budget
+    for prefix, seconds in _parse_budgets(settings.request_budgets):
+        if path == prefix or path.startswith(prefix + "/"):
+            budget = seconds
+            break
+    if header:
+        try:
+            requested = float(header)
+        except ValueError:
+            requested = None
+        if requested is not None and requested > 0:
+            budget = min(budget, requested) if budget else requested
+    return budget or None
+
+class DeadlineMiddleware:
+    """
+    Middleware ASGI que aplica um prazo a cada requisição HTTP.
+
+    O prazo vem de `REQUEST_BUDGETS` (por prefixo de rota), `REQUEST_BUDGET`
+    ou do cabeçalho `X-Request-Timeout`, e fica disponível para a camada de
+    serviços: cada consulta ao upstream usa apenas o tempo restante. Quando
+    alguma consulta é interrompida pelo prazo, a resposta leva o cabeçalho
+    `X-Deadline-Exceeded: true`.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        # Nomes de cabeçalho no ASGI já chegam em minúsculas
+        header = dict(scope.get("headers", [])).get(TIMEOUT_HEADER)
+        with deadline_scope(route_budget(scope["path"], header.decode("latin-1") if header else None)) as deadline:
+            async def send_with_flag(message):
+                if message["type"] == "http.response.start" and deadline is not None and deadline.exceeded:
+                    message = dict(message)
+                    message["headers"] = list(message.get("headers", [])) + [
+                        (EXCEEDED_HEADER, b"true")
+                    ]
+                await send(message)
+
+            await self.app(scope, receive, send_with_flag)
@@ -0,0 +1,68 @@
+import time
+from bisect import bisect_left
+from itertools import accumulate
+from typing import Dict, Iterable, List, Sequence
+
+# Capacidade de um bloco em bytes virtuais (4M de weight)
+BLOCK_VSIZE = 1_000_000
+
+# Alvos (em blocos) usados para cada prioridade no formato de /v1/fees/recommended
+RECOMMENDED_TARGETS = {"fastestFee": 1, "halfHourFee": 3, "hourFee": 6, "economyFee": 144}
+
+class FeeHistogram:
+    """
+    Estimador local de taxas a partir de um snapshot do histograma da mempool.
+
+    O histograma (`[taxa, vsize]` em ordem decrescente de taxa, como em
+    `/mempool` da API Esplora) é convertido uma única vez no vsize acumulado
+    de cada faixa. A taxa para confirmar em `n` blocos é a da faixa que
+    ultrapassa `n` blocos cheios: os mineradores incluem primeiro as taxas
+    mais altas, então uma transação precisa pagar pelo menos a taxa da faixa
+    que fica no limite do bloco `n`. Cada consulta é uma busca binária.
+
+    Se a mempool inteira couber em `n` blocos, vale `min_rate` (taxa mínima
+    de retransmissão).
+    """
+
+    __slots__ = ("rates", "cumulative", "min_rate", "block_vsize", "timestamp")
+
+    def __init__(self, histogram: Iterable[Sequence[float]], min_rate: float = 1.0,
+                 block_vsize: int = BLOCK_VSIZE):
+        buckets = [(float(rate), int(vsize)) for rate, vsize in histogram if vsize > 0]
+        buckets.sort(key=lambda bucket: bucket[0], reverse=True)
+        self.rates: List[float] = [rate for rate, _ in buckets]
+        self.cumulative: List[int] = list(accumulate(vsize for _, vsize in buckets))
+        self.min_rate = min_rate
+        self.block_vsize = block_vsize
+        self.timestamp = int(time.time())
+
+    @property
+    def total_vsize(self) -> int:
+        """Tamanho total da mempool em bytes virtuais"""
+        return self.cumulative[-1] if self.cumulative else 0
+
+    def fee_rate(self, target: int) -> float:
+        """
+        Taxa para confirmar em até `target` blocos
+
+        Args:
+            target: Número de blocos (1 = próximo bloco)
+
+        Returns:
+            float: Taxa em sat/vB
+        """
+        if target < 1:
+            raise ValueError("O alvo deve ser de pelo menos 1 bloco")
+        index = bisect_left(self.cumulative, target * self.block_vsize)
+        if index >= len(self.rates):
+            return self.min_rate
+        return max(self.min_rate, self.rates[index])
+
+    def fee_rates(self, targets: Iterable[int]) -> Dict[int, float]:
+        """Taxas para vários alvos de confirmação"""
+        return {target: self.fee_rate(target) for target in targets}
+
+    def recommended(self) -> Dict[str, float]:
+        """Taxas no formato de `/v1/fees/recommended` do mempool.space"""
+        return {name: self.fee_rate(target) for name, target in RECOMMENDED_TARGETS.items()}
+
@@ -0,0 +1,229 @@
+import logging
+import os
+import re
+import struct
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from itertools import accumulate
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from app.dependencies import get_cache_dir, get_settings
+
+logger = logging.getLogger(__name__)
+
+PRIORITIES = ("high", "medium", "low", "min")
+_FIELDS = ("timestamp",) + PRIORITIES
+# Registro no arquivo: timestamp e uma taxa por prioridade, em float64
+_ROW = struct.Struct("<" + "d" * len(_FIELDS))
+
+_WINDOW_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 604800}
+
+def parse_window(value: str) -> int:
+    """
+    Converte uma janela de tempo ('90m', '24h', '7d' ou segundos) em segundos
+
+    Raises:
+        ValueError: Se o formato for inválido
+    """
+    match = re.fullmatch(r"\s*(\d+)\s*([smhdw]?)\s*", value.lower())
+    if not match or int(match.group(1)) == 0:
+        raise ValueError(f"Janela inválida: {value}")
+    return int(match.group(1)) * _WINDOW_UNITS[match.group(2) or "s"]
+
+def _moving_average(values: List[float], counts: List[int], size: int) -> List[Optional[float]]:
+    """
+    Média móvel simples dos últimos `size` intervalos, calculada com somas acumuladas
+
+    Intervalos vazios (`counts` igual a 0) não entram na média mas ocupam seu
+    lugar na janela, que cobre sempre o mesmo tempo. Fica None onde a janela
+    inteira está vazia.
+    """
+    sums = [0.0] + list(accumulate(value if count else 0.0 for value, count in zip(values, counts)))
+    filled = [0] + list(accumulate(1 if count else 0 for count in counts))
+    averages: List[Optional[float]] = []
+    for i in range(len(values)):
+        start = max(0, i + 1 - size)
+        present = filled[i + 1] - filled[start]
+        averages.append((sums[i + 1] - sums[start]) / present if present else None)
+    return averages
+
+class _Series:
+    """Buffer circular das observações de uma rede, com uma `array('d')` por campo"""
+
+    __slots__ = ("capacity", "columns", "start", "size")
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.columns = {field: array("d", bytes(8 * capacity)) for field in _FIELDS}
+        self.start = 0
+        self.size = 0
+
+    def append(self, row: tuple):
+        index = (self.start + self.size) % self.capacity
+        for field, value in zip(_FIELDS, row):
+            self.columns[field][index] = value
+        if self.size < self.capacity:
+            self.size += 1
+        else:
+            self.start = (self.start + 1) % self.capacity
+
+    def ordered(self, field: str) -> array:
+        """Valores de um campo em ordem cronológica"""
+        column = self.columns[field]
+        end = self.start + self.size
+        if end <= self.capacity:
+            return column[self.start:end]
+        return column[self.start:] + column[:end - self.capacity]
+
+class FeeHistory:
+    """
+    Histórico das taxas estimadas por rede e prioridade.
+
+    Cada rede guarda as últimas `capacity` observações em um buffer circular
+    de arrays de float64 (~40 bytes por observação). As observações também
+    são acrescentadas a um arquivo binário no diretório do cache, relido na
+    primeira consulta da rede após um reinício; o arquivo é compactado
+    quando passa de duas vezes a capacidade.
+    """
+
+    def __init__(self, directory: Optional[Path] = None, capacity: Optional[int] = None):
+        self.directory = Path(directory) if directory is not None else None
+        self.capacity = capacity or get_settings().fee_history_capacity
+        self._lock = threading.Lock()
+        self._series: Dict[str, _Series] = {}
+        self._file_rows: Dict[str, int] = {}
+
+    def _path(self, network: str) -> Path:
+        if self.directory is None:
+            self.directory = get_cache_dir()
+        return self.directory / f"fee_history_{network}.bin"
+
+    def _load(self, network: str) -> _Series:
+        """Buffer da rede, lido do arquivo no primeiro acesso"""
+        series = self._series.get(network)
+        if series is not None:
+            return series
+        series = self._series[network] = _Series(self.capacity)
+        try:
+            data = self._path(network).read_bytes()
+        except FileNotFoundError:
+            data = b""
+        except OSError as e:
+            logger.warning(f"[FEE_HISTORY] Falha ao ler histórico de {network}: {str(e)}")
+            data = b""
+        rows = len(data) // _ROW.size
+        for offset in range(max(0, rows - self.capacity) * _ROW.size, rows * _ROW.size, _ROW.size):
+            series.append(_ROW.unpack_from(data, offset))
+        self._file_rows[network] = rows
+        if len(data) % _ROW.size:
+            # Registro incompleto no fim (queda durante uma gravação): corta o arquivo para
+            # que os próximos registros acrescentados fiquem alinhados
+            logger.warning(f"[FEE_HISTORY] Descartando registro incompleto no histórico de {network}")
+            try:
+                os.truncate(self._path(network), rows * _ROW.size)
+            except OSError as e:
+                logger.warning(f"[FEE_HISTORY] Falha ao corrigir histórico de {network}: {str(e)}")
+                # Sem conseguir cortar, o próximo registro reescreve o arquivo só com o buffer
+                self._file_rows[network] = self.capacity * 2
+        return series
+
+    def _persist(self, network: str, series: _Series, row: tuple):
+        """Acrescenta a observação ao arquivo, reescrevendo-o só com o buffer quando ficar grande"""
+        path = self._path(network)
+        try:
+            os.makedirs(path.parent, exist_ok=True)
+            if self._file_rows.get(network, 0) >= self.capacity * 2:
+                columns = [series.ordered(field) for field in _FIELDS]
+                temp_path = path.with_suffix(".tmp")
+                with open(temp_path, "wb") as f:
+                    f.write(b"".join(_ROW.pack(*values) for values in zip(*columns)))
+                os.replace(temp_path, path)
+                self._file_rows[network] = series.size
+                return
+            with open(path, "ab") as f:
+                f.write(_ROW.pack(*row))
+            self._file_rows[network] = self._file_rows.get(network, 0) + 1
+        except OSError as e:
+            logger.warning(f"[FEE_HISTORY] Falha ao gravar histórico de {network}: {str(e)}")
+
+    def record(self, network: str, fees: Dict[str, float], timestamp: Optional[float] = None):
+        """
+        Registra uma observação de taxas
+
+        Args:
+            network: Rede Bitcoin ('mainnet' ou 'testnet')
+            fees: Taxa (sat/vB) por prioridade ('high', 'medium', 'low', 'min')
+            timestamp: Instante da observação (padrão: agora)
+        """
+        row = (timestamp or time.time(),) + tuple(float(fees[priority]) for priority in PRIORITIES)
+        with self._lock:
+            series = self._load(network)
+            series.append(row)
+            self._persist(network, series, row)
+
+    def series(self, network: str, window: int, points: int = 96, average: int = 6) -> Dict[str, Any]:
+        """
+        Série reduzida das taxas na janela e sua média móvel
+
+        A janela é dividida em `points` intervalos iguais; cada ponto é a média
+        das observações do intervalo (intervalos sem observações são omitidos).
+        Como as observações estão em ordem cronológica, cada intervalo é uma
+        fatia das colunas, localizada por busca binária e somada sem laço em Python.
+        A média móvel cobre os últimos `average` intervalos de tempo, vazios
+        incluídos: ela nunca junta observações mais distantes que isso.
+
+        Args:
+            network: Rede Bitcoin ('mainnet' ou 'testnet')
+            window: Janela em segundos, contada a partir de agora
+            points: Número máximo de pontos
+            average: Pontos na janela da média móvel
+
+        Returns:
+            Dict: `interval` (segundos por ponto), `samples` (observações na
+                janela), `points` e `moving_average` (listas de
+                {timestamp, high, medium, low, min})
+        """
+        since = time.time() - window
+        with self._lock:
+            series = self._load(network)
+            timestamps = series.ordered("timestamp")
+            first = bisect_left(timestamps, since)
+            columns = {field: series.ordered(field)[first:] for field in _FIELDS}
+
+        interval = window / points
+        timestamps = columns["timestamp"]
+        # Início de cada intervalo nas colunas; o último vai até o fim (inclui relógios adiantados)
+        bounds = [bisect_left(timestamps, since + bucket * interval) for bucket in range(points)]
+        bounds.append(len(timestamps))
+        counts = [bounds[bucket + 1] - bounds[bucket] for bucket in range(points)]
+        means = {
+            priority: [
+                sum(columns[priority][bounds[bucket]:bounds[bucket + 1]]) / count if count else 0.0
+                for bucket, count in enumerate(counts)
+            ]
+            for priority in PRIORITIES
+        }
+
+        buckets = [bucket for bucket, count in enumerate(counts) if count]
+        values = {priority: [means[priority][bucket] for bucket in buckets] for priority in PRIORITIES}
+        averages = {}
+        for priority in PRIORITIES:
+            moving = _moving_average(means[priority], counts, average)
+            averages[priority] = [moving[bucket] for bucket in buckets]
+        bucket_times = [int(since + (bucket + 0.5) * interval) for bucket in buckets]
+
+        def rows(source: Dict[str, List[float]]) -> List[Dict[str, float]]:
+            return [
+                {"timestamp": timestamp, **{priority: round(source[priority][i], 3) for priority in PRIORITIES}}
+                for i, timestamp in enumerate(bucket_times)
+            ]
+
+        return {
+            "interval": int(interval),
+            "samples": len(timestamps),
+            "points": rows(values),
+            "moving_average": rows(averages)
+        }
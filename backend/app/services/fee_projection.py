@@ -0,0 +1,114 @@
+import math
+import time
+from bisect import bisect_right
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from app.services.fee_histogram import BLOCK_VSIZE, FeeHistogram
+
+class MempoolProjection:
+    """
+    Projeção dos próximos blocos a partir da mempool atual.
+
+    Cada bloco projetado é reduzido à sua taxa-limite: a menor taxa que ainda
+    entra nele. As taxas-limite ficam em ordem decrescente (o primeiro bloco
+    leva as taxas mais altas), então "em quantos blocos confirma uma taxa" é
+    uma busca binária e "qual a menor taxa para N blocos" é a taxa-limite do
+    bloco N. As respostas supõem que nenhuma transação com taxa maior chegue
+    antes da confirmação.
+
+    Depois do último bloco projetado, qualquer transação aceita pela rede
+    confirma: `blocks_for_rate` conta um bloco a mais para taxas abaixo da
+    última taxa-limite e `rate_for_blocks` responde `min_rate` além dele.
+    """
+
+    __slots__ = ("boundaries", "_ascending", "vsize", "min_rate", "source", "timestamp")
+
+    def __init__(self, boundaries: Sequence[float], vsize: int, min_rate: float = 1.0, source: str = "histogram"):
+        self.boundaries: List[float] = []
+        for boundary in boundaries:
+            # Garante a ordem decrescente mesmo com percentis arredondados pelo provedor
+            last = self.boundaries[-1] if self.boundaries else math.inf
+            self.boundaries.append(max(min_rate, min(last, float(boundary))))
+        self._ascending = self.boundaries[::-1]
+        self.vsize = vsize
+        self.min_rate = min_rate
+        self.source = source
+        self.timestamp = int(time.time())
+
+    @classmethod
+    def from_mempool_blocks(cls, blocks: Iterable[Dict[str, Any]], min_rate: float = 1.0,
+                            block_vsize: int = BLOCK_VSIZE) -> "MempoolProjection":
+        """
+        Projeção a partir de `/v1/fees/mempool-blocks` do mempool.space
+
+        O último bloco da API agrega todo o resto da mempool; ele é dividido em
+        blocos cheios, com as taxas-limite interpoladas entre os percentis da
+        sua faixa de taxas. A taxa-limite do último bloco é a menor taxa que a
+        API projeta nele (`fee_range[0]`).
+
+        Args:
+            blocks: Blocos projetados com `vsize` e `fee_range` (percentis em ordem crescente)
+            min_rate: Taxa mínima de retransmissão (sat/vB)
+            block_vsize: Capacidade de um bloco (vB)
+        """
+        boundaries: List[float] = []
+        total = 0
+        for block in blocks:
+            vsize, fee_range = block["vsize"], block["fee_range"]
+            total += vsize
+            if not fee_range:
+                continue
+            count = max(1, math.ceil(vsize / block_vsize))
+            for index in range(1, count + 1):
+                # Fração da faixa que fica acima do fim do bloco `index`
+                position = (1 - index / count) * (len(fee_range) - 1)
+                lower = int(position)
+                upper = min(lower + 1, len(fee_range) - 1)
+                boundaries.append(fee_range[lower] + (fee_range[upper] - fee_range[lower]) * (position - lower))
+        return cls(boundaries, total, min_rate, source="mempool-blocks")
+
+    @classmethod
+    def from_histogram(cls, histogram: FeeHistogram) -> "MempoolProjection":
+        """Projeção derivada do histograma de taxas da mempool (ver `FeeHistogram`)"""
+        count = math.ceil(histogram.total_vsize / histogram.block_vsize)
+        boundaries = [histogram.fee_rate(target) for target in range(1, count + 1)]
+        projection = cls(boundaries, histogram.total_vsize, histogram.min_rate, source="histogram")
+        projection.timestamp = histogram.timestamp
+        return projection
+
+    @property
+    def blocks(self) -> int:
+        """Número de blocos projetados"""
+        return len(self.boundaries)
+
+    def blocks_for_rate(self, rate: float) -> Optional[int]:
+        """
+        Em quantos blocos confirma uma transação que paga `rate`
+
+        Args:
+            rate: Taxa em sat/vB
+
+        Returns:
+            int: Número de blocos (1 = próximo bloco), ou None se a taxa estiver
+                abaixo da mínima de retransmissão
+        """
+        if rate < self.min_rate:
+            return None
+        # Blocos cuja taxa-limite é maior que `rate` confirmam antes
+        return len(self._ascending) - bisect_right(self._ascending, rate) + 1
+
+    def rate_for_blocks(self, target: int) -> float:
+        """
+        Menor taxa para confirmar em até `target` blocos
+
+        Args:
+            target: Número de blocos (1 = próximo bloco)
+
+        Returns:
+            float: Taxa em sat/vB
+        """
+        if target < 1:
+            raise ValueError("O alvo deve ser de pelo menos 1 bloco")
+        if target > len(self.boundaries):
+            return self.min_rate
+        return self.boundaries[target - 1]
@@ -1,23 +1,163 @@
-import requests
 import logging
+import threading
 import time
 import random
-from typing import Dict, Any
-from app.models.fee_models import FeeEstimateModel
+from typing import Dict, Any, List, Optional, Tuple
+from app.dependencies import get_settings
+from app.models.fee_models import (
+    FeeConfirmationModel, FeeEstimateModel, FeeHistoryModel, FeeQuoteModel, FeeTargetsModel
+)
+from app.services.blockchain_service import provider_router
+from app.services.cache.ttl_policy import FEE_PREFIX, get_ttl_policy
+from app.services.fee_histogram import FeeHistogram
+from app.services.fee_history import FeeHistory, parse_window
+from app.services.fee_projection import MempoolProjection
+from app.services.providers import FEES, MEMPOOL, MEMPOOL_BLOCKS, ProviderUnavailable
+from app.services.tx_size import fee_for_vsize, transaction_weight, weight_to_vsize
 
 logger = logging.getLogger(__name__)
 
+# Dados mantidos em cache por rede: taxas por prioridade, histograma da mempool
+# e projeção dos próximos blocos
+_FEES = "fees"
+_HISTOGRAM = "histogram"
+_PROJECTION = "projection"
+
 class FeeEstimator:
-    """Serviço para estimativa de taxas de transação Bitcoin"""
+    """
+    Serviço para estimativa de taxas de transação Bitcoin.
+
+    As taxas por prioridade e o histograma da mempool (ver `FeeHistogram`)
+    ficam em cache por rede durante `cache_duration` segundos. Com a thread
+    de atualização ativa (ver `start`), cada dado já consultado é atualizado
+    em background quando o cache atinge `refresh_ahead` da sua validade, e
+    as requisições são respondidas do cache sem esperar o upstream. Se a
+    atualização falhar, ela é repetida em background enquanto o valor
+    anterior continua sendo servido.
+
+    Com `source` igual a "histogram", as taxas por prioridade são calculadas
+    localmente a partir do histograma, em vez de vir das estimativas do
+    provedor.
+
+    A projeção dos próximos blocos (ver `MempoolProjection`) vem de
+    `/v1/fees/mempool-blocks` quando algum provedor a oferece; sem ele, é
+    derivada do histograma.
+
+    Cada estimativa obtida do upstream é registrada em `history`, se informado.
+    """
+    
+    def __init__(self, cache_duration: Optional[float] = None, refresh_ahead: Optional[float] = None,
+                 source: Optional[str] = None, history: Optional[FeeHistory] = None):
+        settings = get_settings()
+        self.cache_duration = cache_duration or get_ttl_policy().base_ttl(FEE_PREFIX)  # padrão: 5 minutos
+        self.refresh_ahead = refresh_ahead or settings.fee_refresh_ahead
+        self.source = source or settings.fee_source
+        self.min_rate = settings.fee_min_relay_rate
+        self.history = history
+        self._lock = threading.Lock()
+        self._cache: Dict[Tuple[str, str], Tuple[Any, float]] = {}
+        self._next_refresh: Dict[Tuple[str, str], float] = {}
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+    
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+    
+    def _cached(self, kind: str, network: str) -> Any:
+        """
+        Valor em cache que pode ser servido sem consultar o upstream
+
+        A primeira consulta de um dado o inclui na atualização em background.
+        Com a atualização ativa, um valor expirado há menos de uma validade
+        continua sendo servido enquanto a thread tenta atualizá-lo.
+        """
+        key = (kind, network)
+        with self._lock:
+            if key not in self._next_refresh:
+                # A requisição atual consulta o upstream; a thread só tenta de novo se ela falhar
+                self._next_refresh[key] = time.time() + self._retry_delay()
+                self._wake.set()
+            entry = self._cache.get(key)
+        if entry is None:
+            return None
+        value, fetched_at = entry
+        age = time.time() - fetched_at
+        if age < self.cache_duration:
+            return value
+        if self.running and age < self.cache_duration * 2:
+            self._wake.set()
+            return value
+        return None
+    
+    def _put(self, kind: str, network: str, value: Any) -> Any:
+        """Atualiza o cache de um dado e agenda a próxima atualização"""
+        with self._lock:
+            self._cache[(kind, network)] = (value, time.time())
+            self._next_refresh[(kind, network)] = time.time() + self.cache_duration * self.refresh_ahead
+        # Acorda a thread para reagendar a próxima atualização
+        self._wake.set()
+        return value
+    
+    def _operation(self, kind: str) -> str:
+        """Operação dos provedores que fornece o dado"""
+        if kind == _PROJECTION:
+            return MEMPOOL_BLOCKS
+        return FEES if kind == _FEES and self.source != _HISTOGRAM else MEMPOOL
     
-    def __init__(self):
-        self.fee_cache = {}
-        self.cache_time = 0
-        self.cache_duration = 300  # 5 minutos
+    def _build(self, kind: str, network: str, data: Any) -> Any:
+        """Converte a resposta do provedor e atualiza o cache"""
+        if kind == _PROJECTION:
+            return self._put(_PROJECTION, network, MempoolProjection.from_mempool_blocks(data, self.min_rate))
+        if self._operation(kind) == MEMPOOL:
+            histogram = self._put(_HISTOGRAM, network, FeeHistogram(data, min_rate=self.min_rate))
+            if self.source != _HISTOGRAM:
+                return histogram
+            # Taxas por prioridade derivadas do mesmo snapshot
+            recommended = self._store_fees(network, histogram.recommended())
+            return histogram if kind == _HISTOGRAM else recommended
+        return self._store_fees(network, data)
     
-    def _is_cache_valid(self) -> bool:
-        """Verifica se o cache de taxas ainda é válido"""
-        return (time.time() - self.cache_time) < self.cache_duration and self.fee_cache
+    def _store_fees(self, network: str, fee_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Atualiza o cache das taxas por prioridade e as registra no histórico"""
+        result = self._put(_FEES, network, self._recommended(fee_data))
+        if self.history is not None:
+            self.history.record(network, {
+                "high": result["high_priority"],
+                "medium": result["medium_priority"],
+                "low": result["low_priority"],
+                "min": result["fee_rate"]
+            })
+        return result
+    
+    @staticmethod
+    def _recommended(fee_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Converte as taxas no formato de /v1/fees/recommended"""
+        return {
+            "fee_rate": fee_data.get("hourFee", 5), 
+            "high_priority": fee_data.get("fastestFee", 10),  
+            "medium_priority": fee_data.get("halfHourFee", 5),  
+            "low_priority": fee_data.get("economyFee", 1),  
+            "timestamp": int(time.time()),
+            "unit": "sat/vB"
+        }
+    
+    def _get(self, kind: str, network: str) -> Any:
+        cached = self._cached(kind, network)
+        if cached is not None:
+            logger.debug(f"Usando cache de {kind} ({network})")
+            return cached
+        logger.info(f"Consultando {kind} da mempool para rede {network}")
+        return self._build(kind, network, provider_router.get(self._operation(kind), network))
+    
+    async def _get_async(self, kind: str, network: str) -> Any:
+        cached = self._cached(kind, network)
+        if cached is not None:
+            logger.debug(f"Usando cache de {kind} ({network})")
+            return cached
+        logger.info(f"Consultando {kind} da mempool para rede {network}")
+        return self._build(kind, network, await provider_router.get_async(self._operation(kind), network))
     
     def estimate_from_mempool(self, network: str = "testnet") -> Dict[str, Any]:
         """
@@ -30,37 +170,164 @@ class FeeEstimator:
             Dicionário com estimativas de taxas para diferentes prioridades
         """
         try:
-            if self._is_cache_valid():
-                logger.debug("Usando cache de taxas")
-                return self.fee_cache
-            
-            if network == "mainnet":
-                url = "https://mempool.space/api/v1/fees/recommended"
-            else:
-                url = "https://mempool.space/testnet/api/v1/fees/recommended"
-            
-            logger.info(f"Consultando taxas da mempool para rede {network}")
-            response = requests.get(url, timeout=10)
-            response.raise_for_status()
-            
-            fee_data = response.json()
-            
-            result = {
-                "fee_rate": fee_data.get("hourFee", 5), 
-                "high_priority": fee_data.get("fastestFee", 10),  
-                "medium_priority": fee_data.get("halfHourFee", 5),  
-                "low_priority": fee_data.get("economyFee", 1),  
-                "timestamp": int(time.time()),
-                "unit": "sat/vB"
-            }
-            
-            self.fee_cache = result
-            self.cache_time = time.time()
-            
-            return result
+            return self._get(_FEES, network)
         except Exception as e:
             logger.error(f"Erro ao obter taxas da mempool: {str(e)}", exc_info=True)
-            return self._fallback_estimation(network)
+            return self._stale_or_fallback(network)
+    
+    async def estimate_from_mempool_async(self, network: str = "testnet") -> Dict[str, Any]:
+        """Versão assíncrona de `estimate_from_mempool`"""
+        try:
+            return await self._get_async(_FEES, network)
+        except Exception as e:
+            logger.error(f"Erro ao obter taxas da mempool: {str(e)}", exc_info=True)
+            return self._stale_or_fallback(network)
+    
+    def histogram(self, network: str = "testnet") -> FeeHistogram:
+        """
+        Snapshot do histograma de taxas da mempool
+
+        Args:
+            network: Rede Bitcoin ('testnet' ou 'mainnet')
+
+        Returns:
+            FeeHistogram: Snapshot mais recente (ou expirado, se o upstream falhar)
+
+        Raises:
+            ProviderUnavailable: Se o upstream falhar e não houver snapshot em cache
+        """
+        try:
+            return self._get(_HISTOGRAM, network)
+        except ProviderUnavailable as e:
+            return self._stale(_HISTOGRAM, network, e)
+    
+    async def histogram_async(self, network: str = "testnet") -> FeeHistogram:
+        """Versão assíncrona de `histogram`"""
+        try:
+            return await self._get_async(_HISTOGRAM, network)
+        except ProviderUnavailable as e:
+            return self._stale(_HISTOGRAM, network, e)
+    
+    def projection(self, network: str = "testnet") -> MempoolProjection:
+        """
+        Projeção dos próximos blocos da mempool
+
+        Args:
+            network: Rede Bitcoin ('testnet' ou 'mainnet')
+
+        Returns:
+            MempoolProjection: Projeção mais recente, de `/v1/fees/mempool-blocks`
+                ou derivada do histograma se nenhum provedor a oferecer ou
+                responder
+
+        Raises:
+            ProviderUnavailable: Se nem a projeção nem o histograma puderem ser obtidos
+        """
+        if provider_router.supports(MEMPOOL_BLOCKS, network):
+            try:
+                return self._get(_PROJECTION, network)
+            except ProviderUnavailable as e:
+                logger.warning(f"[FEE] Projeção de blocos indisponível ({network}), usando o histograma: {str(e)}")
+        return MempoolProjection.from_histogram(self.histogram(network))
+    
+    async def projection_async(self, network: str = "testnet") -> MempoolProjection:
+        """Versão assíncrona de `projection`"""
+        if provider_router.supports(MEMPOOL_BLOCKS, network):
+            try:
+                return await self._get_async(_PROJECTION, network)
+            except ProviderUnavailable as e:
+                logger.warning(f"[FEE] Projeção de blocos indisponível ({network}), usando o histograma: {str(e)}")
+        return MempoolProjection.from_histogram(await self.histogram_async(network))
+    
+    def _stale(self, kind: str, network: str, error: ProviderUnavailable) -> Any:
+        """Dado em cache mesmo que expirado, usado quando o upstream falha"""
+        with self._lock:
+            entry = self._cache.get((kind, network))
+        if entry is None:
+            raise error
+        logger.warning(f"Usando {kind} da mempool expirado ({network})")
+        return entry[0]
+    
+    def watch(self, network: str, kind: str = _FEES):
+        """Inclui um dado na atualização em background antes da primeira consulta"""
+        with self._lock:
+            self._next_refresh.setdefault((kind, network), time.time())
+        self._wake.set()
+    
+    def refresh(self, network: str, kind: str = _FEES) -> bool:
+        """
+        Atualiza um dado de uma rede no upstream
+
+        Args:
+            network: Rede Bitcoin ('testnet' ou 'mainnet')
+            kind: 'fees' (taxas por prioridade), 'histogram' ou 'projection'
+
+        Returns:
+            bool: True se o dado foi atualizado
+        """
+        try:
+            self._build(kind, network, provider_router.get(self._operation(kind), network))
+            logger.debug(f"[FEE] {kind} de {network} atualizado em background")
+            return True
+        except Exception as e:
+            logger.warning(f"[FEE] Falha ao atualizar {kind} de {network} em background: {str(e)}")
+            with self._lock:
+                self._next_refresh[(kind, network)] = time.time() + self._retry_delay()
+            return False
+    
+    def _retry_delay(self) -> float:
+        """Espera até uma nova tentativa de atualização: metade da folga entre a atualização e a expiração"""
+        return max(1.0, self.cache_duration * (1 - self.refresh_ahead) / 2)
+    
+    def _refresh_loop(self):
+        while not self._stop.is_set():
+            # Limpa antes de ler os prazos: um `watch()` que chegar depois disso não é perdido
+            self._wake.clear()
+            with self._lock:
+                keys = list(self._next_refresh)
+            for key in keys:
+                with self._lock:
+                    # Rechecado a cada item: uma atualização pode renovar outro dado (histograma e taxas)
+                    due = self._next_refresh[key] <= time.time()
+                if due:
+                    self.refresh(key[1], key[0])
+            with self._lock:
+                next_at = min(self._next_refresh.values(), default=None)
+            self._wake.wait(None if next_at is None else max(0.0, next_at - time.time()))
+    
+    def start(self):
+        """Inicia a thread de atualização das taxas"""
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._refresh_loop, name="fee-refresh", daemon=True)
+        self._thread.start()
+    
+    def stop(self):
+        """Interrompe a thread de atualização"""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+    
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Retorna a idade de cada dado em cache, indexado por 'tipo/rede'"""
+        now = time.time()
+        with self._lock:
+            return {
+                f"{kind}/{network}": {"age": round(now - fetched_at, 1)}
+                for (kind, network), (_, fetched_at) in self._cache.items()
+            }
+    
+    def _stale_or_fallback(self, network: str) -> Dict[str, Any]:
+        """Taxas da rede em cache mesmo que expiradas ou, sem cache, a estimativa de fallback"""
+        with self._lock:
+            entry = self._cache.get((_FEES, network))
+        if entry is not None:
+            logger.warning(f"Usando cache de taxas expirado ({network})")
+            return entry[0]
+        return self._fallback_estimation(network)
     
     def _fallback_estimation(self, network: str) -> Dict[str, Any]:
         """Fornece uma estimativa de fallback quando as APIs falham"""
@@ -80,7 +347,8 @@ class FeeEstimator:
             "source": "fallback"
         }
 
-fee_estimator = FeeEstimator()
+fee_history = FeeHistory()
+fee_estimator = FeeEstimator(history=fee_history if get_settings().fee_history_enabled else None)
 
 def get_fee_estimate(network: str = "testnet"):
     """
@@ -113,7 +381,119 @@ def get_fee_estimate(network: str = "testnet"):
         Exception: Se ocorrer um erro ao consultar a API de taxas
             (em caso de falha, valores de fallback são retornados)
     """
-    fee_data = fee_estimator.estimate_from_mempool(network)
+    return _to_fee_model(fee_estimator.estimate_from_mempool(network))
+
+async def get_fee_estimate_async(network: str = "testnet"):
+    """Versão assíncrona de `get_fee_estimate`, para rotas `async def`"""
+    return _to_fee_model(await fee_estimator.estimate_from_mempool_async(network))
+
+async def get_fee_quote_async(inputs: Dict[str, int], outputs: Dict[str, int],
+                              network: str = "testnet") -> FeeQuoteModel:
+    """
+    Taxa total de uma transação planejada, em cada prioridade de `get_fee_estimate`
+
+    O tamanho vem só do número de inputs e outputs de cada tipo (ver
+    `app.services.tx_size`), sem montar a transação.
+
+    Args:
+        inputs: Quantidade de inputs por tipo ('p2pkh', 'p2sh-p2wpkh', 'p2wpkh', 'p2tr')
+        outputs: Quantidade de outputs por tipo ('p2pkh', 'p2sh', 'p2wpkh', 'p2wsh', 'p2tr')
+        network: Rede Bitcoin ('mainnet' ou 'testnet')
+
+    Returns:
+        FeeQuoteModel: Peso, tamanho virtual e taxa total por prioridade
+
+    Raises:
+        ValueError: Se um tipo não for suportado
+    """
+    weight = transaction_weight(inputs, outputs)
+    vsize = weight_to_vsize(weight)
+    estimate = await get_fee_estimate_async(network)
+    rates = {"high": estimate.high, "medium": estimate.medium, "low": estimate.low, "min": estimate.min}
+    return FeeQuoteModel(
+        network=network,
+        inputs=inputs,
+        outputs=outputs,
+        weight=weight,
+        vsize=vsize,
+        rates=rates,
+        fees={priority: fee_for_vsize(vsize, rate) for priority, rate in rates.items()},
+        timestamp=estimate.timestamp
+    )
+
+async def get_fee_targets_async(targets: List[int], network: str = "testnet") -> FeeTargetsModel:
+    """
+    Estima a taxa para confirmar em até N blocos, para cada alvo pedido
+
+    As taxas são calculadas localmente a partir do snapshot do histograma da
+    mempool em cache (ver `FeeHistogram`).
+
+    Args:
+        targets: Alvos de confirmação em blocos
+        network: Rede Bitcoin ('mainnet' ou 'testnet')
+
+    Returns:
+        FeeTargetsModel: Taxa por alvo e dados do snapshot
+
+    Raises:
+        ProviderUnavailable: Se o histograma não puder ser obtido e não houver cache
+    """
+    histogram = await fee_estimator.histogram_async(network)
+    return FeeTargetsModel(
+        network=network,
+        rates=histogram.fee_rates(targets),
+        mempool_vsize=histogram.total_vsize,
+        timestamp=histogram.timestamp
+    )
+
+async def get_fee_confirmation_async(rates: List[float], targets: List[int],
+                                     network: str = "testnet") -> FeeConfirmationModel:
+    """
+    Relaciona taxas e tempo de confirmação pela projeção dos próximos blocos
+
+    Args:
+        rates: Taxas (sat/vB) para as quais estimar o número de blocos até a confirmação
+        targets: Alvos em blocos para os quais calcular a menor taxa
+        network: Rede Bitcoin ('mainnet' ou 'testnet')
+
+    Returns:
+        FeeConfirmationModel: Blocos por taxa, taxa por alvo e dados da projeção
+
+    Raises:
+        ProviderUnavailable: Se a projeção não puder ser obtida e não houver cache
+    """
+    projection = await fee_estimator.projection_async(network)
+    return FeeConfirmationModel(
+        network=network,
+        blocks_by_rate={rate: projection.blocks_for_rate(rate) for rate in rates},
+        rates_by_blocks={target: projection.rate_for_blocks(target) for target in targets},
+        projected_blocks=projection.blocks,
+        mempool_vsize=projection.vsize,
+        source=projection.source,
+        timestamp=projection.timestamp
+    )
+
+def get_fee_history(window: str = "24h", network: str = "testnet", points: int = 96,
+                    average: int = 6) -> FeeHistoryModel:
+    """
+    Histórico das taxas estimadas, reduzido a `points` pontos, com média móvel
+
+    Args:
+        window: Janela a partir de agora ('90m', '24h', '7d' ou segundos)
+        network: Rede Bitcoin ('mainnet' ou 'testnet')
+        points: Número máximo de pontos da série
+        average: Pontos na janela da média móvel
+
+    Returns:
+        FeeHistoryModel: Série reduzida e média móvel por prioridade
+
+    Raises:
+        ValueError: Se a janela for inválida
+    """
+    seconds = parse_window(window)
+    return FeeHistoryModel(network=network, window=seconds, **fee_history.series(network, seconds, points, average))
+
+def _to_fee_model(fee_data: Dict[str, Any]) -> FeeEstimateModel:
     high = fee_data['high_priority']
     medium = fee_data['medium_priority']
     low = fee_data['low_priority']
@@ -0,0 +1,19 @@
+from .base import FEES, MEMPOOL, MEMPOOL_BLOCKS, TX_STATUS, UTXOS, BlockchainProvider, ProviderUnavailable
+from .blockchair import BlockchairProvider
+from .esplora import EsploraProvider, MempoolProvider
+from .router import ProviderRouter, create_providers
+
+__all__ = [
+    'BlockchainProvider',
+    'ProviderUnavailable',
+    'EsploraProvider',
+    'MempoolProvider',
+    'BlockchairProvider',
+    'ProviderRouter',
+    'create_providers',
+    'UTXOS',
+    'TX_STATUS',
+    'FEES',
+    'MEMPOOL',
+    'MEMPOOL_BLOCKS'
+]
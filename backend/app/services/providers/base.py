@@ -0,0 +1,109 @@
+from datetime import datetime, timezone
+from typing import Any, Dict, FrozenSet, List, Optional
+
+# Operações suportadas pelos provedores
+UTXOS = "utxos"
+TX_STATUS = "tx_status"
+FEES = "fees"
+MEMPOOL = "mempool"
+MEMPOOL_BLOCKS = "mempool_blocks"
+
+class ProviderUnavailable(Exception):
+    """
+    Nenhum provedor conseguiu responder à consulta
+
+    `retry_after` é preenchido quando algum provedor foi recusado pelo
+    limitador de taxa: segundos até ele voltar a aceitar requisições.
+    """
+
+    def __init__(self, operation: str, network: str, errors: Dict[str, str],
+                 retry_after: Optional[float] = None):
+        self.operation = operation
+        self.network = network
+        self.errors = errors
+        self.retry_after = retry_after
+        detail = "; ".join(f"{name}: {error}" for name, error in errors.items()) or "nenhum provedor configurado"
+        super().__init__(f"Falha em {operation} ({network}): {detail}")
+
+def iso_timestamp(value: Any) -> Optional[str]:
+    """Converte um timestamp Unix ou 'AAAA-MM-DD HH:MM:SS' (UTC) para ISO 8601"""
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return datetime.fromtimestamp(value, tz=timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+    return str(value).replace(" ", "T") + ("" if str(value).endswith("Z") else "Z")
+
+def confirmations_at(block_height: Optional[int], tip_height: Optional[int]) -> int:
+    """Número de confirmações de um bloco dado o topo atual (1 se o topo for desconhecido)"""
+    if not block_height:
+        return 0
+    if tip_height is None:
+        return 1
+    return max(1, tip_height - block_height + 1)
+
+class BlockchainProvider:
+    """
+    Adaptador de uma API externa de blockchain.
+
+    Cada adaptador sabe montar a URL de uma operação e converter a resposta
+    para o formato usado pelos serviços:
+
+    * `utxos`: lista de UTXOs no formato Esplora
+      (`txid`, `vout`, `value`, `status: {confirmed, block_height}`)
+    * `tx_status`: `confirmations`, `block_height`, `block_hash`, `timestamp`
+    * `fees`: taxas no formato de `/v1/fees/recommended` do mempool.space
+    * `mempool`: histograma de taxas da mempool, lista de `[taxa (sat/vB), vsize]`
+      em ordem decrescente de taxa
+    * `mempool_blocks`: projeção dos próximos blocos, do primeiro ao último, cada
+      um com `vsize` e `fee_range` (percentis da taxa em sat/vB, em ordem crescente)
+
+    A execução das requisições (cliente síncrono ou assíncrono, escolha do
+    provedor e failover) fica a cargo de `ProviderRouter`.
+    """
+
+    name = "base"
+    operations: FrozenSet[str] = frozenset()
+
+    def __init__(self, urls: Dict[str, str]):
+        self.urls = {network: url.rstrip("/") for network, url in urls.items()}
+
+    def supports(self, operation: str, network: str) -> bool:
+        return operation in self.operations and network in self.urls
+
+    def url(self, operation: str, network: str, **params) -> str:
+        """
+        Monta a URL de uma operação
+
+        Args:
+            operation: Operação ('utxos', 'tx_status', 'fees', 'mempool' ou 'mempool_blocks')
+            network: Rede Bitcoin ('mainnet' ou 'testnet')
+            **params: Parâmetros da operação (address, txid)
+
+        Returns:
+            str: URL completa
+        """
+        raise NotImplementedError
+
+    def parse(self, operation: str, data: Any, network: str, tip_height: Optional[int] = None,
+              **params) -> Any:
+        """
+        Converte a resposta (JSON) de uma operação para o formato comum
+
+        Args:
+            operation: Operação ('utxos', 'tx_status', 'fees', 'mempool' ou 'mempool_blocks')
+            data: Corpo da resposta já decodificado
+            network: Rede Bitcoin
+            tip_height: Altura atual do topo, usada para contar confirmações
+            **params: Parâmetros da operação
+
+        Returns:
+            Any: Dados no formato descrito na classe
+        """
+        raise NotImplementedError
+
+    def health_url(self, network: str) -> str:
+        """URL consultada pelo monitor de conectividade"""
+        raise NotImplementedError
+
+    def networks(self) -> List[str]:
+        return list(self.urls)
@@ -0,0 +1,79 @@
+from typing import Any, Dict, Optional
+
+from app.dependencies import get_settings
+from app.services.providers.base import (
+    FEES, TX_STATUS, UTXOS, BlockchainProvider, confirmations_at, iso_timestamp
+)
+
+# Quantidade máxima de UTXOs retornada pelo dashboard de endereço
+_UTXO_LIMIT = 1000
+
+def _default_urls() -> Dict[str, str]:
+    base = get_settings().blockchain_api_url.rstrip("/")
+    return {"mainnet": base, "testnet": f"{base}/testnet"}
+
+class BlockchairProvider(BlockchainProvider):
+    """
+    API do Blockchair (`BLOCKCHAIN_API_URL`).
+
+    Usa os dashboards de endereço e de transação e, para as taxas, o
+    `suggested_transaction_fee_per_byte_sat` de `/stats` (o mesmo valor
+    para todas as prioridades).
+
+    O dashboard de endereço retorna no máximo `_UTXO_LIMIT` UTXOs; endereços
+    com mais UTXOs que isso são recusados (ver `parse`) em vez de gerar um
+    saldo parcial.
+    """
+
+    name = "blockchair"
+    operations = frozenset({UTXOS, TX_STATUS, FEES})
+
+    def __init__(self, urls: Optional[Dict[str, str]] = None):
+        super().__init__(urls or _default_urls())
+
+    def url(self, operation: str, network: str, **params) -> str:
+        base = self.urls[network]
+        if operation == UTXOS:
+            return f"{base}/dashboards/address/{params['address']}?limit=0,{_UTXO_LIMIT}"
+        if operation == TX_STATUS:
+            return f"{base}/dashboards/transaction/{params['txid']}"
+        return f"{base}/stats"
+
+    def parse(self, operation: str, data: Any, network: str, tip_height: Optional[int] = None,
+              **params) -> Any:
+        if operation == UTXOS:
+            # Endereço sem histórico aparece com a lista de UTXOs vazia
+            dashboard = data["data"][params["address"]]
+            utxos = dashboard["utxo"]
+            unspent = (dashboard.get("address") or {}).get("unspent_output_count")
+            if unspent is not None and len(utxos) < unspent:
+                # Lista truncada pelo limite: o saldo derivado dela estaria errado, então o
+                # router passa a consulta para o próximo provedor
+                raise ValueError(f"Lista de UTXOs truncada: {len(utxos)} de {unspent}")
+            return [
+                {
+                    "txid": utxo["transaction_hash"],
+                    "vout": utxo["index"],
+                    "value": utxo["value"],
+                    "status": {
+                        "confirmed": utxo["block_id"] > 0,
+                        "block_height": utxo["block_id"] if utxo["block_id"] > 0 else None
+                    }
+                }
+                for utxo in utxos
+            ]
+        if operation == TX_STATUS:
+            transaction = data["data"][params["txid"]]["transaction"]
+            block_height = transaction["block_id"] if transaction["block_id"] > 0 else None
+            tip = data.get("context", {}).get("state") or tip_height
+            return {
+                "confirmations": confirmations_at(block_height, tip),
+                "block_height": block_height,
+                "block_hash": None,
+                "timestamp": iso_timestamp(transaction.get("time")) if block_height else None
+            }
+        fee = data["data"]["suggested_transaction_fee_per_byte_sat"]
+        return {"fastestFee": fee, "halfHourFee": fee, "hourFee": fee, "economyFee": fee}
+
+    def health_url(self, network: str) -> str:
+        return f"{self.urls[network]}/stats"
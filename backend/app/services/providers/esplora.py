@@ -0,0 +1,85 @@
+from typing import Any, Dict, Optional
+
+from app.dependencies import get_esplora_api_url, get_mempool_api_url
+from app.services.providers.base import (
+    FEES, MEMPOOL, MEMPOOL_BLOCKS, TX_STATUS, UTXOS, BlockchainProvider, confirmations_at, iso_timestamp
+)
+
+# Alvos de confirmação (em blocos) de /fee-estimates usados para cada prioridade
+_FEE_TARGETS = {"fastestFee": "1", "halfHourFee": "3", "hourFee": "6", "economyFee": "144"}
+
+class EsploraProvider(BlockchainProvider):
+    """
+    API Esplora (blockstream.info ou instância própria).
+
+    Usa `/address/{address}/utxo`, `/tx/{txid}/status`, `/fee-estimates` e `/mempool`.
+    """
+
+    name = "esplora"
+    operations = frozenset({UTXOS, TX_STATUS, FEES, MEMPOOL})
+
+    def __init__(self, urls: Optional[Dict[str, str]] = None):
+        super().__init__(urls or {network: get_esplora_api_url(network) for network in ("mainnet", "testnet")})
+
+    def url(self, operation: str, network: str, **params) -> str:
+        base = self.urls[network]
+        if operation == UTXOS:
+            return f"{base}/address/{params['address']}/utxo"
+        if operation == TX_STATUS:
+            return f"{base}/tx/{params['txid']}/status"
+        if operation == MEMPOOL:
+            return f"{base}/mempool"
+        return f"{base}/fee-estimates"
+
+    def parse(self, operation: str, data: Any, network: str, tip_height: Optional[int] = None,
+              **params) -> Any:
+        if operation == UTXOS:
+            if not isinstance(data, list):
+                raise ValueError("resposta de UTXOs inválida")
+            return data
+        if operation == TX_STATUS:
+            block_height = data.get("block_height") if data.get("confirmed") else None
+            return {
+                "confirmations": confirmations_at(block_height, tip_height),
+                "block_height": block_height,
+                "block_hash": data.get("block_hash"),
+                "timestamp": iso_timestamp(data.get("block_time"))
+            }
+        if operation == MEMPOOL:
+            histogram = [(float(rate), int(vsize)) for rate, vsize in data["fee_histogram"]]
+            return sorted(histogram, key=lambda bucket: bucket[0], reverse=True)
+        return {name: data[target] for name, target in _FEE_TARGETS.items()}
+
+    def health_url(self, network: str) -> str:
+        return f"{self.urls[network]}/blocks/tip/height"
+
+class MempoolProvider(EsploraProvider):
+    """
+    API do mempool.space: compatível com Esplora, com as taxas vindas de
+    `/v1/fees/recommended` e a projeção dos próximos blocos de
+    `/v1/fees/mempool-blocks`.
+    """
+
+    name = "mempool"
+    operations = EsploraProvider.operations | {MEMPOOL_BLOCKS}
+
+    def __init__(self, urls: Optional[Dict[str, str]] = None):
+        super().__init__(urls or {network: get_mempool_api_url(network) for network in ("mainnet", "testnet")})
+
+    def url(self, operation: str, network: str, **params) -> str:
+        if operation == FEES:
+            return f"{self.urls[network]}/v1/fees/recommended"
+        if operation == MEMPOOL_BLOCKS:
+            return f"{self.urls[network]}/v1/fees/mempool-blocks"
+        return super().url(operation, network, **params)
+
+    def parse(self, operation: str, data: Any, network: str, tip_height: Optional[int] = None,
+              **params) -> Any:
+        if operation == FEES:
+            return {name: data[name] for name in _FEE_TARGETS}
+        if operation == MEMPOOL_BLOCKS:
+            return [
+                {"vsize": int(block["blockVSize"]), "fee_range": sorted(float(rate) for rate in block["feeRange"])}
+                for block in data
+            ]
+        return super().parse(operation, data, network, tip_height, **params)
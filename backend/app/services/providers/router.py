@@ -0,0 +1,531 @@
+import asyncio
+import logging
+import random
+import threading
+import time
+from collections import Counter, deque
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+import httpx
+import requests
+
+from app.dependencies import get_settings
+from app.services import deadline as request_deadline
+from app.services.circuit_breaker import CircuitBreaker
+from app.services.rate_limiter import TokenBucket, retry_after_seconds
+from app.services.providers.base import BlockchainProvider, ProviderUnavailable
+from app.services.providers.blockchair import BlockchairProvider
+from app.services.providers.esplora import EsploraProvider, MempoolProvider
+from app.services.upstream import get_async_upstream_client, get_upstream_client
+
+logger = logging.getLogger(__name__)
+
+PROVIDER_CLASSES = {
+    EsploraProvider.name: EsploraProvider,
+    MempoolProvider.name: MempoolProvider,
+    BlockchairProvider.name: BlockchairProvider
+}
+
+# Erros de conteúdo (resposta fora do formato esperado) também levam ao próximo provedor
+_PARSE_ERRORS = (ValueError, KeyError, TypeError, IndexError)
+
+# Motivo registrado quando o limitador de taxa recusa a requisição
+_RATE_LIMITED = "limite de requisições atingido"
+
+# Latências guardadas por provedor para o cálculo do p95
+_LATENCY_SAMPLES = 100
+
+class _Skipped(Exception):
+    """Provedor não consultado (circuito aberto ou fila do limitador cheia)"""
+
+class _Transient(Exception):
+    """Falha temporária (rede, timeout, 5xx ou 429) que justifica uma nova tentativa"""
+
+def _p95(samples: deque) -> Optional[float]:
+    if len(samples) < 5:
+        return None
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+
+def _parse_rate_limits(value: str) -> Dict[str, float]:
+    """Converte 'provedor=taxa,...' em um dicionário"""
+    limits = {}
+    for item in value.split(","):
+        name, _, rate = item.partition("=")
+        if name.strip() and rate.strip():
+            limits[name.strip().lower()] = float(rate)
+    return limits
+
+def create_providers(names: Optional[str] = None) -> List[BlockchainProvider]:
+    """
+    Cria os provedores configurados
+
+    Args:
+        names: Nomes separados por vírgula, na ordem de preferência (padrão: `PROVIDERS`)
+
+    Returns:
+        List[BlockchainProvider]: Provedores habilitados
+    """
+    providers = []
+    for name in (names or get_settings().providers).split(","):
+        name = name.strip().lower()
+        if not name:
+            continue
+        if name not in PROVIDER_CLASSES:
+            logger.warning(f"[PROVIDER] Provedor desconhecido ignorado: {name}")
+            continue
+        providers.append(PROVIDER_CLASSES[name]())
+    return providers
+
+class ProviderStats:
+    """Latência e taxa de erro recentes (médias móveis exponenciais) de um provedor em uma rede"""
+
+    __slots__ = ("latency", "error_rate", "requests", "errors", "samples")
+
+    def __init__(self):
+        self.latency: Optional[float] = None
+        self.error_rate = 0.0
+        self.requests = 0
+        self.errors = 0
+        self.samples = deque(maxlen=_LATENCY_SAMPLES)
+
+class ProviderRouter:
+    """
+    Distribui as consultas entre os provedores de blockchain.
+
+    Cada consulta vai para o provedor saudável mais rápido da rede: os
+    provedores com taxa de erro recente abaixo de `error_threshold` são
+    ordenados pela latência média; os demais ficam no fim da fila, na
+    ordem configurada. Se um provedor falhar (erro de rede, 5xx, 429 ou
+    resposta inválida), a consulta segue para o próximo.
+
+    Cada host tem um `TokenBucket` que mantém o tráfego abaixo da cota do
+    provedor: sem fichas, a consulta espera brevemente na fila em vez de
+    receber um 429.
+
+    Cada host tem um `CircuitBreaker`: enquanto o circuito está aberto, o
+    provedor é pulado sem tocar a rede. Se todos os circuitos estiverem
+    abertos, `ProviderUnavailable` é levantada de imediato e o serviço
+    responde com o cache.
+
+    Toda consulta tem um orçamento de tempo (`budget`): cada requisição usa
+    como timeout no máximo o tempo restante. Se todos os provedores falharem
+    por erros temporários (rede, 5xx, 429), a rodada é repetida até
+    `max_retries` vezes após um backoff exponencial com jitter, enquanto
+    couber no orçamento. Um 429 pausa o host, e a nova rodada espera o
+    `Retry-After` na fila do limitador.
+
+    Com hedging habilitado, `get_async` envia a mesma consulta a um segundo
+    provedor (ou ao mesmo, por outra conexão) se a primeira não responder
+    dentro do p95 de latência do provedor; vale a primeira resposta e a
+    outra é cancelada.
+
+    Latência e taxa de erro são médias móveis exponenciais com peso `alpha`
+    para a amostra mais recente. Um provedor ainda não consultado é tentado
+    antes dos já medidos, para que todos passem a ter latência conhecida.
+    """
+
+    def __init__(self, providers: List[BlockchainProvider], alpha: Optional[float] = None,
+                 error_threshold: Optional[float] = None,
+                 is_available: Optional[Callable[[str, str], bool]] = None,
+                 rate_limits: Optional[Dict[str, float]] = None, hedge: Optional[bool] = None,
+                 max_retries: Optional[int] = None):
+        settings = get_settings()
+        self.providers = providers
+        self.alpha = alpha or settings.provider_latency_alpha
+        self.error_threshold = error_threshold or settings.provider_error_threshold
+        self.is_available = is_available
+        self.rate_limits = rate_limits if rate_limits is not None else _parse_rate_limits(settings.provider_rate_limits)
+        self.retry_after = settings.provider_retry_after_default
+        self.hedge = hedge if hedge is not None else settings.provider_hedge_enabled
+        self.hedge_delay = settings.provider_hedge_delay
+        self.hedge_min_delay = settings.provider_hedge_min_delay
+        self.max_retries = max_retries if max_retries is not None else settings.provider_max_retries
+        self.backoff = settings.provider_retry_backoff
+        self.backoff_max = settings.provider_retry_backoff_max
+        self.budget = settings.provider_call_budget
+        self._lock = threading.Lock()
+        self._stats: Dict[Tuple[str, str], ProviderStats] = {}
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._limiters: Dict[str, TokenBucket] = {}
+        self._counters = Counter()
+
+    def _get_stats(self, provider: str, network: str) -> ProviderStats:
+        stats = self._stats.get((provider, network))
+        if stats is None:
+            stats = self._stats[(provider, network)] = ProviderStats()
+        return stats
+
+    def breaker(self, provider: BlockchainProvider, network: str) -> CircuitBreaker:
+        """Circuit breaker do host que atende o provedor na rede"""
+        host = urlsplit(provider.urls[network]).netloc
+        with self._lock:
+            breaker = self._breakers.get(host)
+            if breaker is None:
+                breaker = self._breakers[host] = CircuitBreaker(host)
+            return breaker
+
+    def limiter(self, provider: BlockchainProvider, network: str) -> TokenBucket:
+        """Limitador de taxa do host que atende o provedor na rede"""
+        host = urlsplit(provider.urls[network]).netloc
+        with self._lock:
+            limiter = self._limiters.get(host)
+            if limiter is None:
+                limiter = self._limiters[host] = TokenBucket(host, rate=self.rate_limits.get(provider.name))
+            return limiter
+
+    def record(self, provider: str, network: str, ok: bool, latency: Optional[float] = None):
+        """Atualiza as médias de latência e de erro de um provedor"""
+        with self._lock:
+            stats = self._get_stats(provider, network)
+            stats.requests += 1
+            stats.error_rate += self.alpha * ((0.0 if ok else 1.0) - stats.error_rate)
+            if not ok:
+                stats.errors += 1
+            elif latency is not None:
+                stats.latency = latency if stats.latency is None else stats.latency + self.alpha * (latency - stats.latency)
+                stats.samples.append(latency)
+
+    def p95(self, provider: str, network: str) -> Optional[float]:
+        """Percentil 95 das latências recentes do provedor, ou None com menos de 5 medições"""
+        with self._lock:
+            return _p95(self._get_stats(provider, network).samples)
+
+    def supports(self, operation: str, network: str) -> bool:
+        """Verifica se algum provedor configurado atende a operação na rede"""
+        return any(provider.supports(operation, network) for provider in self.providers)
+
+    def candidates(self, operation: str, network: str) -> List[BlockchainProvider]:
+        """
+        Provedores que atendem a operação, do preferido para o último recurso
+
+        Args:
+            operation: Operação ('utxos', 'tx_status', 'fees', 'mempool' ou 'mempool_blocks')
+            network: Rede Bitcoin
+
+        Returns:
+            List[BlockchainProvider]: Provedores na ordem em que serão tentados
+        """
+        providers = [provider for provider in self.providers if provider.supports(operation, network)]
+        with self._lock:
+            stats = {provider.name: self._get_stats(provider.name, network) for provider in providers}
+
+        def score(indexed):
+            index, provider = indexed
+            provider_stats = stats[provider.name]
+            unhealthy = provider_stats.error_rate >= self.error_threshold or (
+                self.is_available is not None and not self.is_available(provider.name, network)
+            )
+            if unhealthy:
+                return (True, 0.0, index)
+            if provider_stats.latency is None:
+                # Nunca consultado: tentado primeiro; só com falhas: depois dos que já responderam
+                return (False, 0.0 if provider_stats.requests == 0 else float("inf"), index)
+            return (False, provider_stats.latency, index)
+
+        return [provider for _, provider in sorted(enumerate(providers), key=score)]
+
+    def _admit(self, provider: BlockchainProvider, network: str, deadline: float) -> float:
+        """
+        Verifica o circuit breaker e reserva uma ficha do limitador de taxa
+
+        Returns:
+            float: Segundos a esperar na fila antes da requisição
+
+        Raises:
+            _Skipped: Circuito aberto, fila cheia ou espera além do orçamento
+        """
+        if not self.breaker(provider, network).allow():
+            raise _Skipped("circuito aberto")
+        limiter = self.limiter(provider, network)
+        wait = limiter.reserve()
+        if wait is None:
+            raise _Skipped(_RATE_LIMITED)
+        if wait > 0 and time.monotonic() + wait >= deadline:
+            limiter.done_waiting()
+            raise _Skipped(_RATE_LIMITED)
+        return wait
+
+    @staticmethod
+    def _timeout(timeout: Tuple[float, float], deadline: float) -> Tuple[float, float]:
+        """Timeout (conexão, leitura) do cliente limitado ao tempo restante do orçamento"""
+        remaining = max(0.001, deadline - time.monotonic())
+        return min(timeout[0], remaining), min(timeout[1], remaining)
+
+    def _backoff(self, attempt: int, deadline: float) -> Optional[float]:
+        """Espera antes da próxima rodada (backoff exponencial com jitter), ou None se não couber no orçamento"""
+        if attempt >= self.max_retries:
+            return None
+        delay = random.uniform(0, min(self.backoff_max, self.backoff * 2 ** attempt))
+        if time.monotonic() + delay >= deadline:
+            return None
+        with self._lock:
+            self._counters["retries"] += 1
+        return delay
+
+    def _hedge_delay(self, provider: BlockchainProvider, network: str) -> float:
+        """Tempo sem resposta após o qual a consulta é duplicada (p95 do provedor, por padrão)"""
+        if self.hedge_delay is not None:
+            return self.hedge_delay
+        p95 = self.p95(provider.name, network)
+        return max(self.hedge_min_delay, p95 if p95 is not None else self.budget / 4)
+
+    def _handle(self, provider: BlockchainProvider, operation: str, network: str, response: Any,
+                started: float, tip_height: Optional[int], params: Dict[str, Any]) -> Any:
+        latency = time.monotonic() - started
+        status_code = response.status_code
+        breaker = self.breaker(provider, network)
+        if status_code >= 500:
+            breaker.record_failure()
+        else:
+            # O host respondeu: 429, 4xx e respostas inválidas não abrem o circuito
+            breaker.record_success()
+        if status_code == 429:
+            self.record(provider.name, network, False)
+            retry_after = retry_after_seconds(response.headers.get("Retry-After"))
+            self.limiter(provider, network).pause(retry_after if retry_after is not None else self.retry_after)
+            raise _Transient("HTTP 429")
+        if status_code >= 500:
+            self.record(provider.name, network, False)
+            raise _Transient(f"HTTP {status_code}")
+        if status_code >= 400:
+            # 4xx: o provedor respondeu (conta como saudável), mas não tem o dado
+            self.record(provider.name, network, True, latency)
+            raise ValueError(f"HTTP {status_code}")
+        try:
+            result = provider.parse(operation, response.json(), network, tip_height, **params)
+        except _PARSE_ERRORS:
+            self.record(provider.name, network, False)
+            raise
+        self.record(provider.name, network, True, latency)
+        return result
+
+    def _attempt(self, provider: BlockchainProvider, operation: str, network: str,
+                 tip_height: Optional[int], params: Dict[str, Any], deadline: float) -> Any:
+        """Uma requisição a um provedor, dentro do orçamento"""
+        wait = self._admit(provider, network, deadline)
+        if wait > 0:
+            try:
+                time.sleep(wait)
+            finally:
+                self.limiter(provider, network).done_waiting()
+        client = get_upstream_client()
+        started = time.monotonic()
+        try:
+            response = client.get(provider.url(operation, network, **params),
+                                  timeout=self._timeout(client.timeout, deadline))
+        except requests.exceptions.RequestException as e:
+            self.breaker(provider, network).record_failure()
+            self.record(provider.name, network, False)
+            raise _Transient(str(e))
+        return self._handle(provider, operation, network, response, started, tip_height, params)
+
+    async def _attempt_async(self, provider: BlockchainProvider, operation: str, network: str,
+                             tip_height: Optional[int], params: Dict[str, Any], deadline: float) -> Any:
+        """Versão assíncrona de `_attempt`"""
+        wait = self._admit(provider, network, deadline)
+        if wait > 0:
+            try:
+                await asyncio.sleep(wait)
+            finally:
+                self.limiter(provider, network).done_waiting()
+        client = get_async_upstream_client()
+        started = time.monotonic()
+        try:
+            response = await client.get(provider.url(operation, network, **params),
+                                        timeout=self._timeout(client.timeout, deadline))
+        except httpx.HTTPError as e:
+            self.breaker(provider, network).record_failure()
+            self.record(provider.name, network, False)
+            raise _Transient(str(e) or type(e).__name__)
+        return self._handle(provider, operation, network, response, started, tip_height, params)
+
+    def _deadline(self, operation: str, network: str, budget: Optional[float]) -> float:
+        """
+        Instante-limite da consulta: o orçamento dela, sem passar do prazo da requisição
+
+        Raises:
+            ProviderUnavailable: Se o prazo da requisição já tiver terminado
+        """
+        budget = request_deadline.limit(budget or self.budget)
+        if budget <= 0:
+            raise self._unavailable(operation, network, {})
+        return time.monotonic() + budget
+
+    def _unavailable(self, operation: str, network: str, errors: Dict[str, str],
+                     candidates: Optional[List[BlockchainProvider]] = None) -> ProviderUnavailable:
+        """
+        Erro final de uma consulta; se o prazo da requisição acabou, a resposta é marcada como parcial
+
+        Se algum candidato foi recusado pelo limitador de taxa, o erro leva em
+        `retry_after` o menor tempo até um deles liberar uma ficha.
+        """
+        if request_deadline.expired():
+            request_deadline.mark_exceeded()
+            errors.setdefault("deadline", "prazo da requisição esgotado")
+        waits = [
+            self.limiter(provider, network).retry_after()
+            for provider in candidates or [] if errors.get(provider.name) == _RATE_LIMITED
+        ]
+        return ProviderUnavailable(operation, network, errors, retry_after=min(waits) if waits else None)
+
+    def _failed(self, provider: BlockchainProvider, operation: str, network: str, error: Exception,
+                errors: Dict[str, str]) -> bool:
+        """Registra a falha de um provedor; retorna True se ela for temporária"""
+        errors[provider.name] = str(error)
+        logger.warning(f"[PROVIDER] {provider.name} falhou em {operation} ({network}): {error}")
+        return isinstance(error, _Transient)
+
+    def get(self, operation: str, network: str, tip_height: Optional[int] = None,
+            budget: Optional[float] = None, **params) -> Any:
+        """
+        Executa uma consulta no melhor provedor disponível, com failover e novas tentativas
+
+        Args:
+            operation: Operação ('utxos', 'tx_status', 'fees', 'mempool' ou 'mempool_blocks')
+            network: Rede Bitcoin ('mainnet' ou 'testnet')
+            tip_height: Altura atual do topo, usada para contar confirmações
+            budget: Tempo máximo da consulta em segundos (padrão: `PROVIDER_CALL_BUDGET`),
+                limitado ao que resta do prazo da requisição (ver `app.services.deadline`)
+            **params: Parâmetros da operação (address, txid)
+
+        Returns:
+            Any: Dados no formato comum (ver `BlockchainProvider`)
+
+        Raises:
+            ProviderUnavailable: Se nenhum provedor responder dentro do orçamento
+        """
+        deadline = self._deadline(operation, network, budget)
+        errors: Dict[str, str] = {}
+        attempt = 0
+        while True:
+            transient = False
+            candidates = self.candidates(operation, network)
+            for provider in candidates:
+                if time.monotonic() >= deadline:
+                    errors.setdefault(provider.name, "orçamento de tempo esgotado")
+                    break
+                try:
+                    return self._attempt(provider, operation, network, tip_height, params, deadline)
+                except (_Skipped, _Transient) + _PARSE_ERRORS as e:
+                    transient = self._failed(provider, operation, network, e, errors) or transient
+            delay = self._backoff(attempt, deadline) if transient else None
+            if delay is None:
+                raise self._unavailable(operation, network, errors, candidates)
+            time.sleep(delay)
+            attempt += 1
+
+    async def get_async(self, operation: str, network: str, tip_height: Optional[int] = None,
+                        budget: Optional[float] = None, **params) -> Any:
+        """Versão assíncrona de `get`, com hedging opcional (ver `_round_async`)"""
+        deadline = self._deadline(operation, network, budget)
+        errors: Dict[str, str] = {}
+        attempt = 0
+        while True:
+            candidates = self.candidates(operation, network)
+            found, result, transient = await self._round_async(
+                candidates, operation, network, tip_height, params, deadline, errors
+            )
+            if found:
+                return result
+            delay = self._backoff(attempt, deadline) if transient else None
+            if delay is None:
+                raise self._unavailable(operation, network, errors, candidates)
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def _round_async(self, candidates: List[BlockchainProvider], operation: str, network: str,
+                           tip_height: Optional[int], params: Dict[str, Any], deadline: float,
+                           errors: Dict[str, str]) -> Tuple[bool, Any, bool]:
+        """
+        Uma rodada pelos provedores candidatos
+
+        Uma falha leva imediatamente ao próximo candidato. Com hedging, se a
+        primeira requisição não responder dentro do `_hedge_delay`, a mesma
+        consulta é enviada ao próximo candidato (ou de novo ao mesmo provedor,
+        por outra conexão); vale a primeira resposta e as demais são canceladas.
+
+        Returns:
+            Tuple: (encontrado, resultado, houve falha temporária)
+        """
+        queue = list(candidates)
+        running: Dict[asyncio.Task, Tuple[BlockchainProvider, float, bool]] = {}
+        hedged = False
+        transient = False
+
+        def launch(provider: BlockchainProvider, hedge: bool = False):
+            task = asyncio.ensure_future(self._attempt_async(provider, operation, network, tip_height, params, deadline))
+            running[task] = (provider, time.monotonic(), hedge)
+
+        try:
+            while queue or running:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    for provider, _, _ in running.values():
+                        errors[provider.name] = "orçamento de tempo esgotado"
+                    break
+                if not running:
+                    launch(queue.pop(0))
+                timeout = remaining
+                if self.hedge and not hedged:
+                    primary, started, _ = next(iter(running.values()))
+                    timeout = min(timeout, max(0.0, started + self._hedge_delay(primary, network) - time.monotonic()))
+                done, _ = await asyncio.wait(list(running), timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    if self.hedge and not hedged and time.monotonic() < deadline:
+                        hedged = True
+                        with self._lock:
+                            self._counters["hedged"] += 1
+                        launch(queue.pop(0) if queue else primary, hedge=True)
+                    continue
+                for task in done:
+                    provider, _, hedge = running.pop(task)
+                    try:
+                        result = task.result()
+                    except (_Skipped, _Transient) + _PARSE_ERRORS as e:
+                        transient = self._failed(provider, operation, network, e, errors) or transient
+                        continue
+                    if hedge:
+                        with self._lock:
+                            self._counters["hedge_wins"] += 1
+                    # O tempo já gasto pelas requisições perdedoras entra como latência mínima
+                    now = time.monotonic()
+                    for loser, started, _ in running.values():
+                        self.record(loser.name, network, True, now - started)
+                    return True, result, transient
+            return False, None, transient
+        finally:
+            for task in running:
+                task.cancel()
+
+    def request_stats(self) -> Dict[str, int]:
+        """Retorna quantas rodadas foram repetidas e quantas consultas foram duplicadas (hedging)"""
+        with self._lock:
+            return {name: self._counters[name] for name in ("retries", "hedged", "hedge_wins")}
+
+    def limiter_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Retorna a fila e os contadores do limitador de taxa de cada host"""
+        with self._lock:
+            limiters = dict(self._limiters)
+        return {host: limiter.stats() for host, limiter in limiters.items()}
+
+    def circuit_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Retorna o estado do circuit breaker de cada host"""
+        with self._lock:
+            breakers = dict(self._breakers)
+        return {host: breaker.stats() for host, breaker in breakers.items()}
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Retorna latência média, p95 e taxa de erro de cada provedor, indexados por 'provedor/rede'"""
+        with self._lock:
+            return {
+                f"{provider}/{network}": {
+                    "latency_ms": round(stats.latency * 1000, 1) if stats.latency is not None else None,
+                    "p95_ms": round(_p95(stats.samples) * 1000, 1) if len(stats.samples) >= 5 else None,
+                    "error_rate": round(stats.error_rate, 3),
+                    "requests": stats.requests,
+                    "errors": stats.errors
+                }
+                for (provider, network), stats in self._stats.items()
+            }
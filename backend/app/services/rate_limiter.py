@@ -0,0 +1,138 @@
+import logging
+import threading
+import time
+from collections import Counter
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Optional
+
+from app.dependencies import get_settings
+
+logger = logging.getLogger(__name__)
+
+def retry_after_seconds(value: Optional[str]) -> Optional[float]:
+    """
+    Interpreta o cabeçalho `Retry-After` (segundos ou data HTTP)
+
+    Args:
+        value: Valor do cabeçalho
+
+    Returns:
+        float: Segundos a aguardar ou None se ausente/inválido
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+class TokenBucket:
+    """
+    Limitador de taxa (token bucket) das requisições a um provedor.
+
+    O balde recebe `rate` fichas por segundo, até `burst`. Cada requisição
+    consome uma ficha; sem fichas, ela reserva a próxima e espera a sua vez,
+    desde que a espera não passe de `max_wait` segundos e não haja mais de
+    `max_queue` requisições já esperando. Caso contrário é recusada e a
+    consulta segue para outro provedor ou para o cache.
+
+    Um 429 com `Retry-After` pausa o balde inteiro pelo tempo indicado.
+    Com `rate` igual a 0 não há limite.
+    """
+
+    def __init__(self, name: str, rate: Optional[float] = None, burst: Optional[int] = None,
+                 max_wait: Optional[float] = None, max_queue: Optional[int] = None):
+        settings = get_settings()
+        self.name = name
+        self.rate = rate if rate is not None else settings.provider_rate_limit
+        self.burst = max(1, burst or settings.provider_rate_burst)
+        self.max_wait = max_wait if max_wait is not None else settings.provider_queue_max_wait
+        self.max_queue = max_queue if max_queue is not None else settings.provider_queue_size
+        self._lock = threading.Lock()
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._waiting = 0
+        self._stats = Counter()
+
+    def _refill(self, now: float):
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self) -> Optional[float]:
+        """
+        Reserva uma ficha
+
+        Returns:
+            float: Segundos que o chamador deve esperar antes da requisição
+                (0 se puder seguir já), ou None se a fila estiver cheia ou a
+                espera passar de `max_wait`. Uma espera > 0 deve terminar com
+                `done_waiting()`.
+        """
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            wait = max(0.0, -(self._tokens - 1) / self.rate, self._paused_until - now)
+            if wait > 0 and (wait > self.max_wait or self._waiting >= self.max_queue):
+                self._stats["rejected"] += 1
+                return None
+            self._tokens -= 1
+            if wait > 0:
+                self._waiting += 1
+                self._stats["queued"] += 1
+            self._stats["admitted"] += 1
+            return wait
+
+    def retry_after(self) -> float:
+        """Segundos até a próxima ficha livre, contando as já reservadas pela fila"""
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            return max(0.0, (1 - self._tokens) / self.rate, self._paused_until - now)
+
+    def done_waiting(self):
+        """Libera a vaga na fila de uma requisição que terminou de esperar"""
+        with self._lock:
+            self._waiting = max(0, self._waiting - 1)
+
+    def acquire(self) -> bool:
+        """Reserva uma ficha e espera a sua vez (bloqueante). Retorna False se recusada"""
+        wait = self.reserve()
+        if wait is None:
+            return False
+        if wait > 0:
+            try:
+                time.sleep(wait)
+            finally:
+                self.done_waiting()
+        return True
+
+    def pause(self, seconds: float):
+        """Suspende as requisições por `seconds` segundos (resposta 429 com Retry-After)"""
+        with self._lock:
+            now = time.monotonic()
+            self._paused_until = max(self._paused_until, now + seconds)
+            self._refill(now)
+            self._tokens = min(self._tokens, 0.0)
+            self._stats["throttled"] += 1
+        logger.warning(f"[RATE_LIMIT] {self.name} pediu para aguardar {seconds:.1f}s")
+
+    def stats(self) -> Dict[str, Any]:
+        """Retorna contadores e o tamanho atual da fila"""
+        with self._lock:
+            return {
+                "rate": self.rate,
+                "waiting": self._waiting,
+                "admitted": self._stats["admitted"],
+                "queued": self._stats["queued"],
+                "rejected": self._stats["rejected"],
+                "throttled": self._stats["throttled"]
+            }
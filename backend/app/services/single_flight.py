@@ -0,0 +1,133 @@
+import asyncio
+import logging
+import threading
+from collections import Counter
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+logger = logging.getLogger(__name__)
+
+class _Call:
+    """Chamada em andamento compartilhada pelos chamadores da mesma chave"""
+
+    __slots__ = ("event", "result", "error")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+class SingleFlight:
+    """
+    Agrupa chamadas concorrentes idênticas em uma única execução.
+
+    Enquanto uma chamada para uma chave está em andamento, as demais
+    threads que pedirem a mesma chave esperam e recebem o mesmo resultado
+    (ou a mesma exceção), em vez de repetir a consulta ao upstream.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self._stats = Counter()
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """
+        Executa `fn` uma única vez por chave entre chamadores concorrentes
+
+        Args:
+            key: Identificador da chamada, ex: ("balance", "testnet", endereço)
+            fn: Função sem argumentos que realiza a consulta
+
+        Returns:
+            O resultado de `fn`, compartilhado entre todos os chamadores
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                self._stats["coalesced"] += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                self._stats["executed"] += 1
+                leader = True
+
+        if not leader:
+            logger.debug(f"[SINGLE_FLIGHT] Aguardando consulta em andamento para {key}")
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+
+    def stats(self) -> Dict[str, int]:
+        """Retorna quantas chamadas foram executadas e quantas foram agrupadas"""
+        with self._lock:
+            return {
+                "executed": self._stats["executed"],
+                "coalesced": self._stats["coalesced"],
+                "in_flight": len(self._calls)
+            }
+
+class AsyncSingleFlight:
+    """
+    Versão de `SingleFlight` para corrotinas no event loop.
+
+    As chamadas concorrentes da mesma chave aguardam o mesmo future, sem
+    ocupar threads. Deve ser usada a partir de um único event loop.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, asyncio.Future] = {}
+        self._stats = Counter()
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Executa `fn` uma única vez por chave entre corrotinas concorrentes
+
+        Args:
+            key: Identificador da chamada, ex: ("balance", "testnet", endereço)
+            fn: Função sem argumentos que retorna a corrotina da consulta
+
+        Returns:
+            O resultado de `fn`, compartilhado entre todos os chamadores
+        """
+        call = self._calls.get(key)
+        if call is not None:
+            self._stats["coalesced"] += 1
+            logger.debug(f"[SINGLE_FLIGHT] Aguardando consulta em andamento para {key}")
+            # shield: o cancelamento de um chamador não cancela a consulta dos demais
+            return await asyncio.shield(call)
+
+        call = asyncio.get_running_loop().create_future()
+        self._calls[key] = call
+        self._stats["executed"] += 1
+        try:
+            result = await fn()
+            call.set_result(result)
+            return result
+        except BaseException as e:
+            call.set_exception(e)
+            # Marca a exceção como consumida caso ninguém esteja aguardando
+            call.exception()
+            raise
+        finally:
+            del self._calls[key]
+
+    def stats(self) -> Dict[str, int]:
+        """Retorna quantas chamadas foram executadas e quantas foram agrupadas"""
+        return {
+            "executed": self._stats["executed"],
+            "coalesced": self._stats["coalesced"],
+            "in_flight": len(self._calls)
+        }
@@ -0,0 +1,135 @@
+import logging
+import threading
+import time
+from typing import Callable, Dict, Optional, Set, Tuple
+
+import requests
+
+from app.dependencies import get_esplora_api_url, get_settings
+from app.services.upstream import get_upstream_client
+
+logger = logging.getLogger(__name__)
+
+class TipTracker:
+    """
+    Acompanha a altura do topo da cadeia de cada rede.
+
+    Uma thread consulta periodicamente `/blocks/tip/height` da API Esplora das
+    redes já usadas pela aplicação. O cache usa essa altura para manter dados
+    confirmados válidos entre blocos e revalidá-los quando o topo muda.
+
+    Uma altura não atualizada há mais de `stale_after` segundos é tratada
+    como desconhecida, e o cache volta a usar apenas o TTL.
+    """
+
+    def __init__(self, url_for: Callable[[str], str] = get_esplora_api_url,
+                 poll_interval: Optional[float] = None, stale_after: Optional[float] = None,
+                 timeout: Optional[float] = None):
+        settings = get_settings()
+        self.url_for = url_for
+        self.poll_interval = poll_interval or settings.tip_poll_interval
+        self.stale_after = stale_after or settings.tip_stale_after or self.poll_interval * 4
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._tips: Dict[str, Tuple[int, float]] = {}
+        self._networks: Set[str] = set()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def refresh(self, network: str) -> Optional[int]:
+        """
+        Consulta o topo da cadeia no upstream e atualiza a altura conhecida
+
+        Args:
+            network: Rede Bitcoin ('mainnet' ou 'testnet')
+
+        Returns:
+            int: Altura atual ou None se a consulta falhar
+        """
+        with self._lock:
+            self._networks.add(network)
+        try:
+            response = get_upstream_client().get(f"{self.url_for(network)}/blocks/tip/height", timeout=self.timeout)
+            response.raise_for_status()
+            height = int(response.text.strip())
+        except (requests.exceptions.RequestException, ValueError) as e:
+            logger.warning(f"[TIP] Falha ao consultar topo da cadeia ({network}): {str(e)}")
+            return None
+        self.record(network, height)
+        return height
+
+    def record(self, network: str, height: int):
+        """
+        Registra uma altura do topo obtida por outro componente (ex: monitor de conectividade)
+
+        Args:
+            network: Rede Bitcoin ('mainnet' ou 'testnet')
+            height: Altura do topo da cadeia
+        """
+        with self._lock:
+            self._networks.add(network)
+            previous = self._tips.get(network)
+            self._tips[network] = (height, time.time())
+        if previous is None or previous[0] != height:
+            logger.info(f"[TIP] Novo topo da cadeia em {network}: {height}")
+
+    def height(self, network: str) -> Optional[int]:
+        """
+        Retorna a última altura conhecida do topo, sem consultar o upstream
+
+        A primeira chamada para uma rede a inclui no polling.
+
+        Args:
+            network: Rede Bitcoin ('mainnet' ou 'testnet')
+
+        Returns:
+            int: Altura do topo ou None se desconhecida ou desatualizada
+        """
+        with self._lock:
+            if network not in self._networks:
+                self._networks.add(network)
+                self._wake.set()
+            tip = self._tips.get(network)
+        if tip is None or time.time() - tip[1] > self.stale_after:
+            return None
+        return tip[0]
+
+    def _poll_loop(self):
+        while not self._stop.is_set():
+            now = time.time()
+            with self._lock:
+                # Redes cuja altura já foi registrada neste intervalo não são consultadas de novo
+                networks = [
+                    network for network in self._networks
+                    if network not in self._tips or now - self._tips[network][1] >= self.poll_interval
+                ]
+            for network in networks:
+                self.refresh(network)
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+
+    def start(self):
+        """Inicia a thread de polling do topo da cadeia"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._poll_loop, name="tip-tracker", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Interrompe a thread de polling"""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Retorna a altura e a idade da última consulta de cada rede"""
+        now = time.time()
+        with self._lock:
+            return {
+                network: {"height": height, "age": round(now - checked_at, 1)}
+                for network, (height, checked_at) in self._tips.items()
+            }
@@ -1,6 +1,7 @@
 from abc import ABC, abstractmethod
 from bitcoinlib.transactions import Transaction, Input, Output
 from app.models.utxo_models import TransactionRequest, TransactionResponse
+from app.services.tx_size import fee_for_vsize, transaction_shape, transaction_vsize
 import logging
 
 logger = logging.getLogger(__name__)
@@ -38,18 +39,24 @@ class BitcoinLibBuilder(TransactionBuilder):
                 )
                 tx_outputs.append(tx_output)
             
-            fee = request.fee_rate or 1.0
+            # Taxa pelo tamanho virtual da transação já assinada, conforme os tipos de input e output
+            fee_rate = request.fee_rate or 1.0
+            vsize = transaction_vsize(*transaction_shape(request.inputs, request.outputs))
+            fee = fee_for_vsize(vsize, fee_rate)
             tx = Transaction(
                 inputs=tx_inputs,
                 outputs=tx_outputs,
                 network=network,
                 fee=fee,
-                fee_per_kb=int(fee * 1000)  
+                fee_per_kb=int(fee_rate * 1000)  
             )
             
-            calculated_fee = 0
+            calculated_fee = fee
             if tx.input_total and tx.output_total:
                 calculated_fee = tx.input_total - tx.output_total
+                if calculated_fee < fee:
+                    logger.warning(f"Taxa implícita ({calculated_fee} sat) abaixo da estimada para "
+                                   f"{vsize} vB a {fee_rate} sat/vB ({fee} sat)")
             
             response = TransactionResponse(
                 raw_transaction=tx.raw_hex(),
@@ -60,7 +67,8 @@ class BitcoinLibBuilder(TransactionBuilder):
             logger.debug("Transação construída com sucesso", extra={
                 "txid": tx.txid,
                 "network": network,
-                "fee": calculated_fee
+                "fee": calculated_fee,
+                "vsize": vsize
             })
             
             return response
@@ -0,0 +1,227 @@
+import math
+from collections import Counter
+from typing import Any, Dict, Iterable, Mapping, Optional, Tuple
+
+# Cada tipo de input como (bytes fora da testemunha, bytes da testemunha), já
+# assinado: assinaturas ECDSA com 72 bytes (DER com low-S e sighash, o maior
+# caso padrão) e Schnorr com 64 bytes (SIGHASH_DEFAULT, gasto pela chave)
+#   outpoint (36) + tamanho do scriptSig (1) + scriptSig + sequence (4)
+INPUT_SIZES: Dict[str, tuple] = {
+    "p2pkh": (36 + 1 + 107 + 4, 0),           # scriptSig: <assinatura> <chave pública>
+    "p2sh-p2wpkh": (36 + 1 + 23 + 4, 108),    # scriptSig: <0 <hash160>>; testemunha como p2wpkh
+    "p2wpkh": (36 + 1 + 4, 108),              # testemunha: 2 itens, assinatura (1+72) e chave (1+33)
+    "p2tr": (36 + 1 + 4, 66),                 # testemunha: 1 item, assinatura Schnorr (1+64)
+}
+
+# Cada tipo de output: valor (8) + tamanho do script (1) + scriptPubKey
+OUTPUT_SIZES: Dict[str, int] = {
+    "p2pkh": 8 + 1 + 25,
+    "p2sh": 8 + 1 + 23,
+    "p2wpkh": 8 + 1 + 22,
+    "p2wsh": 8 + 1 + 34,
+    "p2tr": 8 + 1 + 34,
+}
+# Output de um endereço p2sh-p2wpkh é um p2sh comum
+OUTPUT_SIZES["p2sh-p2wpkh"] = OUTPUT_SIZES["p2sh"]
+
+# Fator de desconto da testemunha: bytes fora dela pesam 4, os da testemunha 1
+WITNESS_SCALE_FACTOR = 4
+
+def _varint_size(value: int) -> int:
+    """Tamanho em bytes de um inteiro no formato CompactSize"""
+    if value < 0xfd:
+        return 1
+    if value <= 0xffff:
+        return 3
+    if value <= 0xffffffff:
+        return 5
+    return 9
+
+def transaction_weight(inputs: Mapping[str, int], outputs: Mapping[str, int]) -> int:
+    """
+    Peso (weight units) de uma transação assinada a partir do número de inputs e outputs de cada tipo
+
+    Conta a versão e o locktime (8 bytes), os contadores de inputs e outputs e,
+    se houver algum input segwit, o marcador e a flag (2) e o contador vazio
+    de testemunha (1) de cada input legado.
+
+    Args:
+        inputs: Quantidade de inputs por tipo ('p2pkh', 'p2sh-p2wpkh', 'p2wpkh', 'p2tr')
+        outputs: Quantidade de outputs por tipo ('p2pkh', 'p2sh', 'p2wpkh', 'p2wsh', 'p2tr')
+
+    Returns:
+        int: Peso em weight units
+
+    Raises:
+        ValueError: Se um tipo não for suportado ou uma quantidade for negativa
+    """
+    input_count = output_count = 0
+    base = witness = legacy_inputs = 0
+    for script_type, count in inputs.items():
+        sizes = INPUT_SIZES.get(script_type)
+        if sizes is None:
+            raise ValueError(f"Tipo de input não suportado: {script_type}")
+        if count < 0:
+            raise ValueError(f"Quantidade inválida de inputs {script_type}: {count}")
+        input_count += count
+        base += sizes[0] * count
+        witness += sizes[1] * count
+        if not sizes[1]:
+            legacy_inputs += count
+    for script_type, count in outputs.items():
+        size = OUTPUT_SIZES.get(script_type)
+        if size is None:
+            raise ValueError(f"Tipo de output não suportado: {script_type}")
+        if count < 0:
+            raise ValueError(f"Quantidade inválida de outputs {script_type}: {count}")
+        output_count += count
+        base += size * count
+    base += 8 + _varint_size(input_count) + _varint_size(output_count)
+    if witness:
+        witness += 2 + legacy_inputs
+    return base * WITNESS_SCALE_FACTOR + witness
+
+def weight_to_vsize(weight: int) -> int:
+    """Tamanho virtual (vB) correspondente a um peso, arredondado para cima"""
+    return -(-weight // WITNESS_SCALE_FACTOR)
+
+def transaction_vsize(inputs: Mapping[str, int], outputs: Mapping[str, int]) -> int:
+    """Tamanho virtual (vB) de uma transação assinada (ver `transaction_weight`)"""
+    return weight_to_vsize(transaction_weight(inputs, outputs))
+
+def fee_for_vsize(vsize: int, fee_rate: float) -> int:
+    """Taxa em satoshis para um tamanho virtual e uma taxa em sat/vB, arredondada para cima"""
+    return math.ceil(vsize * fee_rate)
+
+def raw_weight(raw: bytes) -> int:
+    """
+    Peso (weight units) de uma transação serializada
+
+    Separa a testemunha (formato BIP144) do restante sem decodificar scripts.
+
+    Args:
+        raw: Transação serializada
+
+    Returns:
+        int: Peso em weight units
+
+    Raises:
+        ValueError: Se a serialização estiver truncada
+    """
+    def varint(offset: int) -> tuple:
+        if offset >= len(raw):
+            raise ValueError("Transação truncada")
+        prefix = raw[offset]
+        if prefix < 0xfd:
+            return prefix, offset + 1
+        size = {0xfd: 2, 0xfe: 4, 0xff: 8}[prefix]
+        return int.from_bytes(raw[offset + 1:offset + 1 + size], "little"), offset + 1 + size
+
+    # Sem marcador (0x00) e flag (0x01) após a versão, não há testemunha
+    if len(raw) < 6 or raw[4] != 0 or raw[5] != 1:
+        return len(raw) * WITNESS_SCALE_FACTOR
+    offset = 6
+    inputs, offset = varint(offset)
+    for _ in range(inputs):
+        script_size, offset = varint(offset + 36)
+        offset += script_size + 4
+    outputs, offset = varint(offset)
+    for _ in range(outputs):
+        script_size, offset = varint(offset + 8)
+        offset += script_size
+    witness_start = offset
+    for _ in range(inputs):
+        items, offset = varint(offset)
+        for _ in range(items):
+            item_size, offset = varint(offset)
+            offset += item_size
+    if offset + 4 != len(raw):
+        raise ValueError("Transação truncada")
+    witness_size = 2 + offset - witness_start
+    return (len(raw) - witness_size) * WITNESS_SCALE_FACTOR + witness_size
+
+def address_type(address: str) -> Optional[str]:
+    """
+    Tipo de script de um endereço, pelo formato
+
+    Args:
+        address: Endereço Bitcoin (mainnet, testnet ou regtest)
+
+    Returns:
+        str: 'p2pkh', 'p2sh', 'p2wpkh', 'p2wsh' ou 'p2tr', ou None se o formato não for reconhecido
+    """
+    lower = address.lower()
+    for hrp in ("bcrt1", "bc1", "tb1"):
+        if lower.startswith(hrp):
+            version, data_length = lower[len(hrp):len(hrp) + 1], len(lower) - len(hrp)
+            # Parte de dados: versão (1) + programa + checksum (6), em caracteres bech32
+            if version == "q":
+                return {39: "p2wpkh", 59: "p2wsh"}.get(data_length)
+            if version == "p" and data_length == 59:
+                return "p2tr"
+            return None
+    if address[:1] in ("1", "m", "n"):
+        return "p2pkh"
+    if address[:1] in ("3", "2"):
+        return "p2sh"
+    return None
+
+def script_type(script: str) -> Optional[str]:
+    """
+    Tipo de um scriptPubKey em hexadecimal
+
+    Returns:
+        str: 'p2pkh', 'p2sh', 'p2wpkh', 'p2wsh' ou 'p2tr', ou None se o padrão não for reconhecido
+    """
+    script = script.lower()
+    if len(script) == 50 and script.startswith("76a914") and script.endswith("88ac"):
+        return "p2pkh"
+    if len(script) == 46 and script.startswith("a914") and script.endswith("87"):
+        return "p2sh"
+    if len(script) == 44 and script.startswith("0014"):
+        return "p2wpkh"
+    if len(script) == 68 and script.startswith("0020"):
+        return "p2wsh"
+    if len(script) == 68 and script.startswith("5120"):
+        return "p2tr"
+    return None
+
+def input_type(address: Optional[str] = None, script: Optional[str] = None) -> str:
+    """
+    Tipo de input para o cálculo do tamanho, a partir do script ou do endereço do UTXO
+
+    Um UTXO p2sh é tratado como p2sh-p2wpkh, o formato p2sh das chaves da
+    carteira. Sem tipo reconhecido (ou p2wsh, cujo tamanho depende do
+    script), vale p2pkh, o maior input de assinatura única.
+
+    Args:
+        address: Endereço do UTXO
+        script: scriptPubKey do UTXO em hexadecimal
+
+    Returns:
+        str: Tipo em `INPUT_SIZES`
+    """
+    kind = (script_type(script) if script else None) or (address_type(address) if address else None)
+    if kind == "p2sh":
+        return "p2sh-p2wpkh"
+    return kind if kind in INPUT_SIZES else "p2pkh"
+
+def output_type(address: str) -> str:
+    """Tipo de output de um endereço; sem formato reconhecido, vale p2tr (o maior output padrão)"""
+    return address_type(address) or "p2tr"
+
+def transaction_shape(inputs: Iterable[Any], outputs: Iterable[Any]) -> Tuple[Dict[str, int], Dict[str, int]]:
+    """
+    Quantidade de inputs e outputs por tipo de uma transação a construir
+
+    Args:
+        inputs: Inputs com `address` e `script` (ver `app.models.utxo_models.Input`)
+        outputs: Outputs com `address`
+
+    Returns:
+        Tuple: (inputs por tipo, outputs por tipo), no formato de `transaction_weight`
+    """
+    return (
+        dict(Counter(input_type(getattr(i, "address", None), getattr(i, "script", None)) for i in inputs)),
+        dict(Counter(output_type(o.address) for o in outputs))
+    )
@@ -1,8 +1,10 @@
-import requests
+import asyncio
 import logging
 from typing import Dict, Any, Optional
 from app.models.transaction_status_models import TransactionStatusModel
-from app.dependencies import get_bitcoinlib_network, get_blockchain_api_url
+from app.dependencies import get_bitcoinlib_network
+from app.services.blockchain_service import blockchain_cache, provider_router, tip_tracker
+from app.services.providers import TX_STATUS, ProviderUnavailable
 import re
 
 logger = logging.getLogger(__name__)
@@ -33,49 +35,98 @@ def get_transaction_status(txid: str, network: str = "testnet") -> TransactionSt
     try:
         logger.info(f"[TX_STATUS] Consultando status da transação {txid}")
         
-        # Verificar se é uma transação de teste
-        if _is_test_transaction(txid):
-            logger.info(f"[TX_STATUS] Detectada transação de teste: {txid}, retornando dados simulados")
-            return _get_simulated_status(txid, network)
+        local_status = _local_status(txid, network)
+        if local_status is not None:
+            return local_status
         
         # Implementação real
-        api_url = get_blockchain_api_url(network)
-        response = requests.get(f"{api_url}/transaction/{txid}")
+        tx_data = provider_router.get(TX_STATUS, network, tip_height=tip_tracker.height(network), txid=txid)
+        return _store_status(txid, network, tx_data)
         
-        if response.status_code != 200:
-            logger.error(f"[TX_STATUS] Erro ao consultar transação: {response.text}")
-            # Tentar fallback para transação simulada
-            return _fallback_status(txid, network, f"Transação não encontrada: {txid}")
-            
-        tx_data = response.json()
-        
-        confirmations = tx_data.get("confirmations", 0)
+    except ProviderUnavailable as e:
+        logger.error(f"[TX_STATUS] Erro ao consultar transação: {str(e)}")
+        # Tentar fallback para status expirado em cache ou transação simulada
+        return _cached_status(txid, network) or _fallback_status(txid, network, f"Transação não encontrada: {txid}")
+    except Exception as e:
+        logger.error(f"[TX_STATUS] Erro ao consultar status da transação: {str(e)}")
+        return _fallback_status(txid, network, f"Erro ao consultar status da transação: {str(e)}")
+
+async def get_transaction_status_async(txid: str, network: str = "testnet") -> TransactionStatusModel:
+    """Versão assíncrona de `get_transaction_status`, para rotas `async def`"""
+    try:
+        logger.info(f"[TX_STATUS] Consultando status da transação {txid}")
         
-        if confirmations >= 6:
-            status = "confirmed"
-        elif confirmations > 0:
-            status = "confirming"
+        # Fora da camada em memória, o cache lê e grava no disco: isso roda em uma thread
+        cache_key = f"tx_status_{network}_{txid}"
+        if blockchain_cache.in_memory(cache_key):
+            local_status = _local_status(txid, network)
         else:
-            status = "pending"
-            
-        explorer_base = "https://blockstream.info/"
-        if network == "testnet":
-            explorer_base += "testnet/"
+            local_status = await asyncio.to_thread(_local_status, txid, network)
+        if local_status is not None:
+            return local_status
         
-        return TransactionStatusModel(
-            txid=txid,
-            status=status,
-            confirmations=confirmations,
-            block_height=tx_data.get("block_height"),
-            block_hash=tx_data.get("block_hash"),
-            timestamp=tx_data.get("timestamp"),
-            explorer_url=f"{explorer_base}tx/{txid}"
-        )
+        tx_data = await provider_router.get_async(TX_STATUS, network, tip_height=tip_tracker.height(network), txid=txid)
+        return await asyncio.to_thread(_store_status, txid, network, tx_data)
         
+    except ProviderUnavailable as e:
+        logger.error(f"[TX_STATUS] Erro ao consultar transação: {str(e)}")
+        cached_status = await asyncio.to_thread(_cached_status, txid, network)
+        return cached_status or _fallback_status(txid, network, f"Transação não encontrada: {txid}")
     except Exception as e:
         logger.error(f"[TX_STATUS] Erro ao consultar status da transação: {str(e)}")
         return _fallback_status(txid, network, f"Erro ao consultar status da transação: {str(e)}")
 
+def _local_status(txid: str, network: str) -> Optional[TransactionStatusModel]:
+    """
+    Retorna o status sem consultar a API: transações de teste e status em cache.
+    """
+    # Verificar se é uma transação de teste
+    if _is_test_transaction(txid):
+        logger.info(f"[TX_STATUS] Detectada transação de teste: {txid}, retornando dados simulados")
+        return _get_simulated_status(txid, network)
+    
+    # Status consultado recentemente (TTL de `cache_ttl_tx_status`)
+    cached = blockchain_cache.get(f"tx_status_{network}_{txid}")
+    if cached:
+        logger.info(f"[TX_STATUS] Retornando status do cache para {txid}")
+        return TransactionStatusModel(**cached)
+    return None
+
+def _cached_status(txid: str, network: str) -> Optional[TransactionStatusModel]:
+    """Status em cache mesmo que expirado, usado quando nenhum provedor responde"""
+    cached = blockchain_cache.get(f"tx_status_{network}_{txid}", ignore_ttl=True)
+    if cached:
+        logger.warning(f"[TX_STATUS] Retornando status do cache expirado para {txid}")
+        return TransactionStatusModel(**cached)
+    return None
+
+def _store_status(txid: str, network: str, tx_data: Dict[str, Any]) -> TransactionStatusModel:
+    """Converte o status retornado pelo provedor em `TransactionStatusModel` e salva no cache"""
+    confirmations = tx_data.get("confirmations", 0)
+    
+    if confirmations >= 6:
+        status = "confirmed"
+    elif confirmations > 0:
+        status = "confirming"
+    else:
+        status = "pending"
+        
+    explorer_base = "https://blockstream.info/"
+    if network == "testnet":
+        explorer_base += "testnet/"
+    
+    result = TransactionStatusModel(
+        txid=txid,
+        status=status,
+        confirmations=confirmations,
+        block_height=tx_data.get("block_height"),
+        block_hash=tx_data.get("block_hash"),
+        timestamp=tx_data.get("timestamp"),
+        explorer_url=f"{explorer_base}tx/{txid}"
+    )
+    blockchain_cache.set(f"tx_status_{network}_{txid}", result.model_dump())
+    return result
+
 def _fallback_status(txid: str, network: str, error: str) -> TransactionStatusModel:
     """
     Fornece um status de fallback quando a API falha.
@@ -0,0 +1,3 @@
+from .client import AsyncUpstreamClient, UpstreamClient, get_async_upstream_client, get_upstream_client
+
+__all__ = ['UpstreamClient', 'AsyncUpstreamClient', 'get_upstream_client', 'get_async_upstream_client']
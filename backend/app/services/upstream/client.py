@@ -0,0 +1,164 @@
+import asyncio
+import logging
+import threading
+from functools import lru_cache
+from typing import Optional, Tuple, Union
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+from app.dependencies import get_settings
+
+logger = logging.getLogger(__name__)
+
+Timeout = Union[float, Tuple[float, float]]
+
+class UpstreamClient:
+    """
+    Cliente HTTP compartilhado para as APIs externas (Esplora, Blockchair, mempool.space).
+
+    Uma única `requests.Session` mantém as conexões abertas (keep-alive) em
+    um pool por host, evitando um novo handshake TCP+TLS a cada consulta.
+    Toda requisição tem timeout de conexão e de leitura, configuráveis em
+    `Settings`.
+    """
+
+    def __init__(self, connect_timeout: Optional[float] = None, read_timeout: Optional[float] = None,
+                 pool_connections: Optional[int] = None, pool_maxsize: Optional[int] = None):
+        settings = get_settings()
+        self.timeout: Tuple[float, float] = (
+            connect_timeout or settings.upstream_connect_timeout,
+            read_timeout or settings.upstream_read_timeout
+        )
+        self.pool_connections = pool_connections or settings.upstream_pool_connections
+        self.pool_maxsize = pool_maxsize or settings.upstream_pool_maxsize
+        self._lock = threading.Lock()
+        self._session: Optional[requests.Session] = None
+
+    def _new_session(self) -> requests.Session:
+        # pool_connections: hosts com pool próprio; pool_maxsize: conexões mantidas por host
+        adapter = HTTPAdapter(pool_connections=self.pool_connections, pool_maxsize=self.pool_maxsize)
+        session = requests.Session()
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    @property
+    def session(self) -> requests.Session:
+        if self._session is None:
+            with self._lock:
+                if self._session is None:
+                    self._session = self._new_session()
+        return self._session
+
+    def request(self, method: str, url: str, timeout: Optional[Timeout] = None, **kwargs) -> requests.Response:
+        """
+        Executa uma requisição usando o pool de conexões
+
+        Args:
+            method: Método HTTP ('GET', 'POST', ...)
+            url: URL completa
+            timeout: Timeout em segundos ou tupla (conexão, leitura); padrão: configuração
+            **kwargs: Demais argumentos de `requests.Session.request`
+
+        Returns:
+            requests.Response: Resposta da API
+        """
+        return self.session.request(method, url, timeout=timeout or self.timeout, **kwargs)
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request("POST", url, **kwargs)
+
+    def close(self):
+        """Fecha as conexões abertas do pool"""
+        with self._lock:
+            if self._session is not None:
+                self._session.close()
+                self._session = None
+
+class AsyncUpstreamClient:
+    """
+    Versão assíncrona do cliente das APIs externas, sobre `httpx.AsyncClient`.
+
+    Usada pelas rotas `async def`: uma consulta em andamento não ocupa uma
+    thread, então o número de consultas simultâneas fica limitado apenas por
+    `upstream_max_connections`. Usa os mesmos timeouts do cliente síncrono.
+
+    O cliente é criado no primeiro uso dentro do event loop e recriado se
+    for usado a partir de outro loop (ex: testes com `asyncio.run`).
+    """
+
+    def __init__(self, connect_timeout: Optional[float] = None, read_timeout: Optional[float] = None,
+                 max_connections: Optional[int] = None, max_keepalive: Optional[int] = None):
+        settings = get_settings()
+        self.timeout: Tuple[float, float] = (
+            connect_timeout or settings.upstream_connect_timeout,
+            read_timeout or settings.upstream_read_timeout
+        )
+        self.limits = httpx.Limits(
+            max_connections=max_connections or settings.upstream_max_connections,
+            max_keepalive_connections=max_keepalive or settings.upstream_pool_maxsize
+        )
+        self._client: Optional[httpx.AsyncClient] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @staticmethod
+    def _httpx_timeout(timeout: Timeout) -> httpx.Timeout:
+        if isinstance(timeout, tuple):
+            connect, read = timeout
+            return httpx.Timeout(read, connect=connect)
+        return httpx.Timeout(timeout)
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._loop is not loop:
+            self._client = httpx.AsyncClient(
+                timeout=self._httpx_timeout(self.timeout),
+                limits=self.limits,
+                follow_redirects=True
+            )
+            self._loop = loop
+        return self._client
+
+    async def request(self, method: str, url: str, timeout: Optional[Timeout] = None, **kwargs) -> httpx.Response:
+        """
+        Executa uma requisição sem bloquear o event loop
+
+        Args:
+            method: Método HTTP ('GET', 'POST', ...)
+            url: URL completa
+            timeout: Timeout em segundos ou tupla (conexão, leitura); padrão: configuração
+            **kwargs: Demais argumentos de `httpx.AsyncClient.request`
+
+        Returns:
+            httpx.Response: Resposta da API
+        """
+        return await self.client.request(method, url, timeout=self._httpx_timeout(timeout or self.timeout), **kwargs)
+
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("POST", url, **kwargs)
+
+    async def aclose(self):
+        """Fecha as conexões abertas do pool"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+            self._loop = None
+
+@lru_cache
+def get_upstream_client() -> UpstreamClient:
+    """Retorna o cliente HTTP compartilhado por todos os serviços"""
+    return UpstreamClient()
+
+@lru_cache
+def get_async_upstream_client() -> AsyncUpstreamClient:
+    """Retorna o cliente HTTP assíncrono compartilhado pelas rotas `async def`"""
+    return AsyncUpstreamClient()
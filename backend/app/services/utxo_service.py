@@ -2,6 +2,7 @@ from bitcoinlib.transactions import Transaction
 from typing import List, Dict, Any
 from app.models.utxo_models import TransactionRequest, TransactionResponse
 from app.dependencies import get_bitcoinlib_network
+from app.services.tx_size import fee_for_vsize, transaction_shape, transaction_vsize
 import logging
 import traceback
 
@@ -104,8 +105,9 @@ def build_transaction(request: TransactionRequest, network: str) -> TransactionR
                 raise ValueError(f"Erro no output {i}: {str(e)}")
         
         if request.fee_rate:
-            logger.debug(f"Definindo taxa: {request.fee_rate} sat/vB")
-            tx.fee = request.fee_rate
+            vsize = transaction_vsize(*transaction_shape(request.inputs, request.outputs))
+            tx.fee = fee_for_vsize(vsize, request.fee_rate)
+            logger.debug(f"Definindo taxa: {request.fee_rate} sat/vB x {vsize} vB = {tx.fee} sat")
         
         fee = sum(inp.value or 0 for inp in request.inputs) - sum(out.value for out in request.outputs)
         fee = max(0, fee)  # Evitar valores negativos
@@ -1,7 +1,10 @@
 from bitcoinlib.transactions import Transaction
+from app.services import deadline
 from app.services.blockchain_service import get_utxos
+from app.services.providers import ProviderUnavailable
+from app.services.tx_size import raw_weight, weight_to_vsize
 import logging
-from typing import Dict, Any, List, Tuple
+from typing import Dict, Any, List, Optional, Tuple
 
 logger = logging.getLogger(__name__)
 
@@ -69,6 +72,13 @@ def validate_transaction(tx_hex: str, network: str = "testnet"):
         
         is_signed = any(hasattr(inp, 'script_sig') and inp.script_sig for inp in tx.inputs)
         
+        # A taxa por vB usa o tamanho virtual (com o desconto da testemunha), não o tamanho em bytes
+        try:
+            weight = raw_weight(bytes.fromhex(tx_hex))
+        except ValueError:
+            weight = tx.size * 4
+        vsize = weight_to_vsize(weight)
+        
         details = {
             "version": tx.version,
             "locktime": tx.locktime if hasattr(tx, 'locktime') else 0,
@@ -80,7 +90,10 @@ def validate_transaction(tx_hex: str, network: str = "testnet"):
             "is_signed": is_signed,
             "txid": tx.txid,
             "estimated_size": tx.size,
-            "estimated_fee_rate": (input_sum - output_sum) / tx.size if has_funds and input_sum > output_sum and tx.size > 0 else 0
+            "weight": weight,
+            "estimated_vsize": vsize,
+            "estimated_fee_rate": (input_sum - output_sum) / vsize if has_funds and input_sum > output_sum and vsize > 0 else 0,
+            "deadline_exceeded": deadline.exceeded()
         }
         
         is_completely_valid = is_valid and has_funds
@@ -155,6 +168,10 @@ def validate_funds(tx: Transaction, network: str) -> Tuple[bool, List[str], int,
     """
     Verifica se os inputs têm fundos suficientes para cobrir os outputs.
     
+    Os UTXOs de cada endereço são consultados uma única vez. Se o prazo da
+    requisição terminar (ver `app.services.deadline`), os inputs restantes
+    não são consultados e ficam listados como não verificados.
+    
     Args:
         tx: Objeto de transação
         network: Rede Bitcoin
@@ -165,6 +182,7 @@ def validate_funds(tx: Transaction, network: str) -> Tuple[bool, List[str], int,
     issues = []
     input_sum = 0
     output_sum = 0
+    utxos_by_address: Dict[str, Optional[list]] = {}
     
     try:
         for output in tx.outputs:
@@ -178,7 +196,20 @@ def validate_funds(tx: Transaction, network: str) -> Tuple[bool, List[str], int,
             address = tx_input.address if hasattr(tx_input, 'address') and tx_input.address else None
             
             if address:
-                utxos = get_utxos(address, network)
+                if address not in utxos_by_address:
+                    if deadline.expired():
+                        deadline.mark_exceeded()
+                        issues.append(f"Input {i} não verificado: prazo da requisição esgotado")
+                        continue
+                    try:
+                        utxos_by_address[address] = get_utxos(address, network)
+                    except ProviderUnavailable as e:
+                        logger.warning(f"UTXOs de {address} indisponíveis: {str(e)}")
+                        utxos_by_address[address] = None
+                utxos = utxos_by_address[address]
+                if utxos is None:
+                    issues.append(f"Input {i} não verificado: nenhum provedor de blockchain disponível")
+                    continue
                 
                 utxo_found = False
                 for utxo in utxos:
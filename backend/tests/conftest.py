@@ -0,0 +1,83 @@
+import json
+import os
+import sys
+import tempfile
+import threading
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+# Os testes unitários usam um diretório de cache temporário para não tocar em ~/.bitcoin-wallet
+os.environ.setdefault("CACHE_DIR", tempfile.mkdtemp(prefix="bitcoin-wallet-tests-"))
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+class FakeUpstream:
+    """
+    Servidor HTTP local que faz o papel de uma API Esplora nos testes.
+
+    `routes` mapeia o caminho para (status, corpo) ou (status, corpo,
+    cabeçalhos), ou para uma função que retorna essa tupla a cada
+    requisição; corpos que não são str são serializados como JSON. `hits` conta as requisições por caminho e
+    `connections` guarda os endereços de origem das conexões recebidas.
+    """
+
+    def __init__(self):
+        self.routes = {}
+        self.hits = Counter()
+        self.connections = set()
+        upstream = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _respond(self):
+                upstream.hits[self.path] += 1
+                upstream.connections.add(self.client_address)
+                route = upstream.routes.get(self.path, (404, "not found"))
+                if callable(route):
+                    route = route()
+                status, body, headers = (tuple(route) + ({},))[:3]
+                if callable(body):
+                    body = body()
+                payload = body if isinstance(body, str) else json.dumps(body)
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(payload.encode())))
+                self.end_headers()
+                self.wfile.write(payload.encode())
+
+            do_GET = _respond
+            do_POST = _respond
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+@pytest.fixture
+def upstream():
+    server = FakeUpstream()
+    yield server
+    server.close()
+
+@pytest.fixture
+def esplora(monkeypatch, upstream):
+    """Direciona as consultas do serviço de blockchain para o `upstream` local, como único provedor Esplora"""
+    from app.services import blockchain_service
+    from app.services.providers import EsploraProvider, ProviderRouter
+
+    # Servidor local: sem limite de taxa
+    router = ProviderRouter([EsploraProvider({"mainnet": upstream.url, "testnet": upstream.url})],
+                            rate_limits={"esplora": 0})
+    monkeypatch.setattr(blockchain_service, "provider_router", router)
+    return upstream
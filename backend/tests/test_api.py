@@ -245,8 +245,8 @@ def test_balance_utxos(address, network="testnet", test_offline=True):
         print(json.dumps(balance_data, indent=2))
         
         # Verificar cache
-        cache_file = Path.home() / ".bitcoin-wallet" / "cache" / "blockchain_cache.json"
-        if cache_file.exists():
+        cache_dir = Path.home() / ".bitcoin-wallet" / "cache"
+        if (cache_dir / "blockchain_cache.db").exists() or (cache_dir / "blockchain_cache.json").exists():
             print(f"✅ RF3.3: Cache persistente implementado")
         else:
             print(f"❌ RF3.3: Cache persistente não encontrado")
@@ -0,0 +1,109 @@
+"""
+Testes da consulta de saldo em lote (POST /api/balance/batch).
+
+Uso:
+python -m pytest tests/test_balance_batch.py
+"""
+
+import json
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.routers import balance
+from app.services import blockchain_service
+from app.services.providers import EsploraProvider, ProviderRouter
+
+CACHED = "tb1qw508d6qejxtdg4y5r3zarvary0c5xw7kxpjzsx"
+FUNDED = "tb1qrp33g0q5c5txsp9arysrx4k6zdkfs4nce4xj0gdcccefvpysxf3q0sl5k7"
+EMPTY = "mipcBbFg9gMiCh81Kj8tqqdgoZub1ZJRfn"
+STREAMED = "2MzQwSSnBHWHqSAqtTVQ6v47XtaisrJa1Vc"
+MAINNET = "bc1qw508d6qejxtdg4y5r3zarvary0c5xw7kv8f3t4"
+LIMITED = "tb1q" + "l" * 38
+
+@pytest.fixture
+def client(monkeypatch, upstream, esplora):
+    monkeypatch.setattr(balance, "is_offline_mode", lambda network: False)
+    upstream.routes[f"/address/{FUNDED}/utxo"] = (200, [
+        {"txid": "e" * 64, "vout": 1, "value": 7000, "status": {"confirmed": True, "block_height": 10}}
+    ])
+    upstream.routes[f"/address/{MAINNET}/utxo"] = (200, [
+        {"txid": "f" * 64, "vout": 0, "value": 3000, "status": {"confirmed": True, "block_height": 10}}
+    ])
+    upstream.routes[f"/address/{STREAMED}/utxo"] = upstream.routes[f"/address/{FUNDED}/utxo"]
+    upstream.routes[f"/address/{EMPTY}/utxo"] = (200, [])
+    blockchain_service.blockchain_cache.set_many({
+        f"balance_testnet_{CACHED}": {"confirmed": 1234, "unconfirmed": 0},
+        f"utxos_testnet_{CACHED}": [{"txid": "c" * 64, "vout": 0, "value": 1234, "script": "", "confirmations": 3,
+                                      "address": CACHED}]
+    })
+
+    app = FastAPI()
+    app.include_router(balance.router, prefix="/api/balance")
+    return TestClient(app)
+
+def batch_body(*items):
+    return {"addresses": [{"address": address, "network": network} for address, network in items]}
+
+def test_batch_mixes_cache_hits_misses_and_networks(client, upstream):
+    response = client.post("/api/balance/batch", json=batch_body(
+        (CACHED, "testnet"), (FUNDED, "testnet"), (MAINNET, "mainnet"), (EMPTY, "testnet"), (MAINNET, "testnet")
+    ))
+
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [(r["address"], r["status_code"]) for r in results] == [
+        (CACHED, 200), (FUNDED, 200), (MAINNET, 200), (EMPTY, 404), (MAINNET, 400)
+    ]
+    assert [r["balance"] for r in results[:3]] == [1234, 7000, 3000]
+    assert upstream.hits[f"/address/{CACHED}/utxo"] == 0
+    assert upstream.hits[f"/address/{FUNDED}/utxo"] == 1
+    assert upstream.hits[f"/address/{MAINNET}/utxo"] == 1
+
+def test_batch_streams_one_ndjson_line_per_address(client):
+    with client.stream("POST", "/api/balance/batch?stream=true",
+                       json=batch_body((STREAMED, "testnet"), (CACHED, "testnet"))) as response:
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        lines = [json.loads(line) for line in response.iter_lines() if line]
+
+    # O acerto de cache vem primeiro, antes da consulta ao upstream
+    assert [line["address"] for line in lines] == [CACHED, STREAMED]
+
+def test_batch_rejects_more_addresses_than_the_limit(client, monkeypatch):
+    monkeypatch.setattr(balance.get_settings(), "balance_batch_max_addresses", 1)
+
+    response = client.post("/api/balance/batch", json=batch_body((CACHED, "testnet"), (FUNDED, "testnet")))
+
+    assert response.status_code == 400
+
+def test_batch_reports_cache_failure_per_address(client, monkeypatch):
+    original = balance.peek_address_async
+
+    async def failing_peek(address, network, offline_mode=False):
+        if address == FUNDED:
+            raise RuntimeError("disco indisponível")
+        return await original(address, network, offline_mode)
+
+    monkeypatch.setattr(balance, "peek_address_async", failing_peek)
+    with client.stream("POST", "/api/balance/batch?stream=true",
+                       json=batch_body((FUNDED, "testnet"), (CACHED, "testnet"))) as response:
+        lines = [json.loads(line) for line in response.iter_lines() if line]
+
+    assert response.status_code == 200
+    assert [(line["address"], line["status_code"]) for line in lines] == [(FUNDED, 500), (CACHED, 200)]
+
+def test_rate_limited_lookup_without_cache_returns_503_with_retry_after(client, monkeypatch, upstream):
+    router = ProviderRouter([EsploraProvider({"testnet": upstream.url})], rate_limits={"esplora": 5})
+    router.limiter(router.providers[0], "testnet").pause(30)
+    monkeypatch.setattr(blockchain_service, "provider_router", router)
+
+    response = client.get(f"/api/balance/{LIMITED}?network=testnet")
+    batch = client.post("/api/balance/batch", json=batch_body((LIMITED, "testnet"), (CACHED, "testnet")))
+
+    # Nada de saldo zerado inventado: sem cache, a consulta recusada vira 503
+    assert response.status_code == 503
+    assert 29 <= int(response.headers["Retry-After"]) <= 30
+    results = batch.json()["results"]
+    assert [(r["status_code"], r["balance"]) for r in results] == [(503, None), (200, 1234)]
+    assert 29 <= results[0]["retry_after"] <= 30
@@ -0,0 +1,320 @@
+"""
+Testes unitários do cache persistente da blockchain.
+
+Uso:
+python -m pytest tests/test_blockchain_cache.py
+"""
+
+import json
+import random
+import sqlite3
+import threading
+import time
+
+import pytest
+
+from app.dependencies import get_settings
+from app.services.cache import (
+    BloomFilter, NegativeCache, PersistentBlockchainCache, SQLiteCacheStorage, StoredEntry, TTLPolicy,
+    create_cache_storage
+)
+from app.services.cache.storage import migrate_json_cache
+
+def make_cache(tmp_path):
+    return PersistentBlockchainCache(storage=SQLiteCacheStorage(tmp_path / "blockchain_cache.db"))
+
+def test_set_get_roundtrip(tmp_path):
+    cache = make_cache(tmp_path)
+    cache.set("balance_testnet_tb1qabc", {"confirmed": 1000, "unconfirmed": 0})
+
+    assert cache.get("balance_testnet_tb1qabc") == {"confirmed": 1000, "unconfirmed": 0}
+    assert cache.get("balance_testnet_desconhecido") is None
+    cache.close()
+
+def test_entries_survive_restart(tmp_path):
+    cache = make_cache(tmp_path)
+    cache.set("utxos_testnet_tb1qabc", [{"txid": "a" * 64, "vout": 0, "value": 500}])
+    cache.close()
+
+    reopened = make_cache(tmp_path)
+    assert reopened.get("utxos_testnet_tb1qabc") == [{"txid": "a" * 64, "vout": 0, "value": 500}]
+    reopened.close()
+
+def test_expired_entry_only_with_ignore_ttl(tmp_path):
+    storage = SQLiteCacheStorage(tmp_path / "blockchain_cache.db")
+    storage.put("balance_testnet_tb1qold", {"confirmed": 1, "unconfirmed": 0}, time.time() - 10 ** 8)
+    cache = PersistentBlockchainCache(storage=storage)
+
+    assert cache.get("balance_testnet_tb1qold") is None
+    assert cache.get("balance_testnet_tb1qold", ignore_ttl=True) == {"confirmed": 1, "unconfirmed": 0}
+    cache.close()
+
+def test_json_cache_is_migrated_once(tmp_path):
+    legacy_file = tmp_path / "blockchain_cache.json"
+    legacy_file.write_text(json.dumps({
+        "cache": {"balance_testnet_tb1qlegacy": {"confirmed": 7, "unconfirmed": 0}},
+        "timestamps": {"balance_testnet_tb1qlegacy": 1234.5}
+    }))
+
+    storage = create_cache_storage(tmp_path, "sqlite")
+
+    entry = storage.get("balance_testnet_tb1qlegacy")
+    assert (entry.value, entry.timestamp) == ({"confirmed": 7, "unconfirmed": 0}, 1234.5)
+    assert not legacy_file.exists()
+    assert (tmp_path / "blockchain_cache.json.migrated").exists()
+    storage.close()
+
+def test_failed_json_migration_keeps_legacy_file(tmp_path):
+    legacy_file = tmp_path / "blockchain_cache.json"
+    legacy_file.write_text(json.dumps({
+        "cache": {"balance_testnet_tb1qlegacy": {"confirmed": 7, "unconfirmed": 0}},
+        "timestamps": {"balance_testnet_tb1qlegacy": 1234.5}
+    }))
+    storage = SQLiteCacheStorage(tmp_path / "blockchain_cache.db")
+    storage._conn.execute("ALTER TABLE cache RENAME TO cache_offline")
+
+    with pytest.raises(sqlite3.Error):
+        migrate_json_cache(legacy_file, storage)
+    assert legacy_file.exists()
+
+    storage._conn.execute("ALTER TABLE cache_offline RENAME TO cache")
+    assert migrate_json_cache(legacy_file, storage) == 1
+    assert not legacy_file.exists()
+    storage.close()
+
+def test_lru_eviction_keeps_entries_on_disk(tmp_path):
+    cache = PersistentBlockchainCache(
+        storage=SQLiteCacheStorage(tmp_path / "blockchain_cache.db"), max_entries=2, max_bytes=0, shards=1
+    )
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    stats = cache.stats()
+    assert stats["entries"] == 2
+    assert stats["evictions_lru"] == 1
+    assert cache.get("b") == 2
+    assert cache.stats()["disk_reads"] == 1
+    cache.close()
+
+def test_byte_budget_is_enforced(tmp_path):
+    cache = PersistentBlockchainCache(
+        storage=SQLiteCacheStorage(tmp_path / "blockchain_cache.db"), max_entries=0, max_bytes=200
+    )
+    for i in range(20):
+        cache.set(f"utxos_testnet_{i}", [{"txid": "f" * 64, "vout": i}])
+
+    assert cache.stats()["bytes"] <= 200
+    assert cache.stats()["evictions_lru"] > 0
+    cache.close()
+
+def test_sweep_drops_expired_entries_from_memory_only(tmp_path):
+    storage = SQLiteCacheStorage(tmp_path / "blockchain_cache.db")
+    storage.put("balance_testnet_tb1qold", {"confirmed": 1, "unconfirmed": 0}, time.time() - 10 ** 8)
+    cache = PersistentBlockchainCache(storage=storage)
+    cache.get("balance_testnet_tb1qold", ignore_ttl=True)
+    cache.set("balance_testnet_tb1qnew", {"confirmed": 2, "unconfirmed": 0})
+
+    assert cache.sweep() == 1
+    assert cache.stats()["entries"] == 1
+    assert cache.get("balance_testnet_tb1qold", ignore_ttl=True) == {"confirmed": 1, "unconfirmed": 0}
+    cache.close()
+
+def test_storage_retention_purge(tmp_path):
+    storage = SQLiteCacheStorage(tmp_path / "blockchain_cache.db")
+    storage.put("antiga", 1, 100.0)
+    storage.put("recente", 2, time.time())
+
+    assert storage.delete_older_than(time.time() - 60) == 1
+    assert storage.get("antiga") is None
+    assert storage.count() == 1
+    storage.close()
+
+def test_write_behind_defers_disk_writes(tmp_path):
+    storage = SQLiteCacheStorage(tmp_path / "blockchain_cache.db")
+    cache = PersistentBlockchainCache(storage=storage, write_behind=True)
+    cache.flush_interval = 3600
+    cache.set("balance_testnet_tb1qwb", {"confirmed": 5, "unconfirmed": 0})
+
+    assert storage.get("balance_testnet_tb1qwb") is None
+    assert cache.stats()["dirty"] == 1
+    assert cache.flush() == 1
+    assert storage.get("balance_testnet_tb1qwb")[0] == {"confirmed": 5, "unconfirmed": 0}
+    cache.close()
+
+def test_failed_flush_keeps_entries_dirty(tmp_path):
+    storage = SQLiteCacheStorage(tmp_path / "blockchain_cache.db")
+    cache = PersistentBlockchainCache(storage=storage, write_behind=True)
+    cache.flush_interval = 3600
+    cache.set("balance_testnet_tb1qretry", {"confirmed": 9, "unconfirmed": 0})
+
+    # Tabela indisponível: o flush falha e as entradas voltam para a fila
+    storage._conn.execute("ALTER TABLE cache RENAME TO cache_offline")
+    assert cache.flush() == 0
+    assert cache.stats()["dirty"] == 1
+    storage._conn.execute("ALTER TABLE cache_offline RENAME TO cache")
+    assert cache.flush() == 1
+    assert storage.get("balance_testnet_tb1qretry")[0] == {"confirmed": 9, "unconfirmed": 0}
+    cache.close()
+
+def test_write_behind_flushes_on_close(tmp_path):
+    cache = PersistentBlockchainCache(storage=create_cache_storage(tmp_path, "json"), write_behind=True)
+    cache.set("utxos_testnet_tb1qwb", [])
+    cache.close()
+
+    data = json.loads((tmp_path / "blockchain_cache.json").read_text())
+    assert data["cache"] == {"utxos_testnet_tb1qwb": []}
+    assert not (tmp_path / "blockchain_cache.json.tmp").exists()
+
+def test_concurrent_get_set_stress(tmp_path):
+    cache = PersistentBlockchainCache(
+        storage=SQLiteCacheStorage(tmp_path / "blockchain_cache.db"),
+        max_entries=200, max_bytes=0, write_behind=True
+    )
+    cache.flush_max_dirty = 25
+    keys = [f"balance_testnet_addr{i}" for i in range(500)]
+    errors = []
+
+    def worker(seed):
+        rng = random.Random(seed)
+        try:
+            for _ in range(2000):
+                key = rng.choice(keys)
+                if rng.random() < 0.4:
+                    cache.set(key, {"confirmed": rng.randint(0, 10 ** 8), "unconfirmed": 0})
+                else:
+                    value = cache.get(key, ignore_ttl=True)
+                    assert value is None or set(value) == {"confirmed", "unconfirmed"}
+                if rng.random() < 0.01:
+                    cache.sweep()
+                    cache.flush()
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(seed,)) for seed in range(16)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    stats = cache.stats()
+    assert stats["entries"] <= 200
+    cache.close()
+
+    reopened = PersistentBlockchainCache(storage=SQLiteCacheStorage(tmp_path / "blockchain_cache.db"))
+    for key in keys:
+        value = reopened.get(key, ignore_ttl=True)
+        assert value is None or "confirmed" in value
+    reopened.close()
+
+def test_ttl_per_key_prefix():
+    policy = TTLPolicy({"balance_": 300, "tx_status_": 60, "fee_": 120}, default_ttl=600)
+
+    assert policy.ttl("balance_testnet_tb1qabc") == 300
+    assert policy.ttl("tx_status_testnet_" + "a" * 64) == 60
+    assert policy.ttl("fee_testnet") == 120
+    assert policy.ttl("utxos_testnet_tb1qabc") == 600
+
+def test_adaptive_ttl_for_active_and_dormant_addresses():
+    policy = TTLPolicy({}, default_ttl=300, adaptive=True, active_ttl=30, dormant_ttl=86400, dormant_after=1000)
+    now = time.time()
+
+    assert policy.ttl("balance_testnet_a", {"confirmed": 1, "unconfirmed": 5}, now, now) == 30
+    assert policy.ttl("utxos_testnet_a", [{"status": {"confirmed": False}}], now, now) == 30
+    assert policy.ttl("balance_testnet_a", {"confirmed": 1, "unconfirmed": 0}, now - 5000, now) == 86400
+    assert policy.ttl("balance_testnet_a", {"confirmed": 1, "unconfirmed": 0}, now - 10, now) == 300
+
+def test_changed_at_is_kept_while_value_is_unchanged(tmp_path):
+    cache = make_cache(tmp_path)
+    cache.set("balance_testnet_tb1qdormant", {"confirmed": 1, "unconfirmed": 0})
+    first = cache.get_entry("balance_testnet_tb1qdormant")
+    time.sleep(0.01)
+    cache.set("balance_testnet_tb1qdormant", {"confirmed": 1, "unconfirmed": 0})
+    second = cache.get_entry("balance_testnet_tb1qdormant")
+
+    assert second.timestamp > first.timestamp
+    assert second.changed_at == first.changed_at
+    cache.set("balance_testnet_tb1qdormant", {"confirmed": 2, "unconfirmed": 0})
+    assert cache.get_entry("balance_testnet_tb1qdormant").changed_at > first.changed_at
+    cache.close()
+
+def test_tip_height_is_persisted(tmp_path):
+    cache = make_cache(tmp_path)
+    cache.set("balance_testnet_tb1qtip", {"confirmed": 1, "unconfirmed": 0}, tip_height=800000)
+    cache.close()
+
+    reopened = make_cache(tmp_path)
+    assert reopened.get_entry("balance_testnet_tb1qtip").tip_height == 800000
+    reopened.close()
+
+def test_tip_moves_expire_confirmed_data_only():
+    policy = TTLPolicy({}, default_ttl=300, tip_max_age=600)
+    confirmed = {"confirmed": 1, "unconfirmed": 0}
+    pending = {"confirmed": 1, "unconfirmed": 5}
+
+    assert policy.ttls("balance_testnet_a", confirmed, entry_tip=100, current_tip=100) == (600, 600)
+    assert policy.ttls("balance_testnet_a", confirmed, entry_tip=100, current_tip=101) == (0, 0)
+    assert policy.ttls("balance_testnet_a", pending, entry_tip=100, current_tip=101) == (300, 300)
+    assert policy.ttls("balance_testnet_a", confirmed, entry_tip=None, current_tip=101) == (300, 300)
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(capacity=10000, error_rate=0.01)
+    keys = [f"balance_testnet_tb1q{i}" for i in range(10000)]
+    for key in keys:
+        bloom.add(key)
+
+    assert all(key in bloom for key in keys)
+    false_positives = sum(f"utxos_testnet_tb1q{i}" in bloom for i in range(10000))
+    assert false_positives < 300
+    assert len(bloom.bits) < 15000
+
+def test_negative_cache_entries_expire():
+    negative = NegativeCache(ttl=0.2, capacity=1000, error_rate=0.001)
+    negative.add("utxos_testnet_tb1qempty")
+
+    assert negative.contains("utxos_testnet_tb1qempty")
+    assert not negative.contains("utxos_testnet_tb1qother")
+    time.sleep(0.25)
+    assert not negative.contains("utxos_testnet_tb1qempty")
+
+def test_negative_cache_confirms_bloom_hits():
+    negative = NegativeCache(ttl=0.3, capacity=1000, error_rate=0.001)
+    size = negative.stats()["bytes"]
+    negative.add("balance_testnet_tb1qempty")
+    # Memória fixa: as chaves não são guardadas, só impressões digitais em arrays pré-alocados
+    assert negative.stats()["bytes"] == size < 40 * 1000
+    # Colisão no filtro: a impressão digital não está na tabela e a chave não é tratada como vazia
+    negative._current.add("balance_testnet_tb1qfunded")
+
+    assert not negative.contains("balance_testnet_tb1qfunded")
+    assert negative.stats()["filter_false_positives"] == 1
+    # Uma rotação no meio do TTL não estende a validade da chave
+    time.sleep(0.2)
+    negative.add("balance_testnet_tb1qother")
+    assert negative.contains("balance_testnet_tb1qempty")
+    time.sleep(0.15)
+    assert not negative.contains("balance_testnet_tb1qempty")
+    assert negative.contains("balance_testnet_tb1qother")
+
+def test_startup_does_not_read_the_disk(tmp_path, monkeypatch):
+    storage = SQLiteCacheStorage(tmp_path / "blockchain_cache.db")
+    storage.put_many(
+        (f"balance_testnet_addr{i}", StoredEntry({"confirmed": i, "unconfirmed": 0}, time.time()))
+        for i in range(5000)
+    )
+    storage.close()
+    monkeypatch.setenv("CACHE_DIR", str(tmp_path))
+    get_settings.cache_clear()
+    try:
+        cache = PersistentBlockchainCache()
+        assert cache._storage is None
+        assert cache.stats()["entries"] == 0
+
+        assert cache.get("balance_testnet_addr4321") == {"confirmed": 4321, "unconfirmed": 0}
+        assert cache.stats()["disk_reads"] == 1
+        assert cache.warm(100) == 100
+        cache.close()
+    finally:
+        get_settings.cache_clear()
@@ -0,0 +1,328 @@
+"""
+Testes unitários do serviço de blockchain (single-flight, stale-while-revalidate e topo da cadeia).
+
+Uso:
+python -m pytest tests/test_blockchain_service.py
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+import requests
+
+from app.services import blockchain_service
+from app.services.cache import NegativeCache, TTLPolicy
+from app.services.cache.storage import StoredEntry
+from app.services.connectivity import ConnectivityMonitor
+from app.services.single_flight import AsyncSingleFlight, SingleFlight
+from app.services.tip_tracker import TipTracker
+
+def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight()
+    calls = []
+    barrier = threading.Barrier(20)
+    results = []
+
+    def slow_fetch():
+        calls.append(1)
+        time.sleep(0.2)
+        return {"confirmed": 42, "unconfirmed": 0}
+
+    def worker():
+        barrier.wait()
+        results.append(flight.do(("balance", "testnet", "tb1qhot"), slow_fetch))
+
+    threads = [threading.Thread(target=worker) for _ in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert results == [{"confirmed": 42, "unconfirmed": 0}] * 20
+    assert flight.stats() == {"executed": 1, "coalesced": 19, "in_flight": 0}
+
+def test_errors_are_shared_and_not_cached():
+    flight = SingleFlight()
+
+    def failing_fetch():
+        raise requests.exceptions.ConnectionError("upstream indisponível")
+
+    with pytest.raises(requests.exceptions.ConnectionError):
+        flight.do("chave", failing_fetch)
+    assert flight.do("chave", lambda: "ok") == "ok"
+
+def test_get_balance_coalesces_upstream_calls(monkeypatch):
+    calls = []
+
+    def fake_fetch(address, network):
+        calls.append(address)
+        time.sleep(0.2)
+        return {"balance": {"confirmed": 1000, "unconfirmed": 0}, "utxos": []}
+
+    monkeypatch.setattr(blockchain_service, "_fetch_address", fake_fetch)
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(
+            blockchain_service.get_balance("tb1qcoalesce", "testnet")
+        ))
+        for _ in range(10)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert calls == ["tb1qcoalesce"]
+    assert results == [{"confirmed": 1000, "unconfirmed": 0}] * 10
+
+def test_stale_entry_is_served_and_refreshed_in_background(monkeypatch):
+    refreshed = threading.Event()
+
+    def fake_fetch(address, network):
+        blockchain_service.blockchain_cache.set(f"balance_{network}_{address}", {"confirmed": 2, "unconfirmed": 0})
+        refreshed.set()
+        return {"balance": {"confirmed": 2, "unconfirmed": 0}, "utxos": []}
+
+    monkeypatch.setattr(blockchain_service, "_fetch_address", fake_fetch)
+    monkeypatch.setattr(blockchain_service.blockchain_cache, "ttl_policy", TTLPolicy({}, 0.05, swr_window=3600))
+    blockchain_service.blockchain_cache.set("balance_testnet_tb1qswr", {"confirmed": 1, "unconfirmed": 0})
+    time.sleep(0.1)
+
+    result = blockchain_service.lookup_balance("tb1qswr", "testnet")
+
+    assert result == blockchain_service.CachedResult({"confirmed": 1, "unconfirmed": 0}, stale=True)
+    assert refreshed.wait(2)
+    assert blockchain_service.blockchain_cache.get_entry("balance_testnet_tb1qswr").value == {"confirmed": 2, "unconfirmed": 0}
+
+def test_tip_tracker_reads_height_from_upstream(upstream):
+    tracker = TipTracker(url_for=lambda network: upstream.url, poll_interval=60, stale_after=0.2)
+    upstream.routes["/blocks/tip/height"] = (200, "800000")
+
+    assert tracker.height("testnet") is None
+    assert tracker.refresh("testnet") == 800000
+    assert tracker.height("testnet") == 800000
+    time.sleep(0.3)
+    assert tracker.height("testnet") is None
+
+def test_tip_tracker_tolerates_upstream_errors(upstream):
+    tracker = TipTracker(url_for=lambda network: upstream.url, poll_interval=60)
+    upstream.routes["/blocks/tip/height"] = (500, "erro")
+
+    assert tracker.refresh("testnet") is None
+    assert tracker.height("testnet") is None
+
+def test_confirmed_balance_is_revalidated_only_when_tip_moves(monkeypatch, upstream, esplora):
+    address = "tb1qtipdriven"
+    upstream.routes["/blocks/tip/height"] = (200, "100")
+    upstream.routes[f"/address/{address}/utxo"] = (200, [
+        {"txid": "d" * 64, "vout": 0, "value": 5000, "status": {"confirmed": True, "block_height": 90}}
+    ])
+    tracker = TipTracker(url_for=lambda network: upstream.url, poll_interval=60)
+    monkeypatch.setattr(blockchain_service, "tip_tracker", tracker)
+    monkeypatch.setattr(blockchain_service.blockchain_cache, "ttl_policy", TTLPolicy({}, 0.05, tip_max_age=3600))
+    tracker.refresh("testnet")
+
+    assert blockchain_service.get_balance(address, "testnet") == {"confirmed": 5000, "unconfirmed": 0}
+    time.sleep(0.1)
+    # TTL vencido, mas o topo não mudou: sem nova consulta ao upstream
+    assert blockchain_service.get_balance(address, "testnet") == {"confirmed": 5000, "unconfirmed": 0}
+    assert upstream.hits[f"/address/{address}/utxo"] == 1
+
+    upstream.routes["/blocks/tip/height"] = (200, "101")
+    tracker.refresh("testnet")
+    blockchain_service.get_balance(address, "testnet")
+    assert upstream.hits[f"/address/{address}/utxo"] == 2
+
+def test_empty_address_is_negatively_cached(monkeypatch, upstream, esplora):
+    address = "tb1qneverused"
+    upstream.routes[f"/address/{address}/utxo"] = (200, [])
+    monkeypatch.setattr(blockchain_service, "negative_cache", NegativeCache(ttl=60))
+
+    for _ in range(5):
+        assert blockchain_service.get_balance(address, "testnet") == {"confirmed": 0, "unconfirmed": 0}
+        assert blockchain_service.get_utxos(address, "testnet") == []
+
+    assert upstream.hits[f"/address/{address}/utxo"] == 1
+    assert blockchain_service.blockchain_cache.get_entry(f"utxos_testnet_{address}") is None
+
+def test_address_that_became_empty_replaces_cached_entry(monkeypatch, upstream, esplora):
+    address = "tb1qspentall"
+    upstream.routes[f"/address/{address}/utxo"] = (200, [])
+    monkeypatch.setattr(blockchain_service.blockchain_cache, "ttl_policy", TTLPolicy({}, 0.05))
+    blockchain_service.blockchain_cache.set(f"utxos_testnet_{address}", [{"txid": "b" * 64, "vout": 0, "value": 1}])
+    time.sleep(0.1)
+
+    assert blockchain_service.get_utxos(address, "testnet") == []
+    assert blockchain_service.blockchain_cache.get_entry(f"utxos_testnet_{address}").value == []
+
+def test_async_single_flight_shares_one_execution():
+    flight = AsyncSingleFlight()
+    calls = []
+
+    async def slow_fetch():
+        calls.append(1)
+        await asyncio.sleep(0.1)
+        return "ok"
+
+    async def main():
+        return await asyncio.gather(*(flight.do("chave", slow_fetch) for _ in range(50)))
+
+    assert asyncio.run(main()) == ["ok"] * 50
+    assert calls == [1]
+    assert flight.stats() == {"executed": 1, "coalesced": 49, "in_flight": 0}
+
+def test_async_lookups_run_concurrently(monkeypatch, upstream, esplora):
+    addresses = [f"tb1qasync{i}" for i in range(100)]
+
+    def slow_utxos():
+        time.sleep(0.2)
+        return [{"txid": "c" * 64, "vout": 0, "value": 1000, "status": {"confirmed": True}}]
+
+    for address in addresses:
+        upstream.routes[f"/address/{address}/utxo"] = (200, slow_utxos)
+
+    async def main():
+        return await asyncio.gather(*(blockchain_service.get_utxos_async(a, "testnet") for a in addresses))
+
+    started = time.time()
+    results = asyncio.run(main())
+
+    assert time.time() - started < 5
+    assert all(result[0]["value"] == 1000 for result in results)
+    assert sum(upstream.hits.values()) == 100
+
+def test_async_lookup_falls_back_to_cache_on_upstream_error(monkeypatch, upstream, esplora):
+    address = "tb1qasyncfallback"
+    upstream.routes[f"/address/{address}/utxo"] = (503, "indisponível")
+    monkeypatch.setattr(blockchain_service.blockchain_cache, "ttl_policy", TTLPolicy({}, 0.05))
+    blockchain_service.blockchain_cache.set(f"balance_testnet_{address}", {"confirmed": 9, "unconfirmed": 0})
+    time.sleep(0.1)
+
+    result = asyncio.run(blockchain_service.lookup_balance_async(address, "testnet"))
+
+    assert result == blockchain_service.CachedResult({"confirmed": 9, "unconfirmed": 0}, stale=True)
+
+def test_async_lookup_reads_disk_off_the_event_loop(monkeypatch):
+    address = "tb1qdiskonly"
+    storage = blockchain_service.blockchain_cache.storage
+    read_threads = []
+
+    def disk_get(key):
+        read_threads.append(threading.current_thread())
+        if key == f"balance_testnet_{address}":
+            return StoredEntry({"confirmed": 4, "unconfirmed": 0}, time.time())
+        return None
+
+    monkeypatch.setattr(storage, "get", disk_get)
+
+    result = asyncio.run(blockchain_service.lookup_balance_async(address, "testnet"))
+
+    assert result == blockchain_service.CachedResult({"confirmed": 4, "unconfirmed": 0})
+    assert read_threads and threading.main_thread() not in read_threads
+    # Com a entrada já na memória, a consulta é respondida no próprio loop
+    assert blockchain_service.blockchain_cache.in_memory(f"balance_testnet_{address}")
+
+def test_balance_and_utxos_share_one_upstream_call(monkeypatch, upstream, esplora):
+    address = "tb1qoneroundtrip"
+    upstream.routes["/blocks/tip/height"] = (200, "105")
+    upstream.routes[f"/address/{address}/utxo"] = (200, [
+        {"txid": "e" * 64, "vout": 0, "value": 7000, "scriptpubkey": "0014ab",
+         "status": {"confirmed": True, "block_height": 100}},
+        {"txid": "f" * 63 + "0", "vout": 1, "value": 300, "scriptpubkey": "0014ab",
+         "status": {"confirmed": False}}
+    ])
+    tracker = TipTracker(url_for=lambda network: upstream.url, poll_interval=60)
+    tracker.refresh("testnet")
+    monkeypatch.setattr(blockchain_service, "tip_tracker", tracker)
+
+    async def main():
+        return await asyncio.gather(
+            blockchain_service.get_balance_async(address, "testnet"),
+            blockchain_service.get_utxos_async(address, "testnet")
+        )
+
+    balance, utxos = asyncio.run(main())
+
+    assert upstream.hits[f"/address/{address}/utxo"] == 1
+    assert balance == {"confirmed": 7000, "unconfirmed": 300}
+    assert [utxo["confirmations"] for utxo in utxos] == [6, 0]
+    balance_entry = blockchain_service.blockchain_cache.get_entry(f"balance_testnet_{address}")
+    utxos_entry = blockchain_service.blockchain_cache.get_entry(f"utxos_testnet_{address}")
+    assert balance_entry.timestamp == utxos_entry.timestamp
+
+def test_connectivity_monitor_applies_hysteresis():
+    monitor = ConnectivityMonitor(targets={}, failure_threshold=3, recovery_threshold=2)
+
+    assert monitor.is_online("testnet")
+    monitor.record("esplora", "testnet", False, error="timeout")
+    monitor.record("esplora", "testnet", False, error="timeout")
+    assert monitor.is_online("testnet")
+    monitor.record("esplora", "testnet", False, error="timeout")
+    assert not monitor.is_online("testnet")
+
+    monitor.record("esplora", "testnet", True)
+    assert not monitor.is_online("testnet")
+    monitor.record("esplora", "testnet", True)
+    assert monitor.is_online("testnet")
+
+def test_network_is_online_while_any_provider_responds():
+    monitor = ConnectivityMonitor(targets={}, failure_threshold=1)
+    monitor.record("esplora", "mainnet", False, error="503")
+    monitor.record("mempool", "mainnet", True)
+
+    assert monitor.is_online("mainnet")
+    assert not monitor.is_online("mainnet", provider="esplora")
+    monitor.record("mempool", "mainnet", False, error="503")
+    assert not monitor.is_online("mainnet")
+    assert monitor.is_online("testnet")
+
+def test_connectivity_monitor_checks_providers_and_feeds_tip_tracker(upstream):
+    tracker = TipTracker(url_for=lambda network: upstream.url, poll_interval=60)
+    monitor = ConnectivityMonitor(
+        targets={("esplora", "testnet"): f"{upstream.url}/blocks/tip/height",
+                 ("mempool", "testnet"): f"{upstream.url}/mempool/blocks/tip/height"},
+        failure_threshold=1, on_tip=tracker.record
+    )
+    upstream.routes["/blocks/tip/height"] = (200, "900000")
+    upstream.routes["/mempool/blocks/tip/height"] = (500, "erro")
+
+    monitor.check_all()
+
+    assert monitor.is_online("testnet", provider="esplora")
+    assert not monitor.is_online("testnet", provider="mempool")
+    assert tracker.height("testnet") == 900000
+
+def test_connectivity_monitor_survives_errors_in_on_tip(upstream):
+    checked = threading.Event()
+    calls = []
+
+    def broken_on_tip(network, height):
+        calls.append(height)
+        if len(calls) > 1:
+            checked.set()
+        raise RuntimeError("falha ao invalidar o cache")
+
+    monitor = ConnectivityMonitor(
+        targets={("esplora", "testnet"): f"{upstream.url}/blocks/tip/height"},
+        interval=0.05, on_tip=broken_on_tip
+    )
+    upstream.routes["/blocks/tip/height"] = (200, "900000")
+    monitor.start()
+    try:
+        # A thread segue verificando depois do erro
+        assert checked.wait(2)
+    finally:
+        monitor.stop()
+
+def test_is_offline_mode_reads_monitor_state_without_upstream_calls(monkeypatch):
+    monitor = ConnectivityMonitor(targets={}, failure_threshold=1)
+    monkeypatch.setattr(blockchain_service, "connectivity_monitor", monitor)
+    monkeypatch.setattr("app.services.connectivity.get_upstream_client", None)
+
+    assert not blockchain_service.is_offline_mode("testnet")
+    monitor.record("esplora", "testnet", False, error="timeout")
+    assert blockchain_service.is_offline_mode("testnet")
+    assert not blockchain_service.is_offline_mode("mainnet")
@@ -18,12 +18,14 @@ import json
 import time
 from pathlib import Path
 import argparse
+import sqlite3
 import sys
 
 # Configurações
 BASE_URL = "http://localhost:8000/api"
 TEST_ADDRESS = "tb1q0qjghu2z6wpz0d0v47wz6su6l26z04r4r38rav"
 CACHE_DIR = Path.home() / ".bitcoin-wallet" / "cache"
+CACHE_DB = CACHE_DIR / "blockchain_cache.db"
 
 def print_header(title):
     """Imprime um cabeçalho formatado"""
@@ -37,6 +39,11 @@ def print_section(title):
     print(f"  {title}")
     print("-" * 80)
 
+def read_cache_keys():
+    """Retorna as chaves presentes no cache SQLite"""
+    with sqlite3.connect(str(CACHE_DB)) as conn:
+        return {row[0] for row in conn.execute("SELECT key FROM cache")}
+
 def pause_for_demo(message="Pressione Enter para continuar..."):
     """Pausa para demonstração"""
     input(f"\n{message} ")
@@ -67,29 +74,27 @@ def test_online_mode(address=TEST_ADDRESS):
     except:
         print("❌ Erro ao decodificar resposta JSON")
     
-    cache_file = CACHE_DIR / "blockchain_cache.json"
-    if cache_file.exists():
-        print(f"✅ Cache criado em: {cache_file}")
+    if CACHE_DB.exists():
+        print(f"✅ Cache criado em: {CACHE_DB}")
         
         try:
-            with open(cache_file, "r") as f:
-                cache_data = json.load(f)
-                print(f"✅ Cache contém {len(cache_data.get('cache', {}))} entradas")
-                
-                balance_key = f"balance_testnet_{address}"
-                utxos_key = f"utxos_testnet_{address}"
-                
-                if balance_key in cache_data.get("cache", {}):
-                    print(f"✅ Dados de saldo encontrados no cache")
-                else:
-                    print(f"❌ Dados de saldo não encontrados no cache")
-                    
-                if utxos_key in cache_data.get("cache", {}):
-                    print(f"✅ Dados de UTXOs encontrados no cache")
-                else:
-                    print(f"❌ Dados de UTXOs não encontrados no cache")
+            cache_keys = read_cache_keys()
+            print(f"✅ Cache contém {len(cache_keys)} entradas")
+            
+            balance_key = f"balance_testnet_{address}"
+            utxos_key = f"utxos_testnet_{address}"
+            
+            if balance_key in cache_keys:
+                print(f"✅ Dados de saldo encontrados no cache")
+            else:
+                print(f"❌ Dados de saldo não encontrados no cache")
                 
-                return True
+            if utxos_key in cache_keys:
+                print(f"✅ Dados de UTXOs encontrados no cache")
+            else:
+                print(f"❌ Dados de UTXOs não encontrados no cache")
+            
+            return True
         except Exception as e:
             print(f"❌ Erro ao ler cache: {str(e)}")
             return False
@@ -170,38 +175,32 @@ def check_cache_expiration():
     """Verifica se o cache expira corretamente e se o modo offline ignora expiração"""
     print_section("4. VERIFICANDO EXPIRAÇÃO DO CACHE")
     
-    cache_file = CACHE_DIR / "blockchain_cache.json"
-    if not cache_file.exists():
-        print(f"ℹ️ Criando arquivo de cache básico para testes")
-        
-        cache_data = {
-            "cache": {
-                f"balance_testnet_{TEST_ADDRESS}": {"confirmed": 0, "unconfirmed": 0},
-                f"utxos_testnet_{TEST_ADDRESS}": []
-            },
-            "timestamps": {
-                f"balance_testnet_{TEST_ADDRESS}": time.time(),
-                f"utxos_testnet_{TEST_ADDRESS}": time.time()
-            }
-        }
-        
-        os.makedirs(CACHE_DIR, exist_ok=True)
-        with open(cache_file, "w") as f:
-            json.dump(cache_data, f)
+    balance_key = f"balance_testnet_{TEST_ADDRESS}"
+    utxos_key = f"utxos_testnet_{TEST_ADDRESS}"
     
     try:
-        with open(cache_file, "r") as f:
-            cache_data = json.load(f)
-            
-        balance_key = f"balance_testnet_{TEST_ADDRESS}"
-        if balance_key not in cache_data.get("timestamps", {}):
-            print(f"❌ Chave de timestamp para saldo não encontrada no cache")
-            cache_data.setdefault("timestamps", {})[balance_key] = time.time()
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        with sqlite3.connect(str(CACHE_DB)) as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, timestamp REAL NOT NULL)"
+            )
+            existing = {row[0] for row in conn.execute("SELECT key FROM cache")}
+            if balance_key not in existing:
+                print(f"ℹ️ Criando entradas básicas de cache para testes")
+                conn.execute(
+                    "INSERT INTO cache (key, value, timestamp) VALUES (?, ?, ?)",
+                    (balance_key, json.dumps({"confirmed": 0, "unconfirmed": 0}), time.time())
+                )
+                conn.execute(
+                    "INSERT OR IGNORE INTO cache (key, value, timestamp) VALUES (?, ?, ?)",
+                    (utxos_key, json.dumps([]), time.time())
+                )
             
-        cache_data["timestamps"][balance_key] = time.time() - 600
-        
-        with open(cache_file, "w") as f:
-            json.dump(cache_data, f)
+            conn.execute(
+                "UPDATE cache SET timestamp = ? WHERE key = ?",
+                (time.time() - 600, balance_key)
+            )
             
         print(f"✅ Cache modificado: timestamp de saldo definido para 10 minutos atrás")
         
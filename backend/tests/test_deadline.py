@@ -0,0 +1,84 @@
+"""
+Testes do prazo por requisição e da sua propagação até as consultas ao upstream.
+
+Uso:
+python -m pytest tests/test_deadline.py
+"""
+
+import time
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.dependencies import get_settings
+from app.routers import balance
+from app.services import blockchain_service, deadline
+from app.services.cache import TTLPolicy
+from app.services.providers import UTXOS, EsploraProvider, ProviderRouter, ProviderUnavailable
+
+ADDRESS = "tb1qdeadline"
+CACHED = "tb1q0ht9tyks4vh7p5p904t340cr9nvahy7u3re7zg"
+UTXO = {"txid": "c" * 64, "vout": 0, "value": 2500, "status": {"confirmed": True, "block_height": 95}}
+
+def slow():
+    time.sleep(1)
+    return [UTXO]
+
+def test_upstream_call_uses_only_the_remaining_budget(upstream):
+    upstream.routes[f"/address/{ADDRESS}/utxo"] = (200, slow)
+    router = ProviderRouter([EsploraProvider({"testnet": upstream.url})])
+
+    started = time.monotonic()
+    with deadline.deadline_scope(0.3):
+        with pytest.raises(ProviderUnavailable):
+            router.get(UTXOS, "testnet", address=ADDRESS)
+        assert deadline.exceeded()
+    assert time.monotonic() - started < 0.9
+
+def test_expired_deadline_skips_the_upstream(upstream):
+    upstream.routes[f"/address/{ADDRESS}/utxo"] = (200, [UTXO])
+    router = ProviderRouter([EsploraProvider({"testnet": upstream.url})])
+
+    with deadline.deadline_scope(0.01):
+        time.sleep(0.02)
+        with pytest.raises(ProviderUnavailable) as error:
+            router.get(UTXOS, "testnet", address=ADDRESS)
+    assert "deadline" in error.value.errors
+    assert upstream.hits[f"/address/{ADDRESS}/utxo"] == 0
+
+def test_route_budget_comes_from_config_and_header(monkeypatch):
+    settings = get_settings()
+    monkeypatch.setattr(settings, "request_budget", 30.0)
+    monkeypatch.setattr(settings, "request_budgets", "/api/validate=10,/api/balance=5,/api/balance/batch=20")
+
+    assert deadline.route_budget("/api/fee/testnet") == 30
+    assert deadline.route_budget("/api/validate/") == 10
+    assert deadline.route_budget("/api/balance/tb1q") == 5
+    assert deadline.route_budget("/api/balance/batch") == 20
+    # O cabeçalho só encurta o prazo
+    assert deadline.route_budget("/api/balance/tb1q", "2") == 2
+    assert deadline.route_budget("/api/balance/tb1q", "60") == 5
+    assert deadline.route_budget("/api/balance/tb1q", "abc") == 5
+
+def test_expired_request_returns_cached_balance_with_flag(monkeypatch, esplora):
+    esplora.routes[f"/address/{CACHED}/utxo"] = (200, slow)
+    monkeypatch.setattr(balance, "is_offline_mode", lambda network: False)
+    monkeypatch.setattr(blockchain_service.blockchain_cache, "ttl_policy", TTLPolicy({}, 0))
+    blockchain_service.blockchain_cache.set_many({
+        f"balance_testnet_{CACHED}": {"confirmed": 800, "unconfirmed": 0},
+        f"utxos_testnet_{CACHED}": [{"txid": "d" * 64, "vout": 0, "value": 800, "script": "", "confirmations": 3,
+                                      "address": CACHED}]
+    })
+    app = FastAPI()
+    app.add_middleware(deadline.DeadlineMiddleware)
+    app.include_router(balance.router, prefix="/api/balance")
+
+    started = time.monotonic()
+    response = TestClient(app).get(f"/api/balance/{CACHED}?network=testnet", headers={"X-Request-Timeout": "0.3"})
+
+    assert time.monotonic() - started < 0.9
+    assert response.status_code == 200
+    assert response.json()["balance"] == 800
+    assert response.json()["stale"] is True
+    assert response.headers["X-Deadline-Exceeded"] == "true"
@@ -0,0 +1,191 @@
+"""
+Testes do serviço de estimativa de taxas, contra servidores HTTP locais.
+
+Uso:
+python -m pytest tests/test_fee_service.py
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from app.services import fee_service
+from app.services.fee_histogram import FeeHistogram
+from app.services.fee_history import FeeHistory, parse_window
+from app.services.fee_projection import MempoolProjection
+from app.services.fee_service import FeeEstimator
+from app.services.providers import EsploraProvider, MempoolProvider, ProviderRouter
+from conftest import FakeUpstream
+
+@pytest.fixture
+def mainnet():
+    server = FakeUpstream()
+    yield server
+    server.close()
+
+@pytest.fixture
+def router(monkeypatch, upstream, mainnet):
+    upstream.routes["/fee-estimates"] = (200, {"1": 3.0, "3": 2.0, "6": 1.5, "144": 1.0})
+    mainnet.routes["/fee-estimates"] = (200, {"1": 40.0, "3": 30.0, "6": 20.0, "144": 5.0})
+    router = ProviderRouter([EsploraProvider({"testnet": upstream.url, "mainnet": mainnet.url})],
+                            rate_limits={"esplora": 0})
+    monkeypatch.setattr(fee_service, "provider_router", router)
+    return router
+
+def test_fee_cache_is_kept_per_network(router, upstream, mainnet):
+    estimator = FeeEstimator(cache_duration=60)
+
+    assert estimator.estimate_from_mempool("testnet")["high_priority"] == 3.0
+    assert estimator.estimate_from_mempool("mainnet")["high_priority"] == 40.0
+    assert asyncio.run(estimator.estimate_from_mempool_async("testnet"))["high_priority"] == 3.0
+    assert upstream.hits["/fee-estimates"] == 1
+    assert mainnet.hits["/fee-estimates"] == 1
+
+def test_fees_are_refreshed_in_background_before_expiry(router, upstream):
+    estimator = FeeEstimator(cache_duration=0.4, refresh_ahead=0.5)
+    estimator.start()
+    try:
+        estimator.estimate_from_mempool("testnet")
+        upstream.routes["/fee-estimates"] = (200, {"1": 9.0, "3": 2.0, "6": 1.5, "144": 1.0})
+        time.sleep(0.35)
+
+        # Atualizado pela thread: a requisição não consulta o upstream
+        hits = upstream.hits["/fee-estimates"]
+        assert hits >= 2
+        assert estimator.estimate_from_mempool("testnet")["high_priority"] == 9.0
+        assert upstream.hits["/fee-estimates"] == hits
+    finally:
+        estimator.stop()
+
+def test_histogram_estimates_fee_rate_per_confirmation_target():
+    # 0,6 MvB a 50, 0,8 MvB a 20, 1,0 MvB a 10 e 2,0 MvB a 3 sat/vB
+    histogram = FeeHistogram([[20, 800_000], [50, 600_000], [10, 1_000_000], [3, 2_000_000]], min_rate=1.0)
+
+    assert histogram.total_vsize == 4_400_000
+    assert histogram.fee_rates([1, 2, 3, 4, 5, 144]) == {1: 20, 2: 10, 3: 3, 4: 3, 5: 1.0, 144: 1.0}
+    assert histogram.recommended() == {"fastestFee": 20, "halfHourFee": 3, "hourFee": 1.0, "economyFee": 1.0}
+    with pytest.raises(ValueError):
+        histogram.fee_rate(0)
+
+def test_histogram_source_derives_priorities_from_mempool_snapshot(router, upstream):
+    upstream.routes["/mempool"] = (200, {"count": 3, "vsize": 2_500_000, "total_fee": 1,
+                                         "fee_histogram": [[30, 1_200_000], [5, 1_300_000]]})
+    estimator = FeeEstimator(cache_duration=60, source="histogram")
+
+    fees = estimator.estimate_from_mempool("testnet")
+    assert (fees["high_priority"], fees["medium_priority"], fees["low_priority"]) == (30, 1.0, 1.0)
+    assert estimator.histogram("testnet").fee_rate(2) == 5
+    # Taxas e histograma vêm do mesmo snapshot
+    assert upstream.hits["/mempool"] == 1
+    assert upstream.hits["/fee-estimates"] == 0
+
+MEMPOOL_BLOCKS = [
+    {"blockVSize": 1_000_000, "nTx": 2100, "medianFee": 30, "feeRange": [20, 22, 25, 30, 50, 80, 200]},
+    {"blockVSize": 997_000, "nTx": 2900, "medianFee": 12, "feeRange": [8, 9, 10, 12, 14, 16, 19]},
+    # Último bloco da API: o resto da mempool (3,5 blocos)
+    {"blockVSize": 3_500_000, "nTx": 9000, "medianFee": 5, "feeRange": [2, 3, 4, 5, 6, 7, 8]}
+]
+
+def test_projection_maps_fee_rate_to_confirmation_blocks():
+    projection = MempoolProjection.from_mempool_blocks(
+        MempoolProvider({"testnet": "http://mempool"}).parse("mempool_blocks", MEMPOOL_BLOCKS, "testnet"),
+        min_rate=1.0
+    )
+
+    # O bloco agregado vira 4 blocos; o último fica com a menor taxa projetada nele
+    assert projection.boundaries == [20, 8, 6.5, 5, 3.5, 2]
+    assert [projection.blocks_for_rate(rate) for rate in (200, 20, 10, 8, 6, 2, 1.0)] == [1, 1, 2, 2, 4, 6, 7]
+    assert projection.blocks_for_rate(0.5) is None
+    assert [projection.rate_for_blocks(target) for target in (1, 3, 6, 10)] == [20, 6.5, 2, 1.0]
+    with pytest.raises(ValueError):
+        projection.rate_for_blocks(0)
+
+def test_projection_uses_mempool_blocks_or_falls_back_to_histogram(monkeypatch, router, upstream):
+    upstream.routes["/mempool"] = (200, {"count": 3, "vsize": 2_500_000, "total_fee": 1,
+                                         "fee_histogram": [[30, 1_200_000], [5, 1_300_000]]})
+    # Só Esplora: projeção derivada do histograma
+    estimator = FeeEstimator(cache_duration=60)
+    projection = estimator.projection("testnet")
+    assert (projection.source, projection.boundaries) == ("histogram", [30, 5, 1.0])
+    assert projection.blocks_for_rate(10) == 2
+
+    upstream.routes["/v1/fees/mempool-blocks"] = (200, MEMPOOL_BLOCKS)
+    monkeypatch.setattr(fee_service, "provider_router",
+                        ProviderRouter([MempoolProvider({"testnet": upstream.url})], rate_limits={"mempool": 0}))
+    estimator = FeeEstimator(cache_duration=60)
+    projection = asyncio.run(estimator.projection_async("testnet"))
+    assert projection.source == "mempool-blocks"
+    assert estimator.projection("testnet").rate_for_blocks(2) == 8
+    assert upstream.hits["/v1/fees/mempool-blocks"] == 1
+
+def fees(rate):
+    return {"high": rate * 2, "medium": rate, "low": rate / 2, "min": 1.0}
+
+def test_fee_history_keeps_last_observations_across_restarts(tmp_path):
+    history = FeeHistory(tmp_path, capacity=4)
+    now = time.time()
+    for i in range(10):
+        history.record("testnet", fees(i + 1), timestamp=now - 10 + i)
+
+    # Buffer circular com as 4 últimas; o arquivo foi compactado ao passar de 8 registros
+    assert (tmp_path / "fee_history_testnet.bin").stat().st_size < 10 * 40
+    reloaded = FeeHistory(tmp_path, capacity=4)
+    series = reloaded.series("testnet", 60, points=60, average=1)
+    assert series["samples"] == 4
+    assert [point["medium"] for point in series["points"]] == [7.0, 8.0, 9.0, 10.0]
+    assert reloaded.series("mainnet", 60)["samples"] == 0
+
+def test_fee_history_discards_torn_trailing_record(tmp_path):
+    history = FeeHistory(tmp_path, capacity=10)
+    now = time.time()
+    history.record("testnet", fees(1), timestamp=now - 30)
+    path = tmp_path / "fee_history_testnet.bin"
+    # Queda no meio da gravação do segundo registro
+    with open(path, "ab") as f:
+        f.write(b"\x01" * 13)
+
+    restarted = FeeHistory(tmp_path, capacity=10)
+    restarted.record("testnet", fees(3), timestamp=now - 10)
+    assert path.stat().st_size == 2 * 40
+
+    series = FeeHistory(tmp_path, capacity=10).series("testnet", 60, points=60, average=1)
+    assert series["samples"] == 2
+    assert [point["medium"] for point in series["points"]] == [1.0, 3.0]
+
+def test_fee_history_downsamples_window_with_moving_average(tmp_path):
+    history = FeeHistory(tmp_path, capacity=100)
+    now = time.time()
+    # Fora da janela
+    history.record("testnet", fees(100), timestamp=now - 7200)
+    # Dois intervalos de 30 minutos, com duas observações cada
+    for offset, rate in ((3500, 4), (3000, 6), (1500, 10), (100, 20)):
+        history.record("testnet", fees(rate), timestamp=now - offset)
+
+    series = history.series("testnet", 3600, points=2, average=2)
+    assert series["interval"] == 1800
+    assert series["samples"] == 4
+    assert [point["medium"] for point in series["points"]] == [5.0, 15.0]
+    assert [point["high"] for point in series["moving_average"]] == [10.0, 20.0]
+
+def test_fee_history_moving_average_spans_time_not_points(tmp_path):
+    history = FeeHistory(tmp_path, capacity=100)
+    now = time.time()
+    # Quatro intervalos de 15 minutos; o segundo e o terceiro ficam vazios
+    history.record("testnet", fees(4), timestamp=now - 3500)
+    history.record("testnet", fees(8), timestamp=now - 100)
+
+    series = history.series("testnet", 3600, points=4, average=2)
+    assert [point["medium"] for point in series["points"]] == [4.0, 8.0]
+    # Na janela de 2 intervalos do último ponto, o penúltimo está vazio: a média é só dele
+    assert [point["medium"] for point in series["moving_average"]] == [4.0, 8.0]
+    assert history.series("testnet", 3600, points=4, average=4)["moving_average"][1]["medium"] == 6.0
+
+def test_parse_window():
+    assert parse_window("90m") == 5400
+    assert parse_window("24h") == 86400
+    assert parse_window("7d") == 604800
+    assert parse_window("300") == 300
+    for value in ("", "0h", "1y", "-5m"):
+        with pytest.raises(ValueError):
+            parse_window(value)
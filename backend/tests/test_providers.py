@@ -0,0 +1,261 @@
+"""
+Testes dos provedores de blockchain e do roteamento entre eles, contra servidores HTTP locais.
+
+Uso:
+python -m pytest tests/test_providers.py
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from app.services import blockchain_service
+from app.services.cache import TTLPolicy
+from app.services.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+from app.services.rate_limiter import TokenBucket, retry_after_seconds
+from app.services.providers import (
+    FEES, TX_STATUS, UTXOS, BlockchairProvider, EsploraProvider, MempoolProvider, ProviderRouter,
+    ProviderUnavailable
+)
+from conftest import FakeUpstream
+
+ADDRESS = "tb1qprovider"
+TXID = "ab" * 32
+ESPLORA_UTXOS = [{"txid": "c" * 64, "vout": 0, "value": 2500, "status": {"confirmed": True, "block_height": 95}}]
+
+@pytest.fixture
+def backup():
+    server = FakeUpstream()
+    yield server
+    server.close()
+
+def test_router_fails_over_to_next_provider(upstream, backup):
+    upstream.routes[f"/address/{ADDRESS}/utxo"] = (503, "indisponível")
+    backup.routes[f"/address/{ADDRESS}/utxo"] = (200, ESPLORA_UTXOS)
+    router = ProviderRouter([EsploraProvider({"testnet": upstream.url}), MempoolProvider({"testnet": backup.url})])
+
+    assert router.get(UTXOS, "testnet", address=ADDRESS) == ESPLORA_UTXOS
+    stats = router.stats()
+    assert stats["esplora/testnet"]["errors"] == 1
+    assert stats["mempool/testnet"]["errors"] == 0
+
+    # O provedor com erro vai para o fim da fila
+    assert [provider.name for provider in router.candidates(UTXOS, "testnet")] == ["mempool", "esplora"]
+
+def test_router_prefers_fastest_healthy_provider(upstream, backup):
+    def slow():
+        time.sleep(0.2)
+        return ESPLORA_UTXOS
+
+    upstream.routes[f"/address/{ADDRESS}/utxo"] = (200, slow)
+    backup.routes[f"/address/{ADDRESS}/utxo"] = (200, ESPLORA_UTXOS)
+    router = ProviderRouter([EsploraProvider({"testnet": upstream.url}), MempoolProvider({"testnet": backup.url})])
+
+    for _ in range(5):
+        router.get(UTXOS, "testnet", address=ADDRESS)
+
+    # Cada provedor é medido uma vez; depois disso só o mais rápido é usado
+    assert upstream.hits[f"/address/{ADDRESS}/utxo"] == 1
+    assert backup.hits[f"/address/{ADDRESS}/utxo"] == 4
+
+def test_router_skips_providers_reported_offline(upstream, backup):
+    upstream.routes[f"/address/{ADDRESS}/utxo"] = (200, ESPLORA_UTXOS)
+    backup.routes[f"/address/{ADDRESS}/utxo"] = (200, ESPLORA_UTXOS)
+    router = ProviderRouter(
+        [EsploraProvider({"testnet": upstream.url}), MempoolProvider({"testnet": backup.url})],
+        is_available=lambda provider, network: provider != "esplora"
+    )
+
+    router.get(UTXOS, "testnet", address=ADDRESS)
+
+    assert upstream.hits[f"/address/{ADDRESS}/utxo"] == 0
+
+def test_router_raises_when_every_provider_fails(upstream, backup):
+    upstream.routes[f"/address/{ADDRESS}/utxo"] = (500, "erro")
+    backup.routes[f"/address/{ADDRESS}/utxo"] = (200, "não é json")
+    router = ProviderRouter([EsploraProvider({"testnet": upstream.url}), MempoolProvider({"testnet": backup.url})])
+
+    with pytest.raises(ProviderUnavailable) as error:
+        router.get(UTXOS, "testnet", address=ADDRESS)
+    assert set(error.value.errors) == {"esplora", "mempool"}
+
+    with pytest.raises(ProviderUnavailable):
+        asyncio.run(router.get_async(UTXOS, "testnet", address=ADDRESS))
+
+def test_esplora_tx_status_counts_confirmations_from_tip(upstream):
+    upstream.routes[f"/tx/{TXID}/status"] = (200, {
+        "confirmed": True, "block_height": 100, "block_hash": "00" * 32, "block_time": 1680350400
+    })
+    router = ProviderRouter([EsploraProvider({"testnet": upstream.url})])
+
+    assert router.get(TX_STATUS, "testnet", tip_height=105, txid=TXID) == {
+        "confirmations": 6,
+        "block_height": 100,
+        "block_hash": "00" * 32,
+        "timestamp": "2023-04-01T12:00:00Z"
+    }
+
+def test_blockchair_adapter_normalizes_responses(upstream):
+    upstream.routes[f"/dashboards/address/{ADDRESS}?limit=0,1000"] = (200, {"data": {ADDRESS: {"utxo": [
+        {"block_id": 95, "transaction_hash": "c" * 64, "index": 0, "value": 2500},
+        {"block_id": -1, "transaction_hash": "d" * 64, "index": 1, "value": 700}
+    ]}}})
+    upstream.routes[f"/dashboards/transaction/{TXID}"] = (200, {
+        "data": {TXID: {"transaction": {"block_id": 100, "time": "2023-04-01 12:00:00"}}},
+        "context": {"state": 101}
+    })
+    upstream.routes["/stats"] = (200, {"data": {"suggested_transaction_fee_per_byte_sat": 12}})
+    router = ProviderRouter([BlockchairProvider({"testnet": upstream.url})])
+
+    assert router.get(UTXOS, "testnet", address=ADDRESS) == ESPLORA_UTXOS + [
+        {"txid": "d" * 64, "vout": 1, "value": 700, "status": {"confirmed": False, "block_height": None}}
+    ]
+    assert router.get(TX_STATUS, "testnet", txid=TXID)["confirmations"] == 2
+    assert router.get(FEES, "testnet") == {"fastestFee": 12, "halfHourFee": 12, "hourFee": 12, "economyFee": 12}
+
+def test_blockchair_truncated_utxo_list_falls_back_to_next_provider(upstream, backup):
+    upstream.routes[f"/dashboards/address/{ADDRESS}?limit=0,1000"] = (200, {"data": {ADDRESS: {
+        "address": {"unspent_output_count": 1500},
+        "utxo": [{"block_id": 95, "transaction_hash": "c" * 64, "index": 0, "value": 2500}] * 1000
+    }}})
+    backup.routes[f"/address/{ADDRESS}/utxo"] = (200, ESPLORA_UTXOS)
+    router = ProviderRouter([BlockchairProvider({"testnet": upstream.url}),
+                             EsploraProvider({"testnet": backup.url})])
+
+    assert router.get(UTXOS, "testnet", address=ADDRESS) == ESPLORA_UTXOS
+    with pytest.raises(ProviderUnavailable, match="truncada"):
+        ProviderRouter([BlockchairProvider({"testnet": upstream.url})]).get(UTXOS, "testnet", address=ADDRESS)
+
+def test_esplora_fee_estimates_map_to_recommended_format(upstream, backup):
+    upstream.routes["/fee-estimates"] = (200, {"1": 20.5, "3": 15.0, "6": 10.2, "144": 1.0})
+    backup.routes["/v1/fees/recommended"] = (200, {
+        "fastestFee": 21, "halfHourFee": 16, "hourFee": 11, "economyFee": 2, "minimumFee": 1
+    })
+
+    assert ProviderRouter([EsploraProvider({"testnet": upstream.url})]).get(FEES, "testnet") == {
+        "fastestFee": 20.5, "halfHourFee": 15.0, "hourFee": 10.2, "economyFee": 1.0
+    }
+    assert ProviderRouter([MempoolProvider({"testnet": backup.url})]).get(FEES, "testnet") == {
+        "fastestFee": 21, "halfHourFee": 16, "hourFee": 11, "economyFee": 2
+    }
+
+def test_circuit_breaker_opens_and_recovers_through_half_open():
+    breaker = CircuitBreaker("api.exemplo", failure_threshold=2, cooldown=0.1)
+
+    breaker.record_failure()
+    assert breaker.allow() and breaker.state == CLOSED
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+
+    time.sleep(0.15)
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow()
+    # Apenas uma chamada de teste por vez
+    assert not breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == OPEN
+
+    time.sleep(0.15)
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CLOSED
+    assert breaker.stats()["opened"] == 2
+
+def test_open_circuit_serves_cache_without_touching_the_network(monkeypatch, upstream):
+    address = "tb1qcircuit"
+    upstream.routes[f"/address/{address}/utxo"] = (500, "erro")
+    router = ProviderRouter([EsploraProvider({"testnet": upstream.url})])
+    breaker = router.breaker(router.providers[0], "testnet")
+    breaker.failure_threshold, breaker.cooldown = 2, 60
+    monkeypatch.setattr(blockchain_service, "provider_router", router)
+    monkeypatch.setattr(blockchain_service.blockchain_cache, "ttl_policy", TTLPolicy({}, 0))
+    blockchain_service.blockchain_cache.set(f"balance_testnet_{address}", {"confirmed": 900, "unconfirmed": 0})
+
+    for _ in range(5):
+        assert blockchain_service.lookup_balance(address, "testnet") == blockchain_service.CachedResult(
+            {"confirmed": 900, "unconfirmed": 0}, stale=True
+        )
+
+    assert upstream.hits[f"/address/{address}/utxo"] == 2
+    assert breaker.state == OPEN
+
+def test_token_bucket_queues_within_budget_and_rejects_beyond_it():
+    bucket = TokenBucket("api.exemplo", rate=10, burst=2, max_wait=0.25, max_queue=10)
+
+    assert bucket.reserve() == 0 and bucket.reserve() == 0
+    waits = [bucket.reserve() for _ in range(3)]
+    assert [round(wait, 1) for wait in waits[:2]] == [0.1, 0.2]
+    # A terceira esperaria 0,3 s, acima de max_wait
+    assert waits[2] is None
+    assert bucket.stats()["queued"] == 2
+
+    bucket.pause(1)
+    assert bucket.reserve() is None
+
+def test_retry_after_accepts_seconds_and_http_dates():
+    assert retry_after_seconds("3") == 3
+    assert retry_after_seconds("Wed, 21 Oct 2015 07:28:00 GMT") == 0
+    assert retry_after_seconds("amanhã") is None
+    assert retry_after_seconds(None) is None
+
+def test_throttled_request_waits_for_retry_after_instead_of_failing(upstream):
+    responses = iter([(429, "devagar", {"Retry-After": "0.2"}), (200, ESPLORA_UTXOS)])
+    upstream.routes[f"/address/{ADDRESS}/utxo"] = lambda: next(responses)
+    router = ProviderRouter([EsploraProvider({"testnet": upstream.url})])
+
+    started = time.monotonic()
+    assert router.get(UTXOS, "testnet", address=ADDRESS) == ESPLORA_UTXOS
+    assert time.monotonic() - started >= 0.2
+    assert upstream.hits[f"/address/{ADDRESS}/utxo"] == 2
+    assert router.limiter_stats()[upstream.url.split("//")[1]]["throttled"] == 1
+
+def test_throttled_async_request_fails_over_when_retry_after_is_too_long(upstream, backup):
+    upstream.routes[f"/address/{ADDRESS}/utxo"] = (429, "devagar", {"Retry-After": "3600"})
+    backup.routes[f"/address/{ADDRESS}/utxo"] = (200, ESPLORA_UTXOS)
+    router = ProviderRouter([EsploraProvider({"testnet": upstream.url}), MempoolProvider({"testnet": backup.url})])
+
+    assert asyncio.run(router.get_async(UTXOS, "testnet", address=ADDRESS)) == ESPLORA_UTXOS
+    assert upstream.hits[f"/address/{ADDRESS}/utxo"] == 1
+
+def test_transient_failures_are_retried_with_backoff(upstream):
+    responses = iter([(503, "indisponível"), (502, "gateway"), (200, ESPLORA_UTXOS)])
+    upstream.routes[f"/address/{ADDRESS}/utxo"] = lambda: next(responses)
+    router = ProviderRouter([EsploraProvider({"testnet": upstream.url})], max_retries=2)
+
+    assert router.get(UTXOS, "testnet", address=ADDRESS) == ESPLORA_UTXOS
+    assert upstream.hits[f"/address/{ADDRESS}/utxo"] == 3
+    assert router.request_stats()["retries"] == 2
+
+def test_call_budget_caps_slow_upstream(upstream):
+    def slow():
+        time.sleep(1)
+        return ESPLORA_UTXOS
+
+    upstream.routes[f"/address/{ADDRESS}/utxo"] = (200, slow)
+    router = ProviderRouter([EsploraProvider({"testnet": upstream.url})])
+
+    started = time.monotonic()
+    with pytest.raises(ProviderUnavailable):
+        router.get(UTXOS, "testnet", budget=0.3, address=ADDRESS)
+    assert time.monotonic() - started < 0.9
+
+def test_hedged_request_returns_backup_response_when_primary_is_slow(upstream, backup):
+    def slow():
+        time.sleep(1)
+        return ESPLORA_UTXOS
+
+    upstream.routes[f"/address/{ADDRESS}/utxo"] = (200, slow)
+    backup.routes[f"/address/{ADDRESS}/utxo"] = (200, ESPLORA_UTXOS)
+    router = ProviderRouter(
+        [EsploraProvider({"testnet": upstream.url}), MempoolProvider({"testnet": backup.url})], hedge=True
+    )
+    router.hedge_delay = 0.1
+
+    started = time.monotonic()
+    assert asyncio.run(router.get_async(UTXOS, "testnet", address=ADDRESS)) == ESPLORA_UTXOS
+    assert time.monotonic() - started < 0.8
+    assert router.request_stats() == {"retries": 0, "hedged": 1, "hedge_wins": 1}
+    # A requisição cancelada conta como latência mínima do provedor lento
+    assert router.stats()["esplora/testnet"]["latency_ms"] >= 100
@@ -0,0 +1,80 @@
+"""
+Testes do cálculo de peso e tamanho virtual de transações e da cotação de taxas.
+
+Uso:
+python -m pytest tests/test_tx_size.py
+"""
+
+from bitcoinlib.keys import HDKey
+from bitcoinlib.transactions import Transaction
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.models.fee_models import FeeEstimateModel
+from app.models.utxo_models import Input, Output, TransactionRequest
+from app.routers import fee
+from app.services import fee_service
+from app.services.transaction import BitcoinLibBuilder
+from app.services.tx_size import (
+    address_type, input_type, raw_weight, transaction_shape, transaction_vsize, transaction_weight
+)
+
+P2WPKH = "tb1qw508d6qejxtdg4y5r3zarvary0c5xw7kxpjzsx"
+P2PKH = "mxosQ4CvQR8ipfWdRktyB3u16tauEdamGc"
+
+def test_vsize_matches_reference_transactions():
+    assert transaction_vsize({"p2pkh": 1}, {"p2pkh": 2}) == 226
+    assert transaction_vsize({"p2wpkh": 1}, {"p2wpkh": 2}) == 141
+    assert transaction_vsize({"p2tr": 1}, {"p2tr": 1}) == 111
+    # Input legado em transação segwit: marcador, flag e um contador de testemunha vazio
+    assert transaction_weight({"p2pkh": 1, "p2wpkh": 1}, {"p2wpkh": 1}) == \
+        transaction_weight({"p2pkh": 1}, {"p2wpkh": 1}) + 41 * 4 + 108 + 2 + 1
+    # Mais de 252 outputs: contador com 3 bytes
+    assert transaction_weight({"p2wpkh": 1}, {"p2wpkh": 253}) - transaction_weight({"p2wpkh": 1}, {"p2wpkh": 252}) \
+        == (31 + 2) * 4
+
+def test_raw_weight_of_signed_transaction_is_within_signature_estimate():
+    key = HDKey(network="testnet", witness_type="segwit")
+    tx = Transaction(network="testnet", witness_type="segwit")
+    for vout in range(2):
+        tx.add_input(prev_txid="a" * 64, output_n=vout, keys=key, value=100000, witness_type="segwit")
+    tx.add_output(150000, key.address())
+    tx.sign(key)
+
+    weight = raw_weight(tx.raw())
+    estimate = transaction_weight({"p2wpkh": 2}, {"p2wpkh": 1})
+    # A estimativa usa assinaturas de 72 bytes; as reais têm 71 ou 72
+    assert 0 <= estimate - weight <= 2
+    assert raw_weight(bytes.fromhex("01000000" + "00" * 6)) == 40
+
+def test_builder_fee_follows_transaction_shape():
+    request = TransactionRequest(
+        inputs=[Input(txid="b" * 64, vout=0, address=P2WPKH),
+                Input(txid="c" * 64, vout=1, script="76a914d0c59903c5bac2868760e90fd521a4665aa7652088ac")],
+        outputs=[Output(address=P2PKH, value=5000), Output(address=P2WPKH, value=4000)],
+        fee_rate=10.0
+    )
+
+    assert (input_type(address="2N2JD6wb56AfK4tfmM6PwdVmoYk2dCKf4Br"), address_type(P2WPKH)) == ("p2sh-p2wpkh", "p2wpkh")
+    assert transaction_shape(request.inputs, request.outputs) == ({"p2wpkh": 1, "p2pkh": 1}, {"p2pkh": 1, "p2wpkh": 1})
+    vsize = transaction_vsize({"p2wpkh": 1, "p2pkh": 1}, {"p2pkh": 1, "p2wpkh": 1})
+    # Sem o valor dos inputs, a taxa da resposta é a estimada pelo tamanho
+    assert BitcoinLibBuilder().build(request, "testnet").fee == vsize * 10
+
+def test_quote_endpoint_prices_planned_transaction(monkeypatch):
+    async def estimate(network):
+        return FeeEstimateModel(high=20.0, medium=10.0, low=5.0, min=1.5, timestamp=1650123456, unit="sat/vB")
+
+    monkeypatch.setattr(fee_service, "get_fee_estimate_async", estimate)
+    app = FastAPI()
+    app.include_router(fee.router, prefix="/api/fee")
+    client = TestClient(app)
+
+    response = client.get("/api/fee/quote?inputs=p2wpkh:2&outputs=p2wpkh,p2tr&network=testnet")
+    assert response.status_code == 200
+    quote = response.json()
+    assert (quote["weight"], quote["vsize"]) == (882, 221)
+    assert quote["fees"] == {"high": 4420, "medium": 2210, "low": 1105, "min": 332}
+    assert client.get("/api/fee/quote?inputs=p2wsh:1&outputs=p2wpkh").status_code == 400
+    assert client.get("/api/fee/quote?inputs=p2wpkh:x&outputs=p2wpkh").status_code == 400
+    assert client.get("/api/fee/quote?inputs=p2wpkh:0&outputs=p2wpkh").status_code == 400
@@ -0,0 +1,38 @@
+"""
+Testes unitários do cliente HTTP das APIs externas.
+
+Uso:
+python -m pytest tests/test_upstream.py
+"""
+
+import time
+
+import pytest
+import requests
+
+from app.services.upstream import UpstreamClient
+
+def test_connections_are_reused_across_requests(upstream):
+    client = UpstreamClient()
+    upstream.routes["/blocks/tip/height"] = (200, "800000")
+
+    for _ in range(10):
+        assert client.get(f"{upstream.url}/blocks/tip/height").text == "800000"
+
+    assert upstream.hits["/blocks/tip/height"] == 10
+    assert len(upstream.connections) == 1
+    client.close()
+
+def test_requests_use_configured_timeouts(upstream):
+    client = UpstreamClient(connect_timeout=1, read_timeout=0.2)
+
+    def slow_response():
+        time.sleep(1)
+        return "ok"
+
+    upstream.routes["/lento"] = (200, slow_response)
+
+    assert client.timeout == (1, 0.2)
+    with pytest.raises(requests.exceptions.ReadTimeout):
+        client.get(f"{upstream.url}/lento")
+    client.close()